@@ -0,0 +1 @@
+# Funções de dados do aplicativo Leitura de Leis por Cards, sem dependência do Streamlit
@@ -0,0 +1,5 @@
+import sys
+
+from leitura.cli import main
+
+sys.exit(main())
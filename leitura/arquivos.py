@@ -0,0 +1,206 @@
+# Leitura e escrita de arquivos de cards (importação, exportação e backups)
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+from datetime import datetime
+
+# Pasta padrão onde os backups são gravados
+DIRETORIO_BACKUP = "backup"
+# Tamanho dos blocos de texto lidos de cada vez pelo leitor incremental de cards
+TAMANHO_BLOCO_LEITURA = 64 * 1024
+# Tamanho máximo (em caracteres) de um card no arquivo: limita a memória usada diante de um arquivo malformado
+TAMANHO_MAXIMO_CARD = 16 * 1024 * 1024
+# Campos de texto obrigatórios em cada card importado
+CAMPOS_OBRIGATORIOS = ("concurso", "lei", "pergunta", "resposta")
+# Assinatura (primeiros bytes) de um arquivo compactado com gzip
+ASSINATURA_GZIP = b"\x1f\x8b"
+
+# Erro levantado quando o arquivo importado não é JSON válido ou tem um card inválido
+class ArquivoInvalido(ValueError):
+    pass
+
+# Função para calcular a impressão digital de um arquivo (SHA-1 do tamanho e dos primeiros e últimos
+# tamanho_amostra bytes), sem ler o arquivo inteiro: identifica o arquivo de uma importação interrompida
+def impressao_digital(arquivo, tamanho_amostra=64 * 1024):
+    if isinstance(arquivo, str):
+        with open(arquivo, "rb") as f:
+            return impressao_digital(f, tamanho_amostra)
+    posicao = arquivo.tell()
+    tamanho = arquivo.seek(0, os.SEEK_END)
+    resumo = hashlib.sha1(str(tamanho).encode("utf-8"))
+    for inicio in (0, max(0, tamanho - tamanho_amostra)):
+        arquivo.seek(inicio)
+        amostra = arquivo.read(tamanho_amostra)
+        resumo.update(amostra if isinstance(amostra, bytes) else amostra.encode("utf-8"))
+    arquivo.seek(posicao)
+    return resumo.hexdigest()[:16]
+
+# Função para validar um card lido de um arquivo (numero é a posição do card no arquivo, para a mensagem de erro)
+def validar_card(card, numero):
+    if not isinstance(card, dict):
+        raise ArquivoInvalido(f"Card {numero}: esperado um objeto JSON com os campos do card.")
+    for campo in CAMPOS_OBRIGATORIOS:
+        if not isinstance(card.get(campo), str) or not card[campo].strip():
+            raise ArquivoInvalido(f"Card {numero}: o campo \"{campo}\" é obrigatório e deve ser um texto.")
+    if not isinstance(card.get("referencia") or "", str):
+        raise ArquivoInvalido(f"Card {numero}: o campo \"referencia\" deve ser um texto.")
+    vezes_lido = card.get("vezes_lido") or 0
+    if not isinstance(vezes_lido, int) or isinstance(vezes_lido, bool) or vezes_lido < 0:
+        raise ArquivoInvalido(f"Card {numero}: o campo \"vezes_lido\" deve ser um número inteiro não negativo.")
+    return card
+
+# Função para ler o texto de um arquivo binário, descompactando-o se for gzip (detectado pelos primeiros bytes)
+def _abrir_texto(arquivo):
+    if hasattr(arquivo, "peek"):
+        assinatura = arquivo.peek(2)[:2]
+    else:
+        posicao = arquivo.tell()
+        assinatura = arquivo.read(2)
+        arquivo.seek(posicao)
+    if assinatura == ASSINATURA_GZIP:
+        arquivo = gzip.GzipFile(fileobj=arquivo, mode="rb")
+    return io.TextIOWrapper(arquivo, encoding="utf-8-sig")
+
+# Função para ler os itens de um array JSON um por vez, guardando em memória só um bloco e o item em leitura
+def _itens_do_array(texto, buffer, tamanho_bloco):
+    decodificador = json.JSONDecoder()
+    posicao = buffer.index("[") + 1
+    numero = 0
+    esperando_item = True
+    fim_do_arquivo = False
+    while True:
+        # Pular espaços; buscar mais texto quando o bloco atual acabar
+        while posicao < len(buffer) and buffer[posicao].isspace():
+            posicao += 1
+        if posicao >= len(buffer):
+            if fim_do_arquivo:
+                raise ArquivoInvalido(f"Array JSON incompleto: o arquivo terminou depois do card {numero}.")
+            bloco = texto.read(tamanho_bloco)
+            fim_do_arquivo = not bloco
+            buffer, posicao = buffer[posicao:] + bloco, 0
+            continue
+
+        caractere = buffer[posicao]
+        if caractere == "]" and (not esperando_item or numero == 0):
+            if buffer[posicao + 1:].strip() or texto.read(tamanho_bloco).strip():
+                raise ArquivoInvalido("Há conteúdo depois do fim do array JSON.")
+            return
+        if not esperando_item:
+            if caractere != ",":
+                raise ArquivoInvalido(f"JSON inválido depois do card {numero}: esperada uma vírgula ou o fim do array.")
+            posicao += 1
+            esperando_item = True
+            continue
+
+        try:
+            item, fim = decodificador.raw_decode(buffer, posicao)
+        except json.JSONDecodeError as erro:
+            # O item pode só estar incompleto no bloco atual: ler mais (pelo menos o que já há, para não
+            # decodificar o mesmo início muitas vezes) até o fim do arquivo ou o tamanho máximo de um card
+            if fim_do_arquivo:
+                raise ArquivoInvalido(f"JSON inválido no card {numero + 1}: {erro.msg}.")
+            if len(buffer) - posicao > TAMANHO_MAXIMO_CARD:
+                raise ArquivoInvalido(f"Card {numero + 1}: JSON inválido ou maior que {TAMANHO_MAXIMO_CARD // 2 ** 20} MB.")
+            bloco = texto.read(max(tamanho_bloco, len(buffer) - posicao))
+            fim_do_arquivo = not bloco
+            buffer, posicao = buffer[posicao:] + bloco, 0
+            continue
+        numero += 1
+        yield item
+        posicao = fim
+        esperando_item = False
+
+# Função para ler os objetos de um arquivo JSON Lines (um por linha) um por vez; inicio é o texto já lido
+def _linhas_json(texto, inicio):
+    # Só "\n" separa linhas (como na iteração do arquivo): str.splitlines também quebraria em U+2028, U+0085 e
+    # outros caracteres que podem aparecer dentro das strings JSON
+    linhas = io.StringIO(inicio + texto.readline(), newline="\n")
+    for numero_linha, linha in enumerate(itertools.chain(linhas, texto), 1):
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as erro:
+            raise ArquivoInvalido(f"JSON inválido na linha {numero_linha}: {erro.msg}.")
+
+# Função para ler e validar os cards de um arquivo JSON (array), JSON Lines ou de um deles compactado com gzip,
+# um por vez: a memória usada não depende do tamanho do arquivo. Aceita um caminho ou um arquivo aberto.
+def ler_cards(arquivo, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+    if isinstance(arquivo, str):
+        with open(arquivo, "rb") as f:
+            yield from ler_cards(f, tamanho_bloco)
+        return
+    texto = arquivo if isinstance(arquivo, io.TextIOBase) else _abrir_texto(arquivo)
+    try:
+        # O formato é decidido pelo primeiro caractere (um array JSON minificado é uma única linha enorme)
+        inicio = texto.read(tamanho_bloco)
+        while inicio and not inicio.strip():
+            inicio = texto.read(tamanho_bloco)
+        if inicio.lstrip().startswith("["):
+            objetos = _itens_do_array(texto, inicio, tamanho_bloco)
+        else:
+            objetos = _linhas_json(texto, inicio)
+        for numero, card in enumerate(objetos, 1):
+            yield validar_card(card, numero)
+    except UnicodeDecodeError:
+        raise ArquivoInvalido("O arquivo não está em UTF-8.")
+    except (OSError, EOFError) as erro:
+        raise ArquivoInvalido(f"Não foi possível ler o arquivo compactado: {erro}")
+    finally:
+        # Não fechar o arquivo recebido junto com o leitor de texto criado aqui
+        if texto is not arquivo:
+            texto.detach()
+
+# Função para contar os cards de um arquivo validando todos eles, sem guardá-los (antes de uma operação que não
+# deve parar no meio, como a restauração de um backup, que apaga os cards atuais antes de gravar os do arquivo)
+def contar_cards(arquivo):
+    if isinstance(arquivo, str):
+        return sum(1 for _ in ler_cards(arquivo))
+    posicao = arquivo.tell()
+    try:
+        return sum(1 for _ in ler_cards(arquivo))
+    finally:
+        arquivo.seek(posicao)
+
+# Função para gravar cards como array JSON sem montar a lista inteira em memória
+def escrever_json(cards, arquivo):
+    total = 0
+    arquivo.write("[")
+    for card in cards:
+        arquivo.write(",\n" if total else "\n")
+        arquivo.write(json.dumps(card, ensure_ascii=False))
+        total += 1
+    arquivo.write("\n]\n" if total else "]\n")
+    return total
+
+# Função para gravar cards em JSON Lines, um por linha
+def escrever_jsonl(cards, arquivo):
+    total = 0
+    for card in cards:
+        arquivo.write(json.dumps(card, ensure_ascii=False) + "\n")
+        total += 1
+    return total
+
+# Função para criar backup dos dados em formato JSON
+def criar_backup(dados, usuario, session_id, diretorio=DIRETORIO_BACKUP):
+    dados = iter(dados)
+    primeiro = next(dados, None)
+    if primeiro is None:
+        return None
+    os.makedirs(diretorio, exist_ok=True)
+    nome_backup = os.path.join(diretorio, f"{usuario}_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(nome_backup, "w", encoding="utf-8") as f_backup:
+        escrever_json(itertools.chain([primeiro], dados), f_backup)
+    return nome_backup
+
+# Função para listar os backups de uma sessão do usuário, do mais recente ao mais antigo
+def listar_backups(usuario, session_id, diretorio=DIRETORIO_BACKUP):
+    if not os.path.exists(diretorio):
+        return []
+    return sorted(
+        [f for f in os.listdir(diretorio) if f.startswith(f"{usuario}_{session_id}")],
+        reverse=True
+    )
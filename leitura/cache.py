@@ -0,0 +1,297 @@
+# Cache de resultados por usuário (como o índice de facetas) em dois níveis:
+#  1. em memória, no próprio processo;
+#  2. opcionalmente compartilhado entre processos/réplicas do app, em SQLite (mesma máquina) ou Redis.
+# Cada valor leva a versão dos dados do usuário com que foi calculado. Toda gravação de cards do usuário
+# incrementa a versão (no nível compartilhado, se houver, para que os outros processos também a vejam),
+# e o próximo acesso recalcula o valor. O nível compartilhado é configurado pela variável de ambiente
+# CACHE_COMPARTILHADO (sqlite:///caminho/cache.db ou redis://host:6379/0) ou por configurar_cache().
+# À parte das versões, um diário por usuário registra só as alterações dos textos dos cards (inserção, exclusão e
+# edição de pergunta e resposta), para que índices derivados do texto (leitura.duplicatas) se atualizem aos poucos.
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+# Tempo máximo (segundos) de um valor em cache, para limitar o atraso diante de gravações feitas fora do app
+TEMPO_MAXIMO_CACHE = 60
+# Variável de ambiente com o endereço do cache compartilhado
+VARIAVEL_CACHE = "CACHE_COMPARTILHADO"
+# Prefixo das chaves no cache compartilhado
+PREFIXO = "leitura:"
+# Chave da versão que invalida os valores de todos os usuários
+TODOS = "*"
+# Alterações guardadas no diário de cada usuário; quem estiver mais atrasado que isso reconstrói o que deriva dele
+LIMITE_DIARIO = 1000
+# Origem do diário em memória deste processo (as posições de um processo não valem em outro)
+_ORIGEM_LOCAL = uuid.uuid4().hex
+
+_versoes = defaultdict(int)
+_valores = {}
+_trava = threading.Lock()
+_compartilhado = {}
+_diarios = defaultdict(deque)
+_diarios_perdidos = set()
+
+# Cache compartilhado em SQLite: serve a vários processos na mesma máquina (ou num disco compartilhado)
+class CacheSQLite:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.locais = threading.local()
+        if os.path.dirname(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        conexao = self._conexao()
+        conexao.execute("create table if not exists valores (chave text primary key, valor text not null, expira real not null)")
+        conexao.execute("create table if not exists versoes (chave text primary key, versao integer not null)")
+        conexao.execute("create table if not exists eventos (chave text not null, numero integer not null, evento text not null, primary key (chave, numero))")
+
+    # Uma conexão por thread, em modo WAL para leituras concorrentes com a gravação
+    def _conexao(self):
+        conexao = getattr(self.locais, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            conexao.execute("pragma journal_mode=wal")
+            conexao.execute("pragma synchronous=normal")
+            self.locais.conexao = conexao
+        return conexao
+
+    def ler(self, chave):
+        linha = self._conexao().execute("select valor from valores where chave = ? and expira > ?", (chave, time.time())).fetchone()
+        return linha[0] if linha else None
+
+    def gravar(self, chave, valor, tempo_maximo):
+        conexao = self._conexao()
+        conexao.execute("insert or replace into valores (chave, valor, expira) values (?, ?, ?)", (chave, valor, time.time() + tempo_maximo))
+        # De vez em quando, apagar os valores vencidos
+        if random.random() < 0.01:
+            conexao.execute("delete from valores where expira <= ?", (time.time(),))
+
+    def versoes(self, chaves):
+        marcadores = ", ".join("?" for _ in chaves)
+        linhas = dict(self._conexao().execute(f"select chave, versao from versoes where chave in ({marcadores})", list(chaves)).fetchall())
+        return [linhas.get(chave, 0) for chave in chaves]
+
+    def incrementar(self, chave):
+        conexao = self._conexao()
+        conexao.execute("begin immediate")
+        try:
+            conexao.execute("insert into versoes (chave, versao) values (?, 1) on conflict (chave) do update set versao = versao + 1", (chave,))
+            versao = conexao.execute("select versao from versoes where chave = ?", (chave,)).fetchone()[0]
+            conexao.execute("commit")
+        except BaseException:
+            conexao.execute("rollback")
+            raise
+        return versao
+
+    # Acrescenta um evento ao diário da chave, numerado pela versão da chave, e apaga os mais antigos que limite
+    def registrar_evento(self, chave, evento, limite):
+        conexao = self._conexao()
+        conexao.execute("begin immediate")
+        try:
+            conexao.execute("insert into versoes (chave, versao) values (?, 1) on conflict (chave) do update set versao = versao + 1", (chave,))
+            numero = conexao.execute("select versao from versoes where chave = ?", (chave,)).fetchone()[0]
+            conexao.execute("insert into eventos (chave, numero, evento) values (?, ?, ?)", (chave, numero, evento))
+            conexao.execute("delete from eventos where chave = ? and numero <= ?", (chave, numero - limite))
+            conexao.execute("commit")
+        except BaseException:
+            conexao.execute("rollback")
+            raise
+        return numero
+
+    # Número do último evento da chave e os eventos posteriores a desde, em ordem: (número, [(número, evento)])
+    def eventos(self, chave, desde):
+        conexao = self._conexao()
+        linha = conexao.execute("select versao from versoes where chave = ?", (chave,)).fetchone()
+        linhas = conexao.execute("select numero, evento from eventos where chave = ? and numero > ? order by numero", (chave, desde)).fetchall()
+        return (linha[0] if linha else 0), linhas
+
+# Adaptador para qualquer cliente compatível com Redis (get, set com ex, mget, incr, zadd, zrangebyscore e
+# zremrangebyscore), como o redis-py ou um substituto local (leitura.falso.RedisFalso)
+class CacheRedis:
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    @classmethod
+    def de_url(cls, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Para usar o cache compartilhado em Redis, instale o pacote redis (pip install redis).")
+        return cls(redis.Redis.from_url(url))
+
+    def ler(self, chave):
+        valor = self.cliente.get(chave)
+        return valor.decode("utf-8") if isinstance(valor, bytes) else valor
+
+    def gravar(self, chave, valor, tempo_maximo):
+        self.cliente.set(chave, valor, ex=max(1, int(tempo_maximo)))
+
+    def versoes(self, chaves):
+        return [int(valor or 0) for valor in self.cliente.mget(list(chaves))]
+
+    def incrementar(self, chave):
+        return int(self.cliente.incr(chave))
+
+    # O diário fica num conjunto ordenado pelo número do evento; entre o incr e o zadd de outro processo, o último
+    # número pode ainda não ter evento (quem lê aplica só a parte contínua do diário)
+    def registrar_evento(self, chave, evento, limite):
+        numero = int(self.cliente.incr(chave))
+        self.cliente.zadd(f"{chave}:eventos", {json.dumps([numero, evento]): numero})
+        self.cliente.zremrangebyscore(f"{chave}:eventos", "-inf", numero - limite)
+        return numero
+
+    def eventos(self, chave, desde):
+        numero = int(self.cliente.get(chave) or 0)
+        membros = self.cliente.zrangebyscore(f"{chave}:eventos", desde + 1, "+inf")
+        return numero, [tuple(json.loads(membro)) for membro in membros]
+
+# Função para criar o cache compartilhado a partir de um endereço (sqlite:///caminho ou redis://...)
+def cache_de_url(url):
+    if url.startswith("sqlite:///"):
+        return CacheSQLite(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return CacheRedis.de_url(url)
+    raise ValueError(f"Endereço de cache não suportado: {url}")
+
+# Função para usar um cache compartilhado (ou None para só o cache em memória)
+def configurar_cache(cache):
+    with _trava:
+        _compartilhado["cache"] = cache
+        _valores.clear()
+
+# Função para o cache compartilhado configurado (lido de CACHE_COMPARTILHADO no primeiro uso), ou None
+def cache_compartilhado():
+    with _trava:
+        if "cache" not in _compartilhado:
+            url = os.getenv(VARIAVEL_CACHE)
+            _compartilhado["cache"] = cache_de_url(url) if url else None
+        return _compartilhado["cache"]
+
+# Função para a versão atual dos dados de um usuário ("global.usuário")
+def versao(usuario):
+    compartilhado = cache_compartilhado()
+    if compartilhado is not None:
+        try:
+            geral, do_usuario = compartilhado.versoes([f"{PREFIXO}versao:{TODOS}", f"{PREFIXO}versao:{usuario}"])
+            return f"{geral}.{do_usuario}"
+        except Exception:
+            # Sem acesso ao cache compartilhado, seguir só com as versões locais (o TEMPO_MAXIMO_CACHE limita o atraso)
+            pass
+    with _trava:
+        return f"{_versoes[TODOS]}.{_versoes[usuario]}"
+
+# Função para invalidar os valores em cache de um usuário (ou de todos, sem usuário), aqui e nos outros processos
+def invalidar(usuario=None):
+    chave = TODOS if usuario is None else usuario
+    with _trava:
+        _versoes[chave] += 1
+        for guardada in [c for c in _valores if usuario is None or c[1] == usuario]:
+            del _valores[guardada]
+    compartilhado = cache_compartilhado()
+    if compartilhado is not None:
+        try:
+            compartilhado.incrementar(f"{PREFIXO}versao:{chave}")
+        except Exception:
+            pass
+
+# Função para registrar no diário do usuário uma alteração dos textos dos cards: tipo "inserir", "excluir" ou "texto"
+# (pergunta ou resposta editadas) com os ids afetados, ou "limpar" quando todos os cards do usuário foram excluídos
+def registrar_alteracao(usuario, tipo, ids=()):
+    ids = list(ids)
+    if not ids and tipo != "limpar":
+        return
+    evento = json.dumps({"tipo": tipo, "ids": ids})
+    compartilhado = cache_compartilhado()
+    if compartilhado is not None:
+        try:
+            compartilhado.registrar_evento(f"{PREFIXO}diario:{usuario}", evento, LIMITE_DIARIO)
+        except Exception:
+            # Sem o diário compartilhado, ao menos este processo reconstrói o que deriva dele
+            with _trava:
+                _diarios_perdidos.add(usuario)
+        return
+    with _trava:
+        _versoes[f"diario:{usuario}"] += 1
+        diario = _diarios[usuario]
+        diario.append((_versoes[f"diario:{usuario}"], evento))
+        while len(diario) > LIMITE_DIARIO:
+            diario.popleft()
+
+# Função para as alterações dos textos do usuário depois da posição desde do diário (None: desde o início).
+# Devolve (posição atual, eventos em ordem), ou (posição atual, None) quando o diário não alcança desde e o
+# que deriva dos textos deve ser reconstruído a partir do banco.
+def alteracoes_desde(usuario, desde):
+    compartilhado = cache_compartilhado()
+    if compartilhado is not None:
+        with _trava:
+            perdido = usuario in _diarios_perdidos
+            _diarios_perdidos.discard(usuario)
+        origem = ("compartilhado",)
+        continuar = desde is not None and tuple(desde[:-1]) == origem and not perdido
+        try:
+            atual, eventos = compartilhado.eventos(f"{PREFIXO}diario:{usuario}", desde[-1] if continuar else 0)
+        except Exception:
+            # Sem acesso ao cache compartilhado, seguir com o que já se tem e tentar de novo na próxima vez
+            if perdido:
+                with _trava:
+                    _diarios_perdidos.add(usuario)
+            return desde, []
+    else:
+        origem = ("local", _ORIGEM_LOCAL)
+        continuar = desde is not None and tuple(desde[:-1]) == origem
+        with _trava:
+            atual = _versoes[f"diario:{usuario}"]
+            eventos = list(_diarios[usuario])
+    if not continuar or desde[-1] > atual or atual - desde[-1] > LIMITE_DIARIO:
+        return origem + (atual,), None
+    # Aplicar a parte contínua do diário a partir da posição seguinte a desde. Um número ainda sem evento no fim
+    # do diário é uma gravação em andamento em outro processo; no meio dele, um evento perdido
+    numero = desde[-1]
+    alteracoes = []
+    for numero_evento, evento in eventos:
+        if numero_evento <= numero:
+            continue
+        if numero_evento != numero + 1:
+            return origem + (atual,), None
+        alteracoes.append(json.loads(evento))
+        numero = numero_evento
+    return origem + (numero,), alteracoes
+
+# Função para obter um valor do cache ou calculá-lo com calcular() se estiver ausente, velho ou invalidado.
+# No cache compartilhado, os valores são gravados em JSON (conjuntos viram listas).
+def em_cache(nome, usuario, calcular, tempo_maximo=TEMPO_MAXIMO_CACHE):
+    chave = (nome, usuario)
+    versao_atual = versao(usuario)
+    with _trava:
+        guardado = _valores.get(chave)
+    if guardado and guardado[0] == versao_atual and time.monotonic() - guardado[1] < tempo_maximo:
+        return guardado[2]
+
+    compartilhado = cache_compartilhado()
+    chave_compartilhada = f"{PREFIXO}{nome}:{usuario}"
+    if compartilhado is not None:
+        try:
+            bruto = compartilhado.ler(chave_compartilhada)
+        except Exception:
+            bruto = None
+        if bruto is not None:
+            gravado = json.loads(bruto)
+            if gravado["versao"] == versao_atual:
+                with _trava:
+                    _valores[chave] = (versao_atual, time.monotonic(), gravado["valor"])
+                return gravado["valor"]
+
+    valor = calcular()
+    # Só guardar se nenhuma gravação aconteceu durante o cálculo
+    if versao(usuario) == versao_atual:
+        with _trava:
+            _valores[chave] = (versao_atual, time.monotonic(), valor)
+        if compartilhado is not None:
+            try:
+                compartilhado.gravar(chave_compartilhada, json.dumps({"versao": versao_atual, "valor": valor}, default=list), tempo_maximo)
+            except Exception:
+                pass
+    return valor
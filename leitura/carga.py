@@ -0,0 +1,251 @@
+# Teste de carga: várias sessões simuladas do main.py rodando ao mesmo tempo num único processo,
+# como num servidor Streamlit com muitos usuários, contra o backend falso com latência injetada.
+#
+#   python -m leitura.carga --sessoes 1,10,50 --repeticoes 3 --latencia-ms 20 --variacao-ms 10
+#
+# Cada sessão faz login, escolhe concurso e lei, busca, pagina, abre um card, marca-o como lido, abre a
+# edição e avança alguns cards no modo leitura. Cada interação é uma nova execução do script (rerun)
+# e tem a duração medida.
+import argparse
+import json
+import os
+import random
+import resource
+import threading
+import time
+from unittest.mock import MagicMock
+from urllib import parse
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.pages_manager import PagesManager
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+from streamlit.testing.v1.util import patch_config_options
+
+from leitura.cache import cache_de_url, configurar_cache
+from leitura.dados import configurar_clientes
+from leitura.falso import ClienteFalso
+from leitura.referencias import colunas_de_ordem
+
+# Caminho do script do app
+CAMINHO_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+# Palavras usadas para gerar os textos dos cards e as buscas
+PALAVRAS = ["servidor", "cargo", "licença", "estágio", "provimento", "vacância", "remoção", "posse", "exercício", "vencimento"]
+
+# Sessão do AppTest que pode rodar em paralelo com outras: o AppTest original troca o Runtime
+# global a cada execução, então aqui o Runtime falso é instalado uma única vez (ver executar_carga),
+# e o script é compilado uma única vez para todas as sessões, como no servidor do Streamlit
+class SessaoSimulada(AppTest):
+    cache_do_script = ScriptCache()
+
+    def _run(self, widget_state=None, timeout=None):
+        script_runner = LocalScriptRunner(
+            self._script_path,
+            self.session_state,
+            PagesManager(self._script_path, self.cache_do_script, setup_watcher=False),
+            args=self.args,
+            kwargs=self.kwargs,
+        )
+        script_runner._script_cache = self.cache_do_script
+        self._tree = script_runner.run(widget_state, self.query_params, timeout or self.default_timeout, self._page_hash)
+        self._tree._runner = self
+        self.query_params = parse.parse_qs(script_runner.event_data[-1]["client_state"].query_string)
+        return self
+
+# Função para popular o backend falso com cards de vários usuários
+def popular(cliente, usuarios, cards_por_usuario, concursos=2, leis=3, semente=0):
+    aleatorio = random.Random(semente)
+    linhas = []
+    for usuario in usuarios:
+        for i in range(cards_por_usuario):
+            linhas.append({
+                "usuario": usuario,
+                "concurso": f"Concurso {i % concursos + 1}",
+                "lei": f"Lei {i % leis + 1}",
+                "pergunta": " ".join(aleatorio.choices(PALAVRAS, k=6)) + f" ({i})",
+                "resposta": " ".join(aleatorio.choices(PALAVRAS, k=60)),
+                "referencia": f"Art. {i + 1}",
+                "vezes_lido": aleatorio.choice([0, 0, 1, 2, 5]),
+            })
+    for linha, colunas in zip(linhas, colunas_de_ordem(linha["referencia"] for linha in linhas)):
+        linha.update(colunas)
+    cliente.table("cards").insert(linhas).execute()
+
+# Função para achar um widget pelo início do rótulo
+def _widget(lista, prefixo):
+    return next((w for w in lista if str(w.label).startswith(prefixo)), None)
+
+# Função com o fluxo de uma sessão; medir(acao, executar) executa e cronometra um rerun
+def fluxo(sessao, usuario, aleatorio, medir):
+    medir("abrir", lambda: sessao.run())
+    medir("login", lambda: sessao.text_input[0].input(usuario).run())
+    concurso = _widget(sessao.selectbox, "Concurso:")
+    medir("concurso", lambda: concurso.select_index(aleatorio.randrange(1, len(concurso.options))).run())
+    lei = _widget(sessao.selectbox, "📘 Lei do concurso:")
+    medir("lei", lambda: lei.select_index(aleatorio.randrange(1, len(lei.options))).run())
+    busca = _widget(sessao.text_input, "🔍")
+    medir("busca", lambda: busca.input(aleatorio.choice(PALAVRAS)).run())
+    busca = _widget(sessao.text_input, "🔍")
+    medir("limpar_busca", lambda: busca.input("").run())
+    proxima = _widget(sessao.button, "➡️ Próxima Página")
+    if proxima is not None:
+        medir("proxima_pagina", lambda: proxima.click().run())
+    abrir = _widget(sessao.button, "▸ 📌")
+    if abrir is not None:
+        medir("abrir_card", lambda: abrir.click().run())
+    lido = _widget(sessao.button, "✅ Lido")
+    if lido is not None:
+        medir("lido", lambda: lido.click().run())
+    editar = _widget(sessao.button, "✏️ Editar")
+    if editar is not None:
+        medir("editar", lambda: editar.click().run())
+    medir("modo_leitura", lambda: sessao.toggle(key="modo_leitura").set_value(True).run())
+    for _ in range(3):
+        proximo = _widget(sessao.button, "Próximo ➡️")
+        if proximo is None or proximo.disabled:
+            break
+        medir("proximo_card", lambda: proximo.click().run())
+
+# Função para o RSS atual do processo em MB (Linux), ou o pico quando /proc não existe
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Função para o percentil p (0-100) de uma lista de valores
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+# Função para rodar uma rodada com n sessões simultâneas e devolver as métricas
+def rodada(n, repeticoes, usuarios, timeout, semente):
+    duracoes = {}
+    erros = []
+    trava = threading.Lock()
+    largada = threading.Barrier(n)
+
+    def sessao(numero):
+        aleatorio = random.Random(semente + numero)
+        usuario = usuarios[numero % len(usuarios)]
+        largada.wait()
+        for _ in range(repeticoes):
+            app = SessaoSimulada(CAMINHO_APP, default_timeout=timeout)
+
+            def medir(acao, executar):
+                inicio = time.perf_counter()
+                executar()
+                with trava:
+                    duracoes.setdefault(acao, []).append(time.perf_counter() - inicio)
+                if app.exception:
+                    raise RuntimeError(app.exception[0].message)
+
+            try:
+                fluxo(app, usuario, aleatorio, medir)
+            except Exception as erro:
+                with trava:
+                    erros.append(f"{type(erro).__name__}: {erro}")
+
+    # Amostrar o RSS durante a rodada para obter o pico
+    rss_inicial = rss_mb()
+    pico = [rss_inicial]
+    parar = threading.Event()
+
+    def amostrar():
+        while not parar.wait(0.05):
+            pico[0] = max(pico[0], rss_mb())
+
+    amostrador = threading.Thread(target=amostrar, daemon=True)
+    amostrador.start()
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(n)]
+    cpu_inicial, inicio = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu_inicial
+    parar.set()
+    amostrador.join()
+
+    todas = [d for lista in duracoes.values() for d in lista]
+    return {
+        "sessoes": n,
+        "reruns": len(todas),
+        "erros": len(erros),
+        "exemplos_de_erro": sorted(set(erros))[:3],
+        "p50_ms": percentil(todas, 50) * 1000,
+        "p95_ms": percentil(todas, 95) * 1000,
+        "p99_ms": percentil(todas, 99) * 1000,
+        "reruns_por_segundo": len(todas) / decorrido if decorrido else 0.0,
+        "cpu_segundos": cpu,
+        "cpu_nucleos": cpu / decorrido if decorrido else 0.0,
+        "rss_pico_mb": pico[0],
+        "rss_por_sessao_mb": (pico[0] - rss_inicial) / n,
+        "p95_por_acao_ms": {acao: percentil(lista, 95) * 1000 for acao, lista in sorted(duracoes.items())},
+    }
+
+# Função para rodar o teste de carga para cada quantidade de sessões
+def executar_carga(quantidades, repeticoes=3, usuarios=5, cards_por_usuario=300, latencia=0.02, variacao=0.01, timeout=60, semente=0, cache=None):
+    configurar_cache(cache_de_url(cache) if cache else None)
+    cliente = ClienteFalso(latencia=latencia, variacao=variacao, semente=semente)
+    nomes = [f"usuario_{i}" for i in range(usuarios)]
+    popular(cliente, nomes, cards_por_usuario, semente=semente)
+    configurar_clientes(cliente)
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    try:
+        with patch_config_options({"global.appTest": True}):
+            # Rodada de aquecimento (não medida): compila o script e importa os módulos usados pelo app
+            SessaoSimulada.cache_do_script.get_bytecode(CAMINHO_APP)
+            rodada(1, 1, nomes, timeout, semente)
+            return [rodada(n, repeticoes, nomes, timeout, semente) for n in quantidades]
+    finally:
+        Runtime._instance = None
+
+# Função para imprimir os resultados em forma de tabela
+def imprimir(resultados):
+    print(f"{'sessões':>8} {'reruns':>7} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reruns/s':>9} {'CPU núcl.':>9} {'RSS MB':>8} {'MB/sessão':>9}")
+    for r in resultados:
+        print(
+            f"{r['sessoes']:>8} {r['reruns']:>7} {r['erros']:>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['reruns_por_segundo']:>9.1f} {r['cpu_nucleos']:>9.2f} {r['rss_pico_mb']:>8.1f} {r['rss_por_sessao_mb']:>9.2f}"
+        )
+        for erro in r["exemplos_de_erro"]:
+            print(f"{'':>8} ⚠️ {erro}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m leitura.carga", description="Teste de carga do main.py com sessões simultâneas.")
+    parser.add_argument("--sessoes", default="1,10,50", help="quantidades de sessões simultâneas, separadas por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=3, help="fluxos completos por sessão")
+    parser.add_argument("--usuarios", type=int, default=5, help="usuários distintos no backend falso")
+    parser.add_argument("--cards", type=int, default=300, help="cards por usuário")
+    parser.add_argument("--latencia-ms", type=float, default=20, help="latência fixa por requisição ao backend")
+    parser.add_argument("--variacao-ms", type=float, default=10, help="latência aleatória adicional (0 a este valor)")
+    parser.add_argument("--timeout", type=float, default=60, help="tempo máximo de um rerun, em segundos")
+    parser.add_argument("--cache", help="cache compartilhado (sqlite:///caminho.db ou redis://...); padrão: só em memória")
+    parser.add_argument("--json", help="grava os resultados completos neste arquivo")
+    args = parser.parse_args(argv)
+
+    resultados = executar_carga(
+        [int(n) for n in args.sessoes.split(",")], args.repeticoes, args.usuarios, args.cards,
+        args.latencia_ms / 1000, args.variacao_ms / 1000, args.timeout, cache=args.cache
+    )
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return 1 if any(r["erros"] for r in resultados) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
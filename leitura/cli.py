@@ -0,0 +1,195 @@
+# Linha de comando para importação, exportação, backup e restauração sem o Streamlit
+#
+#   python -m leitura import cards.json --usuario joao123
+#   python -m leitura export --usuario joao123 --lei "Lei 8.112" --saida cards.jsonl
+#   python -m leitura backup --usuario joao123
+#   python -m leitura restore backup/joao123_cli_20250101_120000.json --usuario joao123
+#   python -m leitura duplicatas --usuario joao123 --limiar 0.8
+#   python -m leitura referencias --usuario joao123
+import argparse
+import json
+import sys
+import time
+
+from leitura.arquivos import DIRETORIO_BACKUP, ArquivoInvalido, contar_cards, criar_backup, escrever_json, escrever_jsonl, impressao_digital, ler_cards
+from leitura.dados import CredenciaisAusentes, carregar_todos, indexar_referencias, validar_usuario
+from leitura.duplicatas import LIMIAR_SEMELHANCA, descartar_indice, grupos_de_duplicatas, obter_indice, salvar_indice
+from leitura.envio import DIRETORIO_CHECKPOINTS, Checkpoint, caminho_checkpoint
+from leitura.importacao import TAMANHO_LOTE_IMPORTACAO, importar_cards, restaurar_cards
+
+# Identificador de sessão usado no nome dos backups feitos pela linha de comando
+SESSAO_CLI = "cli"
+
+# Relatório de progresso e vazão, escrito no stderr (uma linha por atualização fora de terminais)
+class Progresso:
+    def __init__(self, descricao, intervalo=1.0, saida=sys.stderr):
+        self.descricao = descricao
+        self.intervalo = intervalo
+        self.saida = saida
+        self.inicio = time.monotonic()
+        self.ultimo = self.inicio
+        self.terminal = saida.isatty()
+
+    def __call__(self, resultado, final=False):
+        agora = time.monotonic()
+        if not final and agora - self.ultimo < self.intervalo:
+            return
+        self.ultimo = agora
+        decorrido = max(agora - self.inicio, 1e-9)
+        detalhes = ", ".join(f"{chave}: {valor}" for chave, valor in resultado.items())
+        linha = f"{self.descricao} — {detalhes} — {resultado.get('lidos', 0) / decorrido:.0f} cards/s em {decorrido:.1f}s"
+        if self.terminal and not final:
+            self.saida.write("\r" + linha)
+        else:
+            self.saida.write(("\r" if self.terminal else "") + linha + "\n")
+        self.saida.flush()
+
+# Função para contar os cards que passam por um iterador, informando o progresso
+def _com_progresso(cards, progresso):
+    resultado = {"lidos": 0}
+    for card in cards:
+        resultado["lidos"] += 1
+        progresso(resultado)
+        yield card
+    progresso(resultado, final=True)
+
+# Função para o filtro de exportação a partir dos argumentos
+def _filtro(args):
+    filtro = {}
+    if args.concurso:
+        filtro["concurso"] = args.concurso
+    if args.lei:
+        filtro["lei"] = args.lei
+    return filtro or None
+
+# Função para abrir o checkpoint de um envio, avisando quando ele retoma uma execução anterior
+def _checkpoint(args, operacao):
+    checkpoint = Checkpoint.abrir(caminho_checkpoint(args.usuario, operacao, impressao_digital(args.arquivo), args.checkpoints))
+    if checkpoint.retomado:
+        print(f"Retomando {operacao} interrompida: {len(checkpoint.concluidos)} lotes já gravados.", file=sys.stderr)
+    return checkpoint
+
+def comando_import(args):
+    checkpoint = _checkpoint(args, "importacao")
+    if not args.sem_backup and not checkpoint.retomado:
+        comando_backup(args)
+    indice = obter_indice(args.usuario) if args.semelhantes else None
+    quase_iguais = []
+    progresso = Progresso(f"Importando {args.arquivo}")
+    try:
+        resultado = importar_cards(
+            args.usuario, ler_cards(args.arquivo), args.lote, args.trabalhadores, progresso, indice=indice,
+            checkpoint=checkpoint, lotes_por_segundo=args.lotes_por_segundo, quase_iguais=quase_iguais
+        )
+    except Exception:
+        # Sem os cards provisórios (ids negativos) do lote interrompido no índice deste processo
+        if indice is not None:
+            descartar_indice(args.usuario)
+        raise
+    progresso(resultado, final=True)
+    if indice is not None:
+        salvar_indice(args.usuario)
+    # Listar os cards ignorados por serem quase iguais a outros, para revisão
+    for card, card_id, semelhanca in quase_iguais:
+        parecido = f"card #{card_id}" if card_id > 0 else "outro card do arquivo"
+        print(f"Quase igual ({semelhanca:.0%}) a {parecido}, não importado: {card['pergunta'][:100]}", file=sys.stderr)
+
+def comando_restore(args):
+    # Validar o arquivo inteiro antes, porque a restauração apaga os cards atuais
+    contar_cards(args.arquivo)
+    progresso = Progresso(f"Restaurando {args.arquivo}")
+    resultado = restaurar_cards(
+        args.usuario, ler_cards(args.arquivo), args.lote, args.trabalhadores, progresso,
+        checkpoint=_checkpoint(args, "restauracao"), lotes_por_segundo=args.lotes_por_segundo
+    )
+    progresso(resultado, final=True)
+
+def comando_export(args):
+    progresso = Progresso("Exportando")
+    cards = _com_progresso(carregar_todos(args.usuario, filtro=_filtro(args)), progresso)
+    escrever = escrever_jsonl if args.formato == "jsonl" else escrever_json
+    if args.saida == "-":
+        escrever(cards, sys.stdout)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            escrever(cards, f)
+
+def comando_backup(args):
+    progresso = Progresso("Criando backup")
+    cards = _com_progresso(carregar_todos(args.usuario), progresso)
+    caminho = criar_backup(cards, args.usuario, SESSAO_CLI, args.diretorio)
+    print(caminho or "Nenhum card para copiar.", file=sys.stderr)
+
+def comando_duplicatas(args):
+    for grupo in grupos_de_duplicatas(args.usuario, args.limiar):
+        print(json.dumps([
+            {"id": card["id"], "concurso": card.get("concurso"), "lei": card.get("lei"), "pergunta": card.get("pergunta", "")[:80]}
+            for card in grupo
+        ], ensure_ascii=False))
+
+def comando_referencias(args):
+    alterados = indexar_referencias(args.usuario)
+    if alterados is None:
+        print("❌ Erro: as colunas artigo e ordem_ref não existem no banco; aplique antes as migrações (python -m leitura.migracoes aplicar).", file=sys.stderr)
+        return 2
+    print(f"{alterados} cards com a ordem da lei atualizada.", file=sys.stderr)
+
+# Função para validar o nome de usuário recebido na linha de comando
+def _usuario(valor):
+    usuario = validar_usuario(valor)
+    if not usuario:
+        raise argparse.ArgumentTypeError("use apenas letras, números e sublinhados (ex.: joao123)")
+    return usuario
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m leitura", description="Importação, exportação, backup, restauração, revisão de duplicatas e ordem da lei dos cards.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    def com_usuario(sub):
+        sub.add_argument("--usuario", type=_usuario, required=True, help="nome de usuário dono dos cards")
+        return sub
+
+    def com_gravacao(sub):
+        sub.add_argument("--lote", type=int, default=TAMANHO_LOTE_IMPORTACAO, help="cards por comando de inserção")
+        sub.add_argument("--trabalhadores", type=int, default=4, help="inserções em paralelo")
+        sub.add_argument("--lotes-por-segundo", type=float, help="limite de lotes enviados por segundo")
+        sub.add_argument("--checkpoints", default=DIRETORIO_CHECKPOINTS, help="pasta dos checkpoints para retomar envios interrompidos")
+        return sub
+
+    sub = com_gravacao(com_usuario(subparsers.add_parser("import", help="importa um arquivo .json ou .jsonl (ou compactado com gzip)")))
+    sub.add_argument("arquivo")
+    sub.add_argument("--sem-backup", action="store_true", help="não criar backup antes de importar")
+    sub.add_argument("--semelhantes", action="store_true", help="ignorar também cards quase duplicados")
+    sub.add_argument("--diretorio", default=DIRETORIO_BACKUP, help="pasta dos backups")
+    sub.set_defaults(funcao=comando_import)
+
+    sub = com_usuario(subparsers.add_parser("export", help="exporta os cards em .json ou .jsonl"))
+    sub.add_argument("--concurso")
+    sub.add_argument("--lei")
+    sub.add_argument("--formato", choices=["json", "jsonl"], default="json")
+    sub.add_argument("--saida", default="-", help="arquivo de saída (padrão: stdout)")
+    sub.set_defaults(funcao=comando_export)
+
+    sub = com_usuario(subparsers.add_parser("backup", help="grava um backup de todos os cards"))
+    sub.add_argument("--diretorio", default=DIRETORIO_BACKUP, help="pasta dos backups")
+    sub.set_defaults(funcao=comando_backup)
+
+    sub = com_gravacao(com_usuario(subparsers.add_parser("restore", help="substitui os cards pelos de um backup")))
+    sub.add_argument("arquivo")
+    sub.set_defaults(funcao=comando_restore)
+
+    sub = com_usuario(subparsers.add_parser("duplicatas", help="lista grupos de cards quase duplicados (um grupo JSON por linha)"))
+    sub.add_argument("--limiar", type=float, default=LIMIAR_SEMELHANCA, help="similaridade mínima entre 0 e 1")
+    sub.set_defaults(funcao=comando_duplicatas)
+
+    sub = com_usuario(subparsers.add_parser("referencias", help="preenche a ordem da lei (artigo, parágrafo, inciso e alínea) dos cards já gravados"))
+    sub.set_defaults(funcao=comando_referencias)
+    return parser
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    try:
+        return args.funcao(args) or 0
+    except (CredenciaisAusentes, ArquivoInvalido) as erro:
+        print(f"❌ Erro: {erro}", file=sys.stderr)
+        return 2
@@ -0,0 +1,636 @@
+# Camada de dados do aplicativo: acesso ao Supabase sem dependência do Streamlit,
+# para ser usada tanto pelo main.py quanto pela linha de comando (python -m leitura).
+import os
+import re
+import hashlib
+from urllib.parse import quote
+from collections import defaultdict, Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from postgrest.exceptions import APIError
+from supabase import create_client, Client
+
+from leitura.cache import em_cache, invalidar, registrar_alteracao
+from leitura.referencias import colunas_de_ordem
+
+# Carregar variáveis de ambiente
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# Leituras mínimas de cada opção do filtro "Filtrar cards por número de leituras"
+LEITURAS_MINIMAS = {"1 ou mais": 1, "5 ou mais": 5, "10 ou mais": 10}
+# Campos que podem ser alterados em lote
+CAMPOS_EM_LOTE = ("concurso", "lei", "referencia")
+# Quantidade de linhas lidas por requisição em varreduras paginadas
+TAMANHO_LOTE = 1000
+# Tamanho máximo (já codificado para a URL) da lista de valores de um filtro in numa requisição
+TAMANHO_FILTRO_IN = 6000
+
+# Chave do cache da lista de baralhos publicados, que não é de um usuário: não é um nome de usuário válido nem
+# a chave cache.TODOS ("*"), cuja versão entra na de todos os usuários (invalidá-la descartaria tudo em cache)
+CHAVE_BARALHOS = "#baralhos"
+# Visão que junta os cards do usuário com o texto dos baralhos compartilhados (sql/migracoes/004_baralhos.sql)
+VISAO_CARDS = "cards_visiveis"
+# Colunas de um card lidas nas listagens, exportações e backups
+COLUNAS_CARD = "id, pergunta, resposta, referencia, concurso, lei, vezes_lido"
+# Campos de um card gravados no Supabase
+CAMPOS_CARD = ("concurso", "lei", "pergunta", "resposta", "referencia", "vezes_lido")
+
+# Configuração de busca textual do Postgres (português, sem diferenciar acentos), criada em sql/migracoes/006_busca.sql
+CONFIGURACAO_BUSCA = "pt_unaccent"
+# Fuso horário que define o dia e a semana de cada leitura no histórico de estudo
+FUSO_HORARIO = "America/Sao_Paulo"
+# Códigos de erro do PostgREST/Postgres para função, tabela ou coluna que não existe no banco
+CODIGOS_AUSENTE = {"PGRST202", "PGRST204", "PGRST205", "42P01", "42703", "42883"}
+
+MENSAGEM_CREDENCIAIS = "As credenciais do Supabase (SUPABASE_URL, SUPABASE_ANON_KEY e SUPABASE_SERVICE_KEY) devem ser configuradas como variáveis de ambiente."
+
+# Erro levantado quando as credenciais do Supabase não estão configuradas
+class CredenciaisAusentes(RuntimeError):
+    pass
+
+# Clientes configurados manualmente (por exemplo, o backend falso de leitura.falso)
+_clientes_configurados = {}
+
+# Função para usar outros clientes no lugar do Supabase (testes de carga, desenvolvimento local)
+def configurar_clientes(cliente, cliente_admin=None):
+    _clientes_configurados["geral"] = cliente
+    _clientes_configurados["admin"] = cliente_admin or cliente
+
+# Função para verificar se as credenciais do Supabase estão configuradas
+def credenciais_configuradas():
+    if _clientes_configurados:
+        return True
+    return all(os.getenv(nome) for nome in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY"))
+
+# Função para criar (uma única vez) o cliente do Supabase para operações gerais
+@lru_cache(maxsize=None)
+def _cliente_supabase() -> Client:
+    if not credenciais_configuradas():
+        raise CredenciaisAusentes(MENSAGEM_CREDENCIAIS)
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_ANON_KEY"))
+
+# Função para criar (uma única vez) o cliente do Supabase para operações administrativas como importação
+@lru_cache(maxsize=None)
+def _cliente_supabase_admin() -> Client:
+    if not credenciais_configuradas():
+        raise CredenciaisAusentes(MENSAGEM_CREDENCIAIS)
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY"))
+
+# Função para o cliente de operações gerais
+def _cliente():
+    return _clientes_configurados.get("geral") or _cliente_supabase()
+
+# Função para o cliente de operações administrativas
+def _cliente_admin():
+    return _clientes_configurados.get("admin") or _cliente_supabase_admin()
+
+# Recursos opcionais do banco (visão cards_visiveis, colunas de ordem da lei) já verificados, por cliente
+_recursos = {}
+
+# Função para verificar uma única vez por cliente se um recurso opcional do banco existe (testar(cliente) faz uma consulta)
+def _recurso_disponivel(nome, testar):
+    cliente = _cliente()
+    chave = (id(cliente), nome)
+    if chave not in _recursos:
+        try:
+            testar(cliente)
+            _recursos[chave] = True
+        except APIError as erro:
+            if erro.code not in CODIGOS_AUSENTE:
+                raise
+            _recursos[chave] = False
+    return _recursos[chave]
+
+# Função para o nome da tabela de onde os cards são lidos: as camadas de baralhos compartilhados não guardam
+# pergunta e resposta, que vêm do card base pela visão cards_visiveis. As gravações continuam na tabela cards.
+def _tabela_de_leitura():
+    if _recurso_disponivel(VISAO_CARDS, lambda cliente: cliente.table(VISAO_CARDS).select("id").limit(1).execute()):
+        return VISAO_CARDS
+    return "cards"
+
+# Função para verificar se os cards têm as colunas de ordem da lei, artigo e ordem_ref (sql/migracoes/005_referencias.sql)
+def ordem_da_lei_disponivel():
+    return _recurso_disponivel("ordem_ref", lambda cliente: cliente.table(_tabela_de_leitura()).select("artigo, ordem_ref").limit(1).execute())
+
+# Função para verificar se o banco tem a busca textual no servidor (função buscar_cards de sql/migracoes/006_busca.sql)
+def busca_no_servidor_disponivel():
+    return _recurso_disponivel("buscar_cards", lambda cliente: cliente.rpc("buscar_cards", {"p_usuario": "", "p_busca": "", "p_limite": 0}).execute())
+
+# Função para ordenar uma listagem de cards na ordem da lei (artigo, parágrafo, inciso e alínea; os cards sem
+# artigo na referência vão para o fim), desempatada pelo id. Sem as colunas de ordem, só pelo id.
+def _ordenar(consulta):
+    if ordem_da_lei_disponivel():
+        consulta = consulta.order("ordem_ref", nullsfirst=False)
+    return consulta.order("id")
+
+# Função para iniciar uma consulta de leitura de cards
+def _cards_para_leitura():
+    return _cliente().table(_tabela_de_leitura())
+
+# Função para validar o nome de usuário
+def validar_usuario(usuario):
+    usuario = usuario.strip().lower()
+    if not re.match(r'^[a-z0-9_]+$', usuario):
+        return None
+    return usuario
+
+# Função para carregar uma página dos cards do filtro (na ordem da lei) e o total de cards do filtro. Com busca por
+# texto e a busca no servidor disponível, a página vem por relevância e com os trechos encontrados destacados.
+def carregar_pagina(usuario, filtro, inicio, quantidade, colunas=COLUNAS_CARD):
+    if filtro.get("busca") and busca_no_servidor_disponivel():
+        return buscar_cards(usuario, filtro, inicio, quantidade, destacar=colunas == COLUNAS_CARD)
+    consulta = aplicar_filtros(_cards_para_leitura().select(colunas, count="exact").eq("usuario", usuario), filtro)
+    response = _ordenar(consulta).range(inicio, inicio + quantidade - 1).execute()
+    return response.data or [], response.count or 0
+
+# Função para buscar cards por texto no servidor (função buscar_cards de sql/migracoes/006_busca.sql), com os mesmos filtros da
+# listagem: uma página de resultados por relevância e o total de resultados. Com destacar, cada card traz os
+# trechos encontrados entre <mark> e </mark> em destaque_pergunta e destaque_resposta.
+def buscar_cards(usuario, filtro, inicio, quantidade, destacar=True):
+    filtro_leituras = filtro.get("filtro_leituras", "Todos")
+    artigos = filtro.get("artigos") or (None, None)
+    response = _cliente().rpc("buscar_cards", {
+        "p_usuario": usuario, "p_busca": filtro["busca"],
+        "p_concurso": filtro.get("concurso") or None, "p_lei": filtro.get("lei") or None,
+        "p_leituras_min": LEITURAS_MINIMAS.get(filtro_leituras), "p_leituras_max": 0 if filtro_leituras == "Nunca lidos" else None,
+        "p_artigo_inicio": artigos[0], "p_artigo_fim": artigos[1],
+        "p_limite": quantidade, "p_deslocamento": inicio, "p_destacar": destacar,
+    }).execute()
+    linhas = response.data or []
+    return linhas, linhas[0]["total"] if linhas else 0
+
+# Função para carregar os próximos cards do filtro (na ordem da lei) depois do card depois_de, o último card da
+# janela anterior (paginação por chave, que não pula cards quando marcar como lido tira cards do filtro "Nunca lidos")
+def carregar_janela(usuario, filtro, depois_de=None, quantidade=50, colunas=COLUNAS_CARD):
+    ordem_da_lei = ordem_da_lei_disponivel()
+    if ordem_da_lei:
+        colunas = f"{colunas}, ordem_ref"
+    consulta = aplicar_filtros(_cards_para_leitura().select(colunas).eq("usuario", usuario), filtro)
+    if depois_de is not None:
+        ordem = depois_de.get("ordem_ref")
+        if not ordem_da_lei:
+            consulta = consulta.gt("id", depois_de["id"])
+        elif ordem is None:
+            consulta = consulta.is_("ordem_ref", "null").gt("id", depois_de["id"])
+        else:
+            consulta = consulta.or_(f'ordem_ref.gt."{ordem}",ordem_ref.is.null,and(ordem_ref.eq."{ordem}",id.gt.{depois_de["id"]})')
+    response = _ordenar(consulta).limit(quantidade).execute()
+    return response.data or []
+
+# Função para carregar todos os cards do usuário, página por página, sem limite de linhas
+def carregar_todos(usuario, colunas=COLUNAS_CARD, filtro=None, tamanho_lote=TAMANHO_LOTE):
+    inicio = 0
+    while True:
+        consulta = _cards_para_leitura().select(colunas).eq("usuario", usuario)
+        if filtro:
+            consulta = aplicar_filtros(consulta, filtro)
+        response = consulta.order("id").range(inicio, inicio + tamanho_lote - 1).execute()
+        yield from response.data or []
+        if not response.data or len(response.data) < tamanho_lote:
+            break
+        inicio += tamanho_lote
+
+# Função para carregar um único card do usuário pelo id
+def carregar_card(usuario, card_id):
+    response = _cards_para_leitura().select("*").eq("id", card_id).eq("usuario", usuario).execute()
+    return response.data[0] if response.data else None
+
+# Função para carregar cards do usuário a partir de uma lista de ids
+def carregar_cards_por_ids(usuario, ids, colunas=COLUNAS_CARD, tamanho_lote=200):
+    ids = list(ids)
+    for inicio in range(0, len(ids), tamanho_lote):
+        response = _cards_para_leitura().select(colunas).eq("usuario", usuario).in_("id", ids[inicio:inicio + tamanho_lote]).execute()
+        yield from response.data or []
+
+# Função para carregar todas as leis para estatísticas e seletores
+def carregar_leis(usuario):
+    return sorted(carregar_facetas(usuario)["leis"])
+
+# Função para montar um nó vazio do índice de facetas
+def _no_faceta():
+    return {"cards": 0, "nunca_lidos": 0, "leituras": 0}
+
+# Função para somar uma contagem agrupada a um nó do índice de facetas
+def _somar_faceta(no, cards, nunca_lidos, leituras):
+    no["cards"] += cards
+    no["nunca_lidos"] += nunca_lidos
+    no["leituras"] += leituras
+
+# Função para contar cards, nunca lidos e leituras por (concurso, lei) com uma consulta agrupada
+# (função facetas_cards de sql/migracoes/002_facetas.sql), ou com uma varredura das três colunas se ela não existir
+def _contagens_por_lei(usuario):
+    try:
+        response = _cliente().rpc("facetas_cards", {"p_usuario": usuario}).execute()
+        return response.data or []
+    except APIError as erro:
+        if erro.code not in CODIGOS_AUSENTE:
+            raise
+    contagens = {}
+    for item in carregar_todos(usuario, "concurso, lei, vezes_lido"):
+        chave = (item.get("concurso") or "", item.get("lei") or "")
+        linha = contagens.setdefault(chave, {"concurso": chave[0], "lei": chave[1], "cards": 0, "nunca_lidos": 0, "leituras": 0})
+        vezes = item.get("vezes_lido") or 0
+        linha["cards"] += 1
+        linha["nunca_lidos"] += vezes == 0
+        linha["leituras"] += vezes
+    return list(contagens.values())
+
+# Função para montar o índice de facetas concurso → lei do usuário:
+# {"total": nó, "concursos": {concurso: nó + {"leis": {lei: nó}}}, "leis": {lei: nó}}
+# Cada nó tem "cards", "nunca_lidos" e "leituras". Fica em cache até a próxima gravação do usuário.
+def carregar_facetas(usuario):
+    def montar():
+        facetas = {"total": _no_faceta(), "concursos": {}, "leis": {}}
+        for linha in _contagens_por_lei(usuario):
+            contagem = (linha["cards"], linha["nunca_lidos"], linha["leituras"] or 0)
+            _somar_faceta(facetas["total"], *contagem)
+            if linha["concurso"]:
+                no_concurso = facetas["concursos"].setdefault(linha["concurso"], dict(_no_faceta(), leis={}))
+                _somar_faceta(no_concurso, *contagem)
+                if linha["lei"]:
+                    _somar_faceta(no_concurso["leis"].setdefault(linha["lei"], _no_faceta()), *contagem)
+            if linha["lei"]:
+                _somar_faceta(facetas["leis"].setdefault(linha["lei"], _no_faceta()), *contagem)
+        return facetas
+    return em_cache("facetas", usuario, montar)
+
+# Função para carregar estatísticas (para "Card mais lido por lei" e "Ranking de Leis Mais Lidas")
+# A varredura lê só lei e vezes_lido; a pergunta é buscada depois, apenas para o card mais lido de cada lei.
+def carregar_estatisticas(usuario, leis_selecionadas=None):
+    return em_cache(f"estatisticas_{sorted(leis_selecionadas or [])}", usuario, lambda: _calcular_estatisticas(usuario, leis_selecionadas))
+
+def _calcular_estatisticas(usuario, leis_selecionadas):
+    leituras_por_lei = Counter()
+    mais_lido_por_lei = {}
+
+    for item in carregar_todos(usuario, "id, lei, vezes_lido"):
+        lei = item.get("lei") or "[Sem Lei]"
+        if leis_selecionadas and lei not in leis_selecionadas:
+            continue
+        leituras_por_lei[lei] += item.get("vezes_lido") or 0
+        if lei not in mais_lido_por_lei or (item.get("vezes_lido") or 0) > (mais_lido_por_lei[lei].get("vezes_lido") or 0):
+            mais_lido_por_lei[lei] = item
+
+    perguntas = {item["id"]: item.get("pergunta") or "" for item in carregar_cards_por_ids(usuario, [item["id"] for item in mais_lido_por_lei.values()], "id, pergunta")}
+    for item in mais_lido_por_lei.values():
+        item["pergunta"] = perguntas.get(item["id"], "")
+
+    mais_lidas = leituras_por_lei.most_common()
+    return mais_lidas, mais_lido_por_lei
+
+# Função para verificar se um card já existe (baseado na pergunta e resposta)
+def card_existe(usuario, pergunta, resposta):
+    response = _cards_para_leitura().select("id").eq("usuario", usuario).eq("pergunta", pergunta).eq("resposta", resposta).execute()
+    return len(response.data) > 0
+
+# Função para montar a linha da tabela "cards" a partir de um card
+def _linha_card(usuario, card):
+    return {
+        "usuario": usuario,
+        "concurso": card["concurso"],
+        "lei": card["lei"],
+        "pergunta": card["pergunta"],
+        "resposta": card["resposta"],
+        "referencia": card.get("referencia", ""),
+        "vezes_lido": card.get("vezes_lido", 0)
+    }
+
+# Função para acrescentar às linhas de cards as colunas de ordem da lei (artigo e ordem_ref), interpretando as
+# referências do lote inteiro de uma vez, se o banco tiver essas colunas
+def _com_ordem_da_lei(linhas):
+    if ordem_da_lei_disponivel():
+        for linha, colunas in zip(linhas, colunas_de_ordem(linha.get("referencia") for linha in linhas)):
+            linha.update(colunas)
+    return linhas
+
+# Função para salvar um card no Supabase (retorna a linha criada)
+def salvar_card(usuario, card):
+    response = _cliente_admin().table("cards").insert(_com_ordem_da_lei([_linha_card(usuario, card)])).execute()
+    registrar_alteracao(usuario, "inserir", [linha["id"] for linha in response.data or []])
+    invalidar(usuario)
+    return response.data[0] if response.data else None
+
+# Função para salvar vários cards no Supabase com um único comando (retorna as linhas criadas)
+def salvar_cards_em_lote(usuario, cards):
+    if not cards:
+        return []
+    response = _cliente_admin().table("cards").insert(_com_ordem_da_lei([_linha_card(usuario, card) for card in cards])).execute()
+    registrar_alteracao(usuario, "inserir", [linha["id"] for linha in response.data or []])
+    invalidar(usuario)
+    return response.data or []
+
+# Função para atualizar um card no Supabase (pelo id, ou pela pergunta e resposta antigas se não houver id)
+# Só os campos alterados são gravados. Pergunta e resposta vão sempre juntas: num card de baralho compartilhado,
+# é assim que a camada do usuário recebe uma cópia pessoal do texto (cópia na escrita).
+def atualizar_card(usuario, card_antigo, card_novo):
+    campos = {campo: card_novo[campo] for campo in CAMPOS_CARD if card_novo.get(campo) != card_antigo.get(campo)}
+    if "pergunta" in campos or "resposta" in campos:
+        campos.update(pergunta=card_novo["pergunta"], resposta=card_novo["resposta"])
+    if not campos:
+        return
+    if "referencia" in campos:
+        _com_ordem_da_lei([campos])
+    consulta = _cliente().table("cards").update(campos).eq("usuario", usuario)
+    if card_antigo.get("id"):
+        consulta = consulta.eq("id", card_antigo["id"])
+    else:
+        consulta = consulta.eq("pergunta", card_antigo["pergunta"]).eq("resposta", card_antigo["resposta"])
+    response = consulta.execute()
+    if "pergunta" in campos:
+        registrar_alteracao(usuario, "texto", [linha["id"] for linha in response.data or []])
+    invalidar(usuario)
+
+# Função para preencher (ou corrigir) as colunas de ordem da lei dos cards já gravados do usuário: as referências
+# são interpretadas todas de uma vez e os cards com a mesma chave são atualizados juntos. Devolve quantos cards
+# mudaram, ou None se o banco não tiver as colunas (sql/migracoes/005_referencias.sql).
+def indexar_referencias(usuario, tamanho_lote=200):
+    if not ordem_da_lei_disponivel():
+        return None
+    cards = list(carregar_todos(usuario, "id, referencia, artigo, ordem_ref"))
+    ids_por_chave = defaultdict(list)
+    for card, colunas in zip(cards, colunas_de_ordem(card.get("referencia") for card in cards)):
+        if card.get("artigo") != colunas["artigo"] or card.get("ordem_ref") != colunas["ordem_ref"]:
+            ids_por_chave[(colunas["artigo"], colunas["ordem_ref"])].append(card["id"])
+    for (artigo, ordem_ref), ids in ids_por_chave.items():
+        for inicio in range(0, len(ids), tamanho_lote):
+            _cliente().table("cards").update({"artigo": artigo, "ordem_ref": ordem_ref}).eq("usuario", usuario).in_("id", ids[inicio:inicio + tamanho_lote]).execute()
+    invalidar(usuario)
+    return sum(len(ids) for ids in ids_por_chave.values())
+
+# Função para excluir um card do Supabase usando o id (sem usuário, invalida o cache de todos)
+def excluir_card(card_id, usuario=None):
+    response = _cliente().table("cards").delete().eq("id", card_id).execute()
+    for linha in response.data or []:
+        registrar_alteracao(linha["usuario"], "excluir", [linha["id"]])
+    invalidar(usuario)
+
+# Função para excluir todos os cards do usuário (usada na restauração de backup)
+def excluir_cards_do_usuario(usuario):
+    _cliente().table("cards").delete().eq("usuario", usuario).execute()
+    registrar_alteracao(usuario, "limpar")
+    invalidar(usuario)
+
+# Função para calcular a chave de duplicidade de um card (pergunta + resposta)
+def chave_card(pergunta, resposta):
+    return hashlib.sha1(f"{pergunta}\0{resposta}".encode("utf-8")).digest()
+
+# Função para carregar as chaves de duplicidade de todos os cards do usuário
+def chaves_existentes(usuario):
+    return {chave_card(item["pergunta"], item["resposta"]) for item in carregar_todos(usuario, "id, pergunta, resposta")}
+
+# Função para montar a lista de um filtro in do PostgREST com cada valor entre aspas (aspas e barras escapadas)
+def _lista_in(valores):
+    return "(" + ",".join('"' + valor.replace("\\", "\\\\").replace('"', '\\"') + '"' for valor in valores) + ")"
+
+# Função para as chaves de duplicidade dos cards já gravados do usuário com a pergunta de algum dos cards. As
+# perguntas vão num filtro in, divididas em grupos que caibam na URL (normalmente uma única consulta).
+def chaves_gravadas(usuario, cards, tamanho_filtro=TAMANHO_FILTRO_IN):
+    grupos, grupo, tamanho = [], [], 0
+    for pergunta in sorted({card["pergunta"] for card in cards}):
+        custo = len(quote(pergunta)) + 9
+        if grupo and tamanho + custo > tamanho_filtro:
+            grupos.append(grupo)
+            grupo, tamanho = [], 0
+        grupo.append(pergunta)
+        tamanho += custo
+    if grupo:
+        grupos.append(grupo)
+    chaves = set()
+    for grupo in grupos:
+        response = _cards_para_leitura().select("pergunta, resposta").eq("usuario", usuario).filter("pergunta", "in", _lista_in(grupo)).execute()
+        chaves.update(chave_card(item["pergunta"], item["resposta"]) for item in response.data or [])
+    return chaves
+
+# Função para escapar um termo de busca para uso em filtros ilike do PostgREST
+def _termo_ilike(busca):
+    termo = busca.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    termo = termo.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"*{termo}*"'
+
+# Função para aplicar à consulta os mesmos filtros da listagem de cards
+def aplicar_filtros(consulta, filtro):
+    if filtro.get("concurso"):
+        consulta = consulta.eq("concurso", filtro["concurso"])
+    if filtro.get("lei"):
+        consulta = consulta.eq("lei", filtro["lei"])
+    filtro_leituras = filtro.get("filtro_leituras", "Todos")
+    if filtro_leituras == "Nunca lidos":
+        consulta = consulta.eq("vezes_lido", 0)
+    elif filtro_leituras in LEITURAS_MINIMAS:
+        consulta = consulta.gte("vezes_lido", LEITURAS_MINIMAS[filtro_leituras])
+    if filtro.get("artigos"):
+        primeiro, ultimo = filtro["artigos"]
+        consulta = consulta.gte("artigo", primeiro).lte("artigo", ultimo)
+    if filtro.get("busca") and busca_no_servidor_disponivel():
+        # Mesma busca da função buscar_cards, sobre a coluna documento (índice GIN)
+        consulta = consulta.filter("documento", f"wfts({CONFIGURACAO_BUSCA})", filtro["busca"])
+    elif filtro.get("busca"):
+        termo = _termo_ilike(filtro["busca"])
+        consulta = consulta.or_(f"pergunta.ilike.{termo},resposta.ilike.{termo},referencia.ilike.{termo}")
+    return consulta
+
+# Função para restringir uma operação em lote aos ids selecionados ou ao filtro
+def _escopo_em_lote(consulta, usuario, ids=None, filtro=None):
+    consulta = consulta.eq("usuario", usuario)
+    if ids is not None:
+        return consulta.in_("id", list(ids))
+    if not filtro:
+        raise ValueError("Operação em lote exige ids ou um filtro.")
+    return aplicar_filtros(consulta, filtro)
+
+# Função para executar uma alteração em lote na tabela cards (montar() devolve o update ou delete) e devolver
+# quantos cards foram afetados. Com busca por texto e baralhos compartilhados, os ids do filtro são resolvidos
+# antes na visão cards_visiveis, porque as camadas dos baralhos não guardam pergunta e resposta.
+# Com alteracao, os ids afetados são registrados no diário de alterações dos textos (leitura.cache).
+def _alterar_em_lote(montar, usuario, ids=None, filtro=None, tamanho_lote=200, alteracao=None):
+    if ids is None and filtro and filtro.get("busca") and _tabela_de_leitura() != "cards":
+        ids = [item["id"] for item in carregar_todos(usuario, "id", filtro)]
+    afetados = []
+    if ids is None:
+        response = _escopo_em_lote(montar(), usuario, filtro=filtro).execute()
+        afetados.extend(linha["id"] for linha in response.data or [])
+    else:
+        ids = list(ids)
+        for inicio in range(0, len(ids), tamanho_lote):
+            response = _escopo_em_lote(montar(), usuario, ids[inicio:inicio + tamanho_lote]).execute()
+            afetados.extend(linha["id"] for linha in response.data or [])
+    if alteracao and afetados:
+        registrar_alteracao(usuario, alteracao, afetados)
+    invalidar(usuario)
+    return len(afetados)
+
+# Função para excluir vários cards com um único comando
+def excluir_cards_em_lote(usuario, ids=None, filtro=None):
+    if ids is not None and not ids:
+        return 0
+    return _alterar_em_lote(lambda: _cliente().table("cards").delete(), usuario, ids, filtro, alteracao="excluir")
+
+# Função para alterar concurso, lei ou referência de vários cards com um único comando
+def atualizar_cards_em_lote(usuario, campos, ids=None, filtro=None):
+    campos = {k: v for k, v in campos.items() if k in CAMPOS_EM_LOTE and v}
+    if not campos or (ids is not None and not ids):
+        return 0
+    if "referencia" in campos:
+        _com_ordem_da_lei([campos])
+    return _alterar_em_lote(lambda: _cliente().table("cards").update(campos), usuario, ids, filtro)
+
+# Função para zerar o contador de leituras de vários cards com um único comando
+def zerar_leituras_em_lote(usuario, ids=None, filtro=None):
+    if ids is not None and not ids:
+        return 0
+    return _alterar_em_lote(lambda: _cliente().table("cards").update({"vezes_lido": 0}), usuario, ids, filtro)
+
+# Função para incrementar vezes_lido de vários cards (um comando por valor distinto de vezes_lido)
+def _incrementar_leituras(usuario, ids):
+    ids_por_leituras = defaultdict(list)
+    for item in carregar_cards_por_ids(usuario, ids, "id, vezes_lido"):
+        ids_por_leituras[item.get("vezes_lido") or 0].append(item["id"])
+    for vezes, ids_grupo in ids_por_leituras.items():
+        _cliente().table("cards").update({"vezes_lido": vezes + 1}).eq("usuario", usuario).in_("id", ids_grupo).execute()
+    return sum(len(ids_grupo) for ids_grupo in ids_por_leituras.values())
+
+# Função para registrar a leitura de cards: incrementa vezes_lido, grava um evento por card e atualiza os
+# totais diários e semanais por lei (função registrar_leituras de sql/migracoes/003_leituras.sql). Sem a função no banco,
+# só incrementa o contador, sem histórico.
+def registrar_leituras(usuario, ids):
+    ids = list(ids)
+    total = 0
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        parte = ids[inicio:inicio + TAMANHO_LOTE]
+        try:
+            response = _cliente().rpc("registrar_leituras", {"p_usuario": usuario, "p_ids": parte, "p_fuso": FUSO_HORARIO}).execute()
+            total += response.data or 0
+        except APIError as erro:
+            if erro.code not in CODIGOS_AUSENTE:
+                raise
+            total += _incrementar_leituras(usuario, parte)
+    invalidar(usuario)
+    return total
+
+# Função para marcar vários cards (selecionados ou do filtro) como lidos
+def marcar_lidos_em_lote(usuario, ids=None, filtro=None):
+    if ids is not None:
+        return registrar_leituras(usuario, ids) if ids else 0
+    if not filtro:
+        raise ValueError("Operação em lote exige ids ou um filtro.")
+    return registrar_leituras(usuario, [item["id"] for item in carregar_todos(usuario, "id", filtro)])
+
+# Função para a data de início do histórico: os últimos "quantidade" dias ou semanas (a partir da segunda-feira),
+# contados no mesmo fuso horário em que registrar_leituras agrupa as leituras (não no do servidor do app)
+def _inicio_historico(periodo, quantidade, hoje=None):
+    hoje = hoje or datetime.now(ZoneInfo(FUSO_HORARIO)).date()
+    if periodo == "semana":
+        return hoje - timedelta(days=hoje.weekday() + 7 * (quantidade - 1))
+    return hoje - timedelta(days=quantidade - 1)
+
+# Função para carregar o histórico de estudo (leituras por lei em cada dia ou semana) a partir dos totais
+# já agregados; devolve None se a tabela leituras_por_periodo (sql/migracoes/003_leituras.sql) não existir
+def carregar_historico(usuario, periodo="dia", quantidade=30):
+    desde = _inicio_historico(periodo, quantidade).isoformat()
+
+    def consultar():
+        linhas = []
+        inicio = 0
+        while True:
+            consulta = _cliente().table("leituras_por_periodo").select("inicio, lei, leituras").eq("usuario", usuario).eq("periodo", periodo)
+            response = consulta.gte("inicio", desde).order("inicio").order("lei").range(inicio, inicio + TAMANHO_LOTE - 1).execute()
+            linhas.extend(response.data or [])
+            if not response.data or len(response.data) < TAMANHO_LOTE:
+                return linhas
+            inicio += TAMANHO_LOTE
+
+    try:
+        return em_cache(f"historico_{periodo}_{desde}", usuario, consultar)
+    except APIError as erro:
+        if erro.code not in CODIGOS_AUSENTE:
+            raise
+        return None
+
+# Função para publicar um baralho compartilhado com os cards do usuário que atendem ao filtro (concurso e/ou lei).
+# O texto é copiado uma única vez para baralho_cards; quem assina o baralho guarda só a própria camada. A cópia
+# é feita numa única transação pela função publicar_baralho (sql/migracoes/009_baralhos_permissoes.sql).
+def publicar_baralho(usuario, nome, descricao="", filtro=None):
+    filtro = filtro or {}
+    response = _cliente().rpc("publicar_baralho", {
+        "p_usuario": usuario, "p_nome": nome, "p_descricao": descricao,
+        "p_concurso": filtro.get("concurso"), "p_lei": filtro.get("lei"),
+    }).execute()
+    publicado = response.data[0]
+    invalidar(CHAVE_BARALHOS)
+    return publicado["baralho_id"], publicado["quantidade"]
+
+# Função para listar os baralhos publicados; devolve None se as tabelas de baralhos (sql/migracoes/004_baralhos.sql) não existirem
+def listar_baralhos():
+    def consultar():
+        response = _cliente().table("baralhos").select("id, nome, descricao, autor, quantidade").order("nome").execute()
+        return response.data or []
+    try:
+        return em_cache("baralhos", CHAVE_BARALHOS, consultar)
+    except APIError as erro:
+        if erro.code not in CODIGOS_AUSENTE:
+            raise
+        return None
+
+# Função para os ids dos baralhos assinados pelo usuário
+def baralhos_assinados(usuario):
+    def consultar():
+        response = _cliente().table("assinaturas").select("baralho_id").eq("usuario", usuario).execute()
+        return {item["baralho_id"] for item in response.data or []}
+    return em_cache("assinaturas", usuario, consultar)
+
+# Função para carregar os cards base de um baralho, página por página
+def _cards_do_baralho(baralho_id, colunas="id, concurso, lei, pergunta, resposta, referencia"):
+    inicio = 0
+    while True:
+        response = _cliente().table("baralho_cards").select(colunas).eq("baralho_id", baralho_id).order("id").range(inicio, inicio + TAMANHO_LOTE - 1).execute()
+        yield from response.data or []
+        if not response.data or len(response.data) < TAMANHO_LOTE:
+            break
+        inicio += TAMANHO_LOTE
+
+# Função para assinar um baralho: cria uma camada leve (sem pergunta e resposta, os textos grandes) para cada card base que o
+# usuário ainda não tem, ignorando os cards iguais (mesma pergunta e resposta) que ele já cadastrou
+def assinar_baralho(usuario, baralho_id, tamanho_lote=500):
+    chaves = chaves_existentes(usuario)
+    ligados = {item["baralho_card_id"] for item in carregar_todos(usuario, "id, baralho_card_id") if item.get("baralho_card_id")}
+    inseridos = []
+    lote = []
+    for card in _cards_do_baralho(baralho_id):
+        chave = chave_card(card["pergunta"], card["resposta"])
+        if card["id"] in ligados or chave in chaves:
+            continue
+        chaves.add(chave)
+        lote.append({
+            "usuario": usuario, "concurso": card["concurso"], "lei": card["lei"], "referencia": card["referencia"],
+            "vezes_lido": 0, "baralho_card_id": card["id"]
+        })
+        if len(lote) >= tamanho_lote:
+            inseridos.extend(_cliente_admin().table("cards").insert(_com_ordem_da_lei(lote)).execute().data or [])
+            lote = []
+    if lote:
+        inseridos.extend(_cliente_admin().table("cards").insert(_com_ordem_da_lei(lote)).execute().data or [])
+    _cliente_admin().table("assinaturas").upsert({"usuario": usuario, "baralho_id": baralho_id}, on_conflict="usuario,baralho_id").execute()
+    registrar_alteracao(usuario, "inserir", [linha["id"] for linha in inseridos])
+    invalidar(usuario)
+    return len(inseridos)
+
+# Função para cancelar a assinatura de um baralho: exclui as camadas sem texto próprio e desliga do baralho
+# os cards que o usuário editou (eles já têm uma cópia pessoal do texto)
+def cancelar_assinatura(usuario, baralho_id, tamanho_lote=200):
+    ids = [card["id"] for card in _cards_do_baralho(baralho_id, "id")]
+    removidos = []
+    for inicio in range(0, len(ids), tamanho_lote):
+        parte = ids[inicio:inicio + tamanho_lote]
+        response = _cliente().table("cards").delete().eq("usuario", usuario).in_("baralho_card_id", parte).is_("pergunta", "null").execute()
+        removidos.extend(linha["id"] for linha in response.data or [])
+        _cliente().table("cards").update({"baralho_card_id": None}).eq("usuario", usuario).in_("baralho_card_id", parte).execute()
+    _cliente().table("assinaturas").delete().eq("usuario", usuario).eq("baralho_id", baralho_id).execute()
+    registrar_alteracao(usuario, "excluir", removidos)
+    invalidar(usuario)
+    return len(removidos)
@@ -0,0 +1,283 @@
+# Detecção de cards quase duplicados com MinHash e LSH (locality-sensitive hashing)
+#
+# Cada card vira uma assinatura MinHash calculada sobre o texto normalizado de pergunta + resposta.
+# A assinatura é dividida em bandas; cards que coincidem em alguma banda caem no mesmo balde e
+# viram candidatos, que são confirmados pela similaridade de Jaccard estimada. Assim a verificação
+# de um card novo consulta só alguns baldes, em vez de comparar com o baralho inteiro.
+import html
+import os
+import pickle
+import re
+import threading
+import unicodedata
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from leitura.cache import alteracoes_desde
+from leitura.dados import carregar_todos, carregar_cards_por_ids, atualizar_card, excluir_cards_em_lote
+
+# Pasta onde o índice de cada usuário é gravado entre execuções
+DIRETORIO_INDICES = "indices"
+# Tamanho (em caracteres) dos trechos comparados
+TAMANHO_TRECHO = 5
+# Parâmetros do LSH: 16 bandas de 8 linhas detectam com alta probabilidade pares com similaridade acima de ~0,7
+NUM_PERMUTACOES = 128
+BANDAS = 16
+LINHAS = NUM_PERMUTACOES // BANDAS
+# Similaridade mínima (Jaccard estimado) para considerar dois cards quase duplicados
+LIMIAR_SEMELHANCA = 0.8
+
+_PRIMO = np.uint64((1 << 61) - 1)
+_MASCARA = np.uint64((1 << 32) - 1)
+_gerador = np.random.RandomState(1)
+_A = _gerador.randint(1, 1 << 32, size=NUM_PERMUTACOES, dtype=np.uint64)
+_B = _gerador.randint(0, 1 << 32, size=NUM_PERMUTACOES, dtype=np.uint64)
+
+# Função para normalizar o texto de um card (sem tags, acentos, pontuação e espaços repetidos)
+def normalizar_texto(texto):
+    texto = html.unescape(re.sub(r"<[^>]+>", " ", texto or ""))
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    return " ".join(re.findall(r"\w+", texto))
+
+# Função para o texto comparado de um card
+def texto_card(card):
+    return normalizar_texto(f"{card.get('pergunta', '')} {card.get('resposta', '')}")
+
+# Função para calcular a assinatura MinHash de um texto já normalizado
+def assinatura(texto):
+    if len(texto) <= TAMANHO_TRECHO:
+        trechos = {texto}
+    else:
+        trechos = {texto[i:i + TAMANHO_TRECHO] for i in range(len(texto) - TAMANHO_TRECHO + 1)}
+    valores = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in trechos), dtype=np.uint64, count=len(trechos))
+    permutados = (np.outer(_A, valores) + _B[:, None]) % _PRIMO & _MASCARA
+    return permutados.min(axis=1).astype(np.uint32)
+
+# Função para estimar a similaridade de Jaccard entre duas assinaturas
+def similaridade(assinatura_a, assinatura_b):
+    return float(np.count_nonzero(assinatura_a == assinatura_b)) / NUM_PERMUTACOES
+
+# Índice LSH incremental dos cards de um usuário
+class IndiceDuplicatas:
+    def __init__(self):
+        self.assinaturas = {}
+        # Soma de verificação do texto de cada card, para só recalcular a assinatura de quem mudou
+        self.somas = {}
+        self.baldes = [defaultdict(set) for _ in range(BANDAS)]
+        self.trava = threading.RLock()
+        # Posição no diário de alterações dos textos (leitura.cache) até onde o índice está sincronizado
+        self.posicao = None
+
+    def __len__(self):
+        return len(self.assinaturas)
+
+    def _chaves(self, assinatura_card):
+        return [assinatura_card[b * LINHAS:(b + 1) * LINHAS].tobytes() for b in range(BANDAS)]
+
+    def adicionar(self, card_id, card):
+        texto = texto_card(card)
+        soma = zlib.crc32(texto.encode("utf-8"))
+        with self.trava:
+            if self.somas.get(card_id) == soma and card_id in self.assinaturas:
+                return
+        assinatura_card = assinatura(texto)
+        with self.trava:
+            self.remover(card_id)
+            self.assinaturas[card_id] = assinatura_card
+            self.somas[card_id] = soma
+            for balde, chave in zip(self.baldes, self._chaves(assinatura_card)):
+                balde[chave].add(card_id)
+
+    def remover(self, card_id):
+        with self.trava:
+            assinatura_card = self.assinaturas.pop(card_id, None)
+            self.somas.pop(card_id, None)
+            if assinatura_card is None:
+                return
+            for balde, chave in zip(self.baldes, self._chaves(assinatura_card)):
+                balde[chave].discard(card_id)
+                if not balde[chave]:
+                    del balde[chave]
+
+    def renomear(self, id_antigo, id_novo):
+        with self.trava:
+            assinatura_card = self.assinaturas.pop(id_antigo, None)
+            if assinatura_card is None:
+                return
+            self.assinaturas[id_novo] = assinatura_card
+            if id_antigo in self.somas:
+                self.somas[id_novo] = self.somas.pop(id_antigo)
+            for balde, chave in zip(self.baldes, self._chaves(assinatura_card)):
+                balde[chave].discard(id_antigo)
+                balde[chave].add(id_novo)
+
+    def _candidatos(self, assinatura_card):
+        candidatos = set()
+        for balde, chave in zip(self.baldes, self._chaves(assinatura_card)):
+            candidatos |= balde.get(chave, set())
+        return candidatos
+
+    # Cards semelhantes a um card (ainda não gravado ou já indexado), do mais ao menos parecido
+    def semelhantes(self, card, limiar=LIMIAR_SEMELHANCA, ignorar_id=None):
+        assinatura_card = assinatura(texto_card(card))
+        with self.trava:
+            encontrados = [
+                (card_id, similaridade(assinatura_card, self.assinaturas[card_id]))
+                for card_id in self._candidatos(assinatura_card) if card_id != ignorar_id
+            ]
+        return sorted([e for e in encontrados if e[1] >= limiar], key=lambda e: -e[1])
+
+    # Grupos de cards provavelmente duplicados entre si (componentes conexos dos pares semelhantes)
+    def grupos(self, limiar=LIMIAR_SEMELHANCA):
+        pais = {}
+
+        def raiz(card_id):
+            while pais.setdefault(card_id, card_id) != card_id:
+                pais[card_id] = pais[pais[card_id]]
+                card_id = pais[card_id]
+            return card_id
+
+        with self.trava:
+            for balde in self.baldes:
+                for ids in balde.values():
+                    if len(ids) < 2:
+                        continue
+                    ids = sorted(ids)
+                    for i, id_a in enumerate(ids):
+                        for id_b in ids[i + 1:]:
+                            if raiz(id_a) != raiz(id_b) and similaridade(self.assinaturas[id_a], self.assinaturas[id_b]) >= limiar:
+                                pais[raiz(id_b)] = raiz(id_a)
+
+        membros = defaultdict(list)
+        for card_id in pais:
+            membros[raiz(card_id)].append(card_id)
+        return sorted((sorted(ids) for ids in membros.values() if len(ids) > 1), key=lambda ids: ids[0])
+
+    def salvar(self, caminho):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with self.trava:
+            dados = {card_id: a.tobytes() for card_id, a in self.assinaturas.items()}
+            somas = dict(self.somas)
+            posicao = self.posicao
+        with open(caminho + ".tmp", "wb") as f:
+            pickle.dump({"num_permutacoes": NUM_PERMUTACOES, "assinaturas": dados, "somas": somas, "posicao": posicao}, f)
+        os.replace(caminho + ".tmp", caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        indice = cls()
+        if not os.path.exists(caminho):
+            return indice
+        with open(caminho, "rb") as f:
+            dados = pickle.load(f)
+        if dados.get("num_permutacoes") != NUM_PERMUTACOES:
+            return indice
+        indice.posicao = dados.get("posicao")
+        indice.somas = dados.get("somas", {})
+        for card_id, bruto in dados["assinaturas"].items():
+            assinatura_card = np.frombuffer(bruto, dtype=np.uint32)
+            indice.assinaturas[card_id] = assinatura_card
+            for balde, chave in zip(indice.baldes, indice._chaves(assinatura_card)):
+                balde[chave].add(card_id)
+        return indice
+
+# Índices já carregados neste processo, por usuário
+_indices = {}
+_trava_indices = threading.Lock()
+
+# Função para o caminho do arquivo de índice de um usuário
+def caminho_indice(usuario, diretorio=DIRETORIO_INDICES):
+    return os.path.join(diretorio, f"{usuario}.pkl")
+
+# Função para reconstruir o índice a partir de todos os cards do usuário no banco: remove os excluídos e só
+# recalcula a assinatura dos cards novos ou com texto diferente do indexado
+def reconstruir_indice(usuario, indice):
+    ids_banco = set()
+    for card in carregar_todos(usuario, "id, pergunta, resposta"):
+        indice.adicionar(card["id"], card)
+        ids_banco.add(card["id"])
+    with indice.trava:
+        for card_id in set(indice.assinaturas) - ids_banco:
+            indice.remover(card_id)
+
+# Função para sincronizar o índice com o banco aplicando só as alterações dos textos registradas desde a última
+# sincronização (cards inseridos, excluídos e editados, inclusive por outros processos); marcar um card como lido
+# não mexe no índice. Se o diário não alcança a última sincronização, o índice é reconstruído. Devolve True se
+# o índice mudou.
+def sincronizar_indice(usuario, indice):
+    posicao, alteracoes = alteracoes_desde(usuario, indice.posicao)
+    if alteracoes is None:
+        reconstruir_indice(usuario, indice)
+        indice.posicao = posicao
+        return True
+    pendentes = set()
+    with indice.trava:
+        for alteracao in alteracoes:
+            if alteracao["tipo"] == "limpar":
+                for card_id in list(indice.assinaturas):
+                    indice.remover(card_id)
+                pendentes.clear()
+            elif alteracao["tipo"] == "excluir":
+                for card_id in alteracao["ids"]:
+                    indice.remover(card_id)
+                    pendentes.discard(card_id)
+            elif alteracao["tipo"] == "texto":
+                pendentes.update(alteracao["ids"])
+            else:
+                # Cards inseridos já indexados neste processo (como na importação) não precisam ser lidos de novo
+                pendentes.update(card_id for card_id in alteracao["ids"] if card_id not in indice.assinaturas)
+    if pendentes:
+        encontrados = set()
+        for card in carregar_cards_por_ids(usuario, sorted(pendentes), "id, pergunta, resposta"):
+            indice.adicionar(card["id"], card)
+            encontrados.add(card["id"])
+        for card_id in pendentes - encontrados:
+            indice.remover(card_id)
+    mudou = bool(alteracoes) or posicao != indice.posicao
+    indice.posicao = posicao
+    return mudou
+
+# Função para obter o índice do usuário (memória, depois disco), com as alterações dos textos feitas desde a
+# última sincronização (inclusive por outros processos do app) já aplicadas
+def obter_indice(usuario, diretorio=DIRETORIO_INDICES):
+    with _trava_indices:
+        indice = _indices.get(usuario)
+        if indice is None:
+            indice = IndiceDuplicatas.carregar(caminho_indice(usuario, diretorio))
+            _indices[usuario] = indice
+        if sincronizar_indice(usuario, indice):
+            indice.salvar(caminho_indice(usuario, diretorio))
+    return indice
+
+# Função para gravar no disco o índice em memória do usuário
+def salvar_indice(usuario, diretorio=DIRETORIO_INDICES):
+    indice = _indices.get(usuario)
+    if indice is not None:
+        indice.salvar(caminho_indice(usuario, diretorio))
+
+# Função para descartar o índice em memória (ele é ressincronizado na próxima consulta)
+def descartar_indice(usuario):
+    with _trava_indices:
+        _indices.pop(usuario, None)
+
+# Função para carregar os cards de cada grupo de duplicatas, para revisão
+def grupos_de_duplicatas(usuario, limiar=LIMIAR_SEMELHANCA):
+    grupos = obter_indice(usuario).grupos(limiar)
+    ids = [card_id for grupo in grupos for card_id in grupo]
+    cards = {card["id"]: card for card in carregar_cards_por_ids(usuario, ids)}
+    return [[cards[card_id] for card_id in grupo if card_id in cards] for grupo in grupos]
+
+# Função para mesclar um grupo de duplicatas: mantém um card, soma as leituras e exclui os demais
+def mesclar_grupo(usuario, card_mantido, cards_removidos):
+    ids_removidos = [card["id"] for card in cards_removidos if card["id"] != card_mantido["id"]]
+    if not ids_removidos:
+        return 0
+    card_novo = dict(card_mantido)
+    card_novo["vezes_lido"] = card_mantido.get("vezes_lido", 0) + sum(
+        card.get("vezes_lido", 0) for card in cards_removidos if card["id"] != card_mantido["id"]
+    )
+    atualizar_card(usuario, card_mantido, card_novo)
+    return excluir_cards_em_lote(usuario, ids=ids_removidos)
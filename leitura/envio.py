@@ -0,0 +1,174 @@
+# Pipeline de gravação em lotes: trabalhadores limitados, limite de taxa, novas tentativas com
+# espera exponencial e checkpoint em disco para retomar um envio interrompido.
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import httpx
+from postgrest.exceptions import APIError
+
+# Pasta onde ficam os checkpoints dos envios em andamento
+DIRETORIO_CHECKPOINTS = "checkpoints"
+# Códigos de erro (HTTP e PostgREST/Postgres) que indicam falha passageira
+CODIGOS_TRANSITORIOS = {
+    "408", "425", "429", "500", "502", "503", "504",
+    "PGRST000", "PGRST001", "PGRST002", "PGRST003",
+    "40001", "40P01", "53300", "57014", "57P03",
+}
+
+# Função para decidir se um erro é passageiro (vale tentar de novo) ou definitivo
+def erro_transitorio(erro):
+    if isinstance(erro, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(erro, APIError):
+        return str(erro.code) in CODIGOS_TRANSITORIOS or "rate limit" in str(erro.message or "").lower()
+    return False
+
+# Função para executar uma chamada com novas tentativas, espera exponencial e jitter ("full jitter")
+def com_tentativas(funcao, *args, tentativas=6, espera_base=0.5, espera_maxima=30.0, ao_falhar=None, dormir=time.sleep, **kwargs):
+    for tentativa in range(tentativas):
+        try:
+            return funcao(*args, **kwargs)
+        except Exception as erro:
+            if tentativa == tentativas - 1 or not erro_transitorio(erro):
+                raise
+            if ao_falhar:
+                ao_falhar(erro, tentativa + 1)
+            dormir(random.uniform(0, min(espera_maxima, espera_base * 2 ** tentativa)))
+
+# Limite de taxa por balde de fichas (token bucket), compartilhado entre os trabalhadores
+class LimiteDeTaxa:
+    def __init__(self, por_segundo, rajada=None):
+        self.por_segundo = por_segundo
+        self.capacidade = rajada or max(1.0, por_segundo or 0)
+        self.fichas = self.capacidade
+        self.ultimo = time.monotonic()
+        self.trava = threading.Lock()
+
+    def aguardar(self):
+        if not self.por_segundo:
+            return
+        while True:
+            with self.trava:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self.ultimo) * self.por_segundo)
+                self.ultimo = agora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.por_segundo
+            time.sleep(espera)
+
+# Checkpoint de um envio: chaves dos lotes já gravados e contadores acumulados
+class Checkpoint:
+    def __init__(self, caminho, dados=None):
+        self.caminho = caminho
+        self.dados = dados or {"concluidos": [], "resultado": {}, "etapas": []}
+        self.concluidos = set(self.dados["concluidos"])
+        self.trava = threading.Lock()
+
+    @classmethod
+    def abrir(cls, caminho):
+        if caminho and os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                return cls(caminho, json.load(f))
+        return cls(caminho)
+
+    @property
+    def retomado(self):
+        return bool(self.concluidos or self.dados["etapas"])
+
+    def concluido(self, chave):
+        return chave in self.concluidos
+
+    def etapa_concluida(self, etapa):
+        return etapa in self.dados["etapas"]
+
+    def marcar_etapa(self, etapa):
+        with self.trava:
+            self.dados["etapas"].append(etapa)
+            self._salvar()
+
+    def marcar(self, chave, resultado):
+        with self.trava:
+            self.concluidos.add(chave)
+            self.dados["concluidos"] = sorted(self.concluidos)
+            self.dados["resultado"] = dict(resultado)
+            self._salvar()
+
+    def _salvar(self):
+        if not self.caminho:
+            return
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        with open(self.caminho + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.dados, f)
+        os.replace(self.caminho + ".tmp", self.caminho)
+
+    def remover(self):
+        if self.caminho and os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+# Função para o caminho do checkpoint de um envio (usuário + operação + impressão digital do arquivo)
+def caminho_checkpoint(usuario, operacao, impressao_digital, diretorio=DIRETORIO_CHECKPOINTS):
+    return os.path.join(diretorio, f"{usuario}_{operacao}_{impressao_digital}.json")
+
+# Função para a chave de idempotência de um lote: posição no arquivo + conteúdo
+def chave_lote(numero, lote):
+    resumo = hashlib.sha1()
+    for card in lote:
+        resumo.update(f"{card.get('pergunta', '')}\0{card.get('resposta', '')}\0".encode("utf-8"))
+    return f"{numero}:{resumo.hexdigest()[:16]}"
+
+# Executor de lotes com trabalhadores limitados, limite de taxa e novas tentativas
+class EnvioEmLotes:
+    def __init__(self, gravar, trabalhadores=4, lotes_por_segundo=None, tentativas=6, ao_retentar=None):
+        self.gravar = gravar
+        self.trabalhadores = max(1, trabalhadores)
+        self.limite = LimiteDeTaxa(lotes_por_segundo)
+        self.tentativas = tentativas
+        self.ao_retentar = ao_retentar
+        self.retentativas = 0
+        self.trava = threading.Lock()
+
+    def _contar_retentativa(self, erro, tentativa):
+        with self.trava:
+            self.retentativas += 1
+        if self.ao_retentar:
+            self.ao_retentar(erro, tentativa)
+
+    def _executar(self, lote):
+        # A partir da segunda tentativa, a gravação recebe repetindo=True para evitar duplicar
+        # o que uma tentativa anterior possa ter gravado antes de falhar
+        tentativa = {"n": 0}
+
+        def uma_tentativa():
+            self.limite.aguardar()
+            tentativa["n"] += 1
+            return self.gravar(lote, repetindo=tentativa["n"] > 1)
+
+        return com_tentativas(uma_tentativa, tentativas=self.tentativas, ao_falhar=self._contar_retentativa)
+
+    # Envia os lotes (chave, lote); ao_concluir(chave, lote, retorno) roda na thread que chamou
+    def enviar(self, lotes, ao_concluir=None):
+        with ThreadPoolExecutor(max_workers=self.trabalhadores) as executor:
+            pendentes = {}
+
+            def concluir(futuros):
+                for futuro in futuros:
+                    chave, lote = pendentes.pop(futuro)
+                    retorno = futuro.result()
+                    if ao_concluir:
+                        ao_concluir(chave, lote, retorno)
+
+            # Manter no máximo 2 lotes por trabalhador em andamento para limitar o uso de memória
+            for chave, lote in lotes:
+                if len(pendentes) >= 2 * self.trabalhadores:
+                    prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                    concluir(prontos)
+                pendentes[executor.submit(self._executar, lote)] = (chave, lote)
+            prontos, _ = wait(pendentes)
+            concluir(prontos)
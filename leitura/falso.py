@@ -0,0 +1,501 @@
+# Backend falso, em memória, que imita o subconjunto do cliente do Supabase (PostgREST) usado pelo app.
+# Serve para testes de carga e desenvolvimento local sem rede, com latência artificial opcional:
+#
+#   from leitura.dados import configurar_clientes
+#   configurar_clientes(ClienteFalso(latencia=0.02, variacao=0.01))
+import itertools
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+# Limite de linhas por resposta, como o "max-rows" padrão do PostgREST no Supabase
+MAX_LINHAS = 1000
+
+# Resposta no mesmo formato do postgrest-py (data e count)
+class RespostaFalsa:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+# Função para converter um padrão like/ilike do PostgREST (* ou %) em expressão regular
+def _padrao_like(padrao, ignorar_caixa):
+    partes = []
+    i = 0
+    while i < len(padrao):
+        c = padrao[i]
+        if c == "\\" and i + 1 < len(padrao):
+            partes.append(re.escape(padrao[i + 1]))
+            i += 2
+            continue
+        partes.append(".*" if c in "*%" else "." if c == "_" else re.escape(c))
+        i += 1
+    return re.compile("".join(partes), (re.IGNORECASE if ignorar_caixa else 0) | re.DOTALL)
+
+# Função para separar as condições de um filtro or=(...) respeitando aspas e grupos and(...)/or(...)
+def _separar_condicoes(expressao):
+    condicoes, atual, aspas, escape, nivel = [], "", False, False, 0
+    for c in expressao:
+        if escape:
+            atual += c
+            escape = False
+        elif c == "\\":
+            atual += c
+            escape = True
+        elif c == '"':
+            aspas = not aspas
+            atual += c
+        elif c == "," and not aspas and nivel == 0:
+            condicoes.append(atual)
+            atual = ""
+        else:
+            if not aspas:
+                nivel += (c == "(") - (c == ")")
+            atual += c
+    if atual:
+        condicoes.append(atual)
+    return condicoes
+
+# Função para retirar as aspas de um valor do PostgREST ("...") e desfazer os escapes
+def _valor(valor):
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", valor[1:-1])
+    return valor
+
+# Função que compara um valor da linha com o valor do filtro (textos vindos da URL são convertidos)
+def _comparavel(valor_linha, valor_filtro):
+    if isinstance(valor_filtro, str) and isinstance(valor_linha, (int, float)) and not isinstance(valor_linha, bool):
+        try:
+            return type(valor_linha)(valor_filtro)
+        except ValueError:
+            return valor_filtro
+    return valor_filtro
+
+_OPERADORES = {
+    "eq": lambda a, b: a == _comparavel(a, b),
+    "neq": lambda a, b: a != _comparavel(a, b),
+    "gt": lambda a, b: a is not None and a > _comparavel(a, b),
+    "gte": lambda a, b: a is not None and a >= _comparavel(a, b),
+    "lt": lambda a, b: a is not None and a < _comparavel(a, b),
+    "lte": lambda a, b: a is not None and a <= _comparavel(a, b),
+    "like": lambda a, b: a is not None and _padrao_like(b, False).fullmatch(str(a)) is not None,
+    "ilike": lambda a, b: a is not None and _padrao_like(b, True).fullmatch(str(a)) is not None,
+    "is": lambda a, b: a is None if b in (None, "null") else a == b,
+}
+
+# Função para montar o teste de um grupo de condições do PostgREST ("a.eq.1,and(b.gt.2,c.is.null)"),
+# combinadas com any (or) ou all (and)
+def _condicao_composta(combinar, expressao):
+    testes = []
+    for condicao in _separar_condicoes(expressao):
+        grupo = re.match(r"^(and|or)\((.*)\)$", condicao, re.DOTALL)
+        if grupo:
+            testes.append(_condicao_composta(all if grupo.group(1) == "and" else any, grupo.group(2)))
+            continue
+        coluna, operador, valor = condicao.split(".", 2)
+        testes.append(lambda linha, col=coluna, op=operador, val=_valor(valor): _OPERADORES[op](linha.get(col), val))
+    return lambda linha: combinar(teste(linha) for teste in testes)
+
+# Função para normalizar um texto para a busca textual falsa: sem tags HTML, sem acentos e em minúsculas
+def _normalizar_busca(texto):
+    texto = re.sub(r"<[^>]*>", " ", texto or "")
+    return "".join(c for c in unicodedata.normalize("NFD", texto.lower()) if unicodedata.category(c) != "Mn")
+
+# Função para o radical de uma palavra na busca falsa (aproximação do radical em português do Postgres)
+def _radical(palavra):
+    return palavra[:max(4, len(palavra) - 2)]
+
+# Função para interpretar uma busca (sintaxe de busca na web do Postgres: palavras, "frase", -excluída) em
+# listas de radicais obrigatórios e excluídos; cada item é a sequência de radicais de uma palavra ou frase
+def _termos_busca(busca):
+    obrigatorios, excluidos = [], []
+    for termo in re.findall(r'-?"[^"]*"|\S+', busca or ""):
+        destino = excluidos if termo.startswith("-") else obrigatorios
+        # Palavras de até 2 letras ficam de fora, como as palavras vazias ("de", "a", "o") no Postgres
+        palavras = [palavra for palavra in re.findall(r"\w+", _normalizar_busca(termo)) if len(palavra) > 2]
+        if palavras and palavras != ["or"]:
+            destino.append([_radical(palavra) for palavra in palavras])
+    return obrigatorios, excluidos
+
+# Função para contar as ocorrências de um termo (sequência de radicais) numa lista de palavras
+def _ocorrencias(palavras, radicais):
+    return sum(
+        all(palavras[i + j].startswith(radical) for j, radical in enumerate(radicais))
+        for i in range(len(palavras) - len(radicais) + 1)
+    )
+
+# Função para a relevância de um card numa busca (0 se não atende): ocorrências na pergunta valem mais que na
+# referência, e estas mais que na resposta, como os pesos A, B e C de sql/migracoes/006_busca.sql
+def _relevancia(linha, busca):
+    obrigatorios, excluidos = _termos_busca(busca)
+    campos = {campo: re.findall(r"\w+", _normalizar_busca(linha.get(campo))) for campo in ("pergunta", "referencia", "resposta")}
+    pesos = {"pergunta": 1.0, "referencia": 0.4, "resposta": 0.2}
+    if not obrigatorios or any(_ocorrencias(palavras, termo) for termo in excluidos for palavras in campos.values()):
+        return 0.0
+    relevancia = 0.0
+    for termo in obrigatorios:
+        pontos = sum(pesos[campo] * _ocorrencias(palavras, termo) for campo, palavras in campos.items())
+        if not pontos:
+            return 0.0
+        relevancia += pontos
+    return relevancia
+
+# Função para destacar com <mark> as palavras de um texto que casam com a busca
+def _destacar(texto, busca):
+    radicais = {radical for termo in _termos_busca(busca)[0] for radical in termo}
+    texto = re.sub(r"<[^>]*>", " ", texto or "")
+    return re.sub(r"\w+", lambda m: f"<mark>{m.group()}</mark>" if any(_normalizar_busca(m.group()).startswith(r) for r in radicais) else m.group(), texto)
+
+# Consulta encadeada sobre uma tabela do banco falso
+class ConsultaFalsa:
+    def __init__(self, cliente, tabela):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.operacao = "select"
+        self.colunas = "*"
+        self.contagem = None
+        self.carga = None
+        self.conflito = None
+        self.filtros = []
+        self.ordenacao = []
+        self.intervalo = None
+        self.limite = None
+
+    def select(self, colunas="*", count=None):
+        self.colunas = colunas
+        self.contagem = count
+        return self
+
+    def insert(self, dados):
+        self.operacao, self.carga = "insert", dados
+        return self
+
+    def upsert(self, dados, on_conflict="id", **_):
+        self.operacao, self.carga, self.conflito = "upsert", dados, [c.strip() for c in on_conflict.split(",")]
+        return self
+
+    def update(self, dados):
+        self.operacao, self.carga = "update", dados
+        return self
+
+    def delete(self):
+        self.operacao = "delete"
+        return self
+
+    def _filtro(self, coluna, operador, valor):
+        self.filtros.append(lambda linha: _OPERADORES[operador](linha.get(coluna), valor))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(coluna, "eq", valor)
+
+    def neq(self, coluna, valor):
+        return self._filtro(coluna, "neq", valor)
+
+    def gt(self, coluna, valor):
+        return self._filtro(coluna, "gt", valor)
+
+    def gte(self, coluna, valor):
+        return self._filtro(coluna, "gte", valor)
+
+    def lt(self, coluna, valor):
+        return self._filtro(coluna, "lt", valor)
+
+    def lte(self, coluna, valor):
+        return self._filtro(coluna, "lte", valor)
+
+    def like(self, coluna, padrao):
+        return self._filtro(coluna, "like", padrao)
+
+    def ilike(self, coluna, padrao):
+        return self._filtro(coluna, "ilike", padrao)
+
+    def is_(self, coluna, valor):
+        return self._filtro(coluna, "is", valor)
+
+    # Filtro genérico do PostgREST; a busca textual (wfts) é aproximada por _relevancia
+    def filter(self, coluna, operador, valor):
+        if operador.startswith("wfts"):
+            self.filtros.append(lambda linha: _relevancia(linha, valor) > 0)
+            return self
+        if operador == "in":
+            return self.in_(coluna, _valores_in(valor))
+        return self._filtro(coluna, operador, valor)
+
+    def in_(self, coluna, valores):
+        valores = list(valores)
+        self.filtros.append(lambda linha: any(_OPERADORES["eq"](linha.get(coluna), v) for v in valores))
+        return self
+
+    def or_(self, expressao):
+        self.filtros.append(_condicao_composta(any, expressao))
+        return self
+
+    def order(self, coluna, desc=False, **_):
+        self.ordenacao.append((coluna, desc))
+        return self
+
+    def range(self, inicio, fim):
+        self.intervalo = (inicio, fim)
+        return self
+
+    def limit(self, quantidade):
+        self.limite = quantidade
+        return self
+
+    def _projetar(self, linha):
+        if self.colunas.strip() == "*":
+            return dict(linha)
+        return {c.strip(): linha.get(c.strip()) for c in self.colunas.split(",")}
+
+    def execute(self):
+        self.cliente.esperar()
+        with self.cliente.trava:
+            if self.tabela in self.cliente.visoes:
+                if self.operacao != "select":
+                    raise ValueError(f"A visão {self.tabela} é somente leitura.")
+                return self._executar(self.cliente.visoes[self.tabela](self.cliente))
+            return self._executar(self.cliente.tabelas[self.tabela])
+
+    def _executar(self, linhas):
+        if self.operacao in ("insert", "upsert"):
+            novas = self.carga if isinstance(self.carga, list) else [self.carga]
+            gravadas = []
+            for nova in novas:
+                existente = None
+                if self.operacao == "upsert":
+                    existente = next((l for l in linhas if all(l.get(c) == nova.get(c) for c in self.conflito)), None)
+                if existente is not None:
+                    existente.update(nova)
+                    gravadas.append(dict(existente))
+                    continue
+                linha = {"id": next(self.cliente.sequencias[self.tabela])}
+                linha.update(self.cliente.padroes.get(self.tabela, {}))
+                linha.update(nova)
+                linhas.append(linha)
+                gravadas.append(dict(linha))
+            return RespostaFalsa(gravadas)
+
+        selecionadas = [linha for linha in linhas if all(f(linha) for f in self.filtros)]
+        if self.operacao == "update":
+            for linha in selecionadas:
+                linha.update(self.carga)
+            return RespostaFalsa([dict(linha) for linha in selecionadas])
+        if self.operacao == "delete":
+            ids = {id(linha) for linha in selecionadas}
+            linhas[:] = [linha for linha in linhas if id(linha) not in ids]
+            return RespostaFalsa([dict(linha) for linha in selecionadas])
+
+        for coluna, desc in reversed(self.ordenacao):
+            selecionadas.sort(key=lambda linha: (linha.get(coluna) is None, linha.get(coluna)), reverse=desc)
+        total = len(selecionadas)
+        if self.intervalo:
+            selecionadas = selecionadas[self.intervalo[0]:self.intervalo[1] + 1]
+        if self.limite is not None:
+            selecionadas = selecionadas[:self.limite]
+        selecionadas = selecionadas[:MAX_LINHAS]
+        return RespostaFalsa([self._projetar(linha) for linha in selecionadas], total if self.contagem else None)
+
+# Chamada de função remota (rpc) registrada no cliente falso
+class ChamadaFalsa:
+    def __init__(self, cliente, funcao, parametros):
+        self.cliente = cliente
+        self.funcao = funcao
+        self.parametros = parametros
+
+    def execute(self):
+        self.cliente.esperar()
+        with self.cliente.trava:
+            return RespostaFalsa(self.funcao(self.cliente, **self.parametros))
+
+# Função remota facetas_cards (sql/migracoes/002_facetas.sql): contagens de cards por (concurso, lei) de um usuário
+def _facetas_cards(cliente, p_usuario):
+    grupos = {}
+    for linha in cliente.tabelas["cards"]:
+        if linha.get("usuario") != p_usuario:
+            continue
+        chave = (linha.get("concurso") or "", linha.get("lei") or "")
+        grupo = grupos.setdefault(chave, {"concurso": chave[0], "lei": chave[1], "cards": 0, "nunca_lidos": 0, "leituras": 0})
+        vezes = linha.get("vezes_lido") or 0
+        grupo["cards"] += 1
+        grupo["nunca_lidos"] += vezes == 0
+        grupo["leituras"] += vezes
+    return [grupos[chave] for chave in sorted(grupos)]
+
+# Função remota registrar_leituras (sql/migracoes/003_leituras.sql): incrementa vezes_lido, grava os eventos e os totais
+# por lei do dia e da semana (no fuso horário local da máquina, em vez de p_fuso)
+def _registrar_leituras(cliente, p_usuario, p_ids, p_fuso=None):
+    agora = datetime.now(timezone.utc)
+    dia = datetime.now().date()
+    semana = dia - timedelta(days=dia.weekday())
+    ids = set(p_ids)
+    por_lei = defaultdict(int)
+    for linha in cliente.tabelas["cards"]:
+        if linha.get("usuario") == p_usuario and linha.get("id") in ids:
+            linha["vezes_lido"] = (linha.get("vezes_lido") or 0) + 1
+            por_lei[linha.get("lei") or ""] += 1
+            cliente.tabelas["leituras"].append({
+                "id": next(cliente.sequencias["leituras"]), "usuario": p_usuario,
+                "card_id": linha["id"], "lido_em": agora.isoformat(),
+            })
+    totais = cliente.tabelas["leituras_por_periodo"]
+    for lei, quantidade in por_lei.items():
+        for periodo, inicio in (("dia", dia.isoformat()), ("semana", semana.isoformat())):
+            chave = {"usuario": p_usuario, "periodo": periodo, "inicio": inicio, "lei": lei}
+            existente = next((t for t in totais if all(t[c] == v for c, v in chave.items())), None)
+            if existente is None:
+                totais.append(dict(chave, leituras=quantidade))
+            else:
+                existente["leituras"] += quantidade
+    return sum(por_lei.values())
+
+# Visão cards_visiveis (sql/migracoes/004_baralhos.sql): cards com o texto do card base para as camadas de baralhos
+def _cards_visiveis(cliente):
+    base = {card["id"]: card for card in cliente.tabelas["baralho_cards"]}
+    linhas = []
+    for linha in cliente.tabelas["cards"]:
+        card_base = base.get(linha.get("baralho_card_id"), {})
+        linha = dict(linha)
+        for campo in ("pergunta", "resposta", "referencia"):
+            if linha.get(campo) is None:
+                linha[campo] = card_base.get(campo)
+        linhas.append(linha)
+    return linhas
+
+# Função para ler a lista de um filtro in do PostgREST: ("a","b \"c\"",d) → ["a", 'b "c"', "d"]
+def _valores_in(lista):
+    return [
+        re.sub(r"\\(.)", r"\1", achado.group(1)) if achado.group(1) is not None else achado.group(2)
+        for achado in re.finditer(r'"((?:[^"\\]|\\.)*)"|([^,()"]+)', lista or "")
+    ]
+
+# Função remota publicar_baralho (sql/migracoes/009_baralhos_permissoes.sql): cria o baralho e copia o texto visível
+# dos cards do usuário que atendem ao concurso e à lei
+def _publicar_baralho(cliente, p_usuario, p_nome, p_descricao="", p_concurso=None, p_lei=None):
+    baralho_id = next(cliente.sequencias["baralhos"])
+    cards = [
+        linha for linha in sorted(_cards_visiveis(cliente), key=lambda linha: linha["id"])
+        if linha.get("usuario") == p_usuario and p_concurso in (None, linha.get("concurso")) and p_lei in (None, linha.get("lei"))
+    ]
+    for linha in cards:
+        cliente.tabelas["baralho_cards"].append(dict(
+            {campo: linha.get(campo) or "" for campo in ("concurso", "lei", "pergunta", "resposta", "referencia")},
+            id=next(cliente.sequencias["baralho_cards"]), baralho_id=baralho_id,
+        ))
+    cliente.tabelas["baralhos"].append({
+        "id": baralho_id, "nome": p_nome, "descricao": p_descricao or "", "autor": p_usuario, "quantidade": len(cards),
+    })
+    return [{"baralho_id": baralho_id, "quantidade": len(cards)}]
+
+# Função remota buscar_cards (sql/migracoes/006_busca.sql): página de cards do usuário que atendem à busca, por relevância,
+# com os trechos destacados; a busca em português do Postgres é aproximada por radicais (ver _relevancia)
+def _buscar_cards(cliente, p_usuario, p_busca, p_concurso=None, p_lei=None, p_leituras_min=None, p_leituras_max=None,
+                  p_artigo_inicio=None, p_artigo_fim=None, p_limite=20, p_deslocamento=0, p_destacar=True):
+    encontrados = []
+    for linha in _cards_visiveis(cliente):
+        vezes = linha.get("vezes_lido") or 0
+        artigo = linha.get("artigo")
+        if linha.get("usuario") != p_usuario or p_concurso not in (None, linha.get("concurso")) or p_lei not in (None, linha.get("lei")):
+            continue
+        if (p_leituras_min is not None and vezes < p_leituras_min) or (p_leituras_max is not None and vezes > p_leituras_max):
+            continue
+        if (p_artigo_inicio is not None and (artigo is None or artigo < p_artigo_inicio)) or (p_artigo_fim is not None and (artigo is None or artigo > p_artigo_fim)):
+            continue
+        relevancia = _relevancia(linha, p_busca)
+        if relevancia > 0:
+            encontrados.append(dict(linha, relevancia=relevancia))
+    encontrados.sort(key=lambda linha: (-linha["relevancia"], linha.get("ordem_ref") is None, linha.get("ordem_ref") or "", linha["id"]))
+    pagina = encontrados[p_deslocamento:p_deslocamento + p_limite]
+    for linha in pagina:
+        linha["destaque_pergunta"] = _destacar(linha.get("pergunta"), p_busca) if p_destacar else None
+        linha["destaque_resposta"] = _destacar(linha.get("resposta"), p_busca) if p_destacar else None
+        linha["total"] = len(encontrados)
+    return pagina
+
+# Cliente falso: tabelas em memória compartilhadas entre threads, com latência artificial por requisição
+class ClienteFalso:
+    def __init__(self, latencia=0.0, variacao=0.0, semente=None):
+        self.latencia = latencia
+        self.variacao = variacao
+        self.aleatorio = random.Random(semente)
+        self.tabelas = defaultdict(list)
+        self.sequencias = defaultdict(lambda: itertools.count(1))
+        self.padroes = {"cards": {"vezes_lido": 0, "baralho_card_id": None, "artigo": None, "ordem_ref": None}, "baralhos": {"descricao": "", "quantidade": 0}}
+        self.visoes = {"cards_visiveis": _cards_visiveis}
+        self.funcoes = {"facetas_cards": _facetas_cards, "registrar_leituras": _registrar_leituras, "buscar_cards": _buscar_cards,
+                       "publicar_baralho": _publicar_baralho}
+        self.requisicoes = 0
+        self.trava = threading.RLock()
+
+    def esperar(self):
+        with self.trava:
+            self.requisicoes += 1
+            atraso = self.latencia + (self.aleatorio.uniform(0, self.variacao) if self.variacao else 0)
+        if atraso > 0:
+            time.sleep(atraso)
+
+    def table(self, tabela):
+        return ConsultaFalsa(self, tabela)
+
+    def registrar_rpc(self, nome, funcao):
+        self.funcoes[nome] = funcao
+
+    def rpc(self, nome, parametros=None):
+        return ChamadaFalsa(self, self.funcoes[nome], parametros or {})
+
+# Substituto local de um servidor Redis (get, set com ex, mget, incr e conjuntos ordenados), compartilhado entre as threads do
+# processo; serve para testar o cache compartilhado (leitura.cache.CacheRedis) sem um servidor
+class RedisFalso:
+    def __init__(self):
+        self.valores = {}
+        self.trava = threading.Lock()
+
+    def _ler(self, chave):
+        valor, expira = self.valores.get(chave, (None, None))
+        if expira is not None and expira <= time.monotonic():
+            del self.valores[chave]
+            return None
+        return valor
+
+    def get(self, chave):
+        with self.trava:
+            return self._ler(chave)
+
+    def set(self, chave, valor, ex=None):
+        with self.trava:
+            self.valores[chave] = (valor, time.monotonic() + ex if ex else None)
+
+    def mget(self, chaves):
+        with self.trava:
+            return [self._ler(chave) for chave in chaves]
+
+    def incr(self, chave):
+        with self.trava:
+            valor = int(self._ler(chave) or 0) + 1
+            self.valores[chave] = (str(valor), None)
+            return valor
+
+    def zadd(self, chave, membros):
+        with self.trava:
+            conjunto = self._ler(chave) or {}
+            conjunto.update(membros)
+            self.valores[chave] = (conjunto, None)
+            return len(membros)
+
+    def zrangebyscore(self, chave, minimo, maximo):
+        minimo, maximo = float(minimo), float(maximo)
+        with self.trava:
+            conjunto = self._ler(chave) or {}
+            return [membro for membro, nota in sorted(conjunto.items(), key=lambda item: item[1]) if minimo <= nota <= maximo]
+
+    def zremrangebyscore(self, chave, minimo, maximo):
+        minimo, maximo = float(minimo), float(maximo)
+        with self.trava:
+            conjunto = self._ler(chave) or {}
+            removidos = [membro for membro, nota in conjunto.items() if minimo <= nota <= maximo]
+            for membro in removidos:
+                del conjunto[membro]
+            return len(removidos)
@@ -0,0 +1,118 @@
+# Importação e restauração de cards em lotes, com gravação paralela e retomável
+import itertools
+
+from leitura.dados import chave_card, chaves_existentes, chaves_gravadas, excluir_cards_do_usuario, salvar_cards_em_lote
+from leitura.envio import Checkpoint, EnvioEmLotes, chave_lote
+
+# Quantidade padrão de cards gravados por comando de inserção
+TAMANHO_LOTE_IMPORTACAO = 500
+
+# Função para agrupar os cards de um iterador em listas de tamanho fixo
+def em_lotes(cards, tamanho_lote):
+    lote = []
+    for card in cards:
+        lote.append(card)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+# Função para importar cards ignorando os que já existem (mesma pergunta e resposta)
+# Com um índice de duplicatas, também ignora os cards quase iguais a outros já cadastrados ou importados; cada
+# um deles vai para a lista quase_iguais como (card, id do card parecido, similaridade), para ser revisado.
+# Com um checkpoint, os lotes já gravados numa execução anterior interrompida são pulados.
+def importar_cards(usuario, cards, tamanho_lote=TAMANHO_LOTE_IMPORTACAO, trabalhadores=1, ao_progredir=None,
+                   chaves=None, indice=None, checkpoint=None, lotes_por_segundo=None, quase_iguais=None):
+    checkpoint = checkpoint or Checkpoint(None)
+    if chaves is None:
+        chaves = chaves_existentes(usuario)
+    resultado = {"lidos": 0, "novos": 0, "duplicados": 0}
+    if indice is not None:
+        resultado["semelhantes"] = 0
+    resultado.update(checkpoint.dados["resultado"])
+    resultado["retentativas"] = 0
+    ids_provisorios = itertools.count(-1, -1)
+    # Ids reais dos cards do próprio arquivo (ainda com id provisório) dos quais algum card ignorado é parecido
+    ids_citados = {}
+
+    # Filtrar duplicados (contra o banco e dentro do próprio arquivo) antes de gravar
+    def filtrar(lote_bruto):
+        lote, parcial = [], {"lidos": len(lote_bruto), "duplicados": 0, "semelhantes": 0, "quase_iguais": []}
+        for card in lote_bruto:
+            chave = chave_card(card["pergunta"], card["resposta"])
+            if chave in chaves:
+                parcial["duplicados"] += 1
+                continue
+            if indice is not None:
+                encontrados = indice.semelhantes(card)
+                if encontrados:
+                    card_id, semelhanca = encontrados[0]
+                    if card_id < 0:
+                        ids_citados.setdefault(card_id, None)
+                    parcial["semelhantes"] += 1
+                    parcial["quase_iguais"].append((card, card_id, semelhanca))
+                    continue
+                # Indexar já com um id provisório, trocado pelo id real depois da gravação
+                card = dict(card, id_provisorio=next(ids_provisorios))
+                indice.adicionar(card["id_provisorio"], card)
+            chaves.add(chave)
+            lote.append(card)
+        return lote, parcial
+
+    # Os lotes são formados pela posição no arquivo, antes do filtro, para terem a mesma chave ao retomar
+    def lotes():
+        for numero, lote_bruto in enumerate(em_lotes(cards, tamanho_lote)):
+            chave = chave_lote(numero, lote_bruto)
+            if not checkpoint.concluido(chave):
+                yield chave, filtrar(lote_bruto)
+
+    def gravar(item, repetindo=False):
+        lote, _ = item
+        if repetindo:
+            # Uma tentativa anterior pode ter gravado o lote antes de falhar (uma consulta para o lote inteiro)
+            gravadas = chaves_gravadas(usuario, lote)
+            lote = [card for card in lote if chave_card(card["pergunta"], card["resposta"]) not in gravadas]
+        return salvar_cards_em_lote(usuario, lote)
+
+    def concluir(chave, item, linhas):
+        lote, parcial = item
+        for campo, valor in parcial.items():
+            if campo in resultado:
+                resultado[campo] += valor
+        resultado["novos"] += len(lote)
+        if indice is not None:
+            ids_reais = {chave_card(linha["pergunta"], linha["resposta"]): linha["id"] for linha in linhas}
+            for card in lote:
+                card_id = ids_reais.get(chave_card(card["pergunta"], card["resposta"]))
+                if card_id is not None:
+                    indice.renomear(card["id_provisorio"], card_id)
+                    if card["id_provisorio"] in ids_citados:
+                        ids_citados[card["id_provisorio"]] = card_id
+            if quase_iguais is not None:
+                quase_iguais.extend(parcial["quase_iguais"])
+        resultado["retentativas"] = envio.retentativas
+        checkpoint.marcar(chave, {k: v for k, v in resultado.items() if k != "retentativas"})
+        if ao_progredir:
+            ao_progredir(dict(resultado))
+
+    envio = EnvioEmLotes(gravar, trabalhadores, lotes_por_segundo)
+    envio.enviar(lotes(), concluir)
+    resultado["retentativas"] = envio.retentativas
+    if quase_iguais:
+        quase_iguais[:] = [(card, ids_citados.get(card_id) or card_id, semelhanca) for card, card_id, semelhanca in quase_iguais]
+    checkpoint.remover()
+    return resultado
+
+# Função para restaurar um backup: apaga os cards do usuário e importa os do arquivo
+# Ao retomar uma restauração interrompida, a exclusão não é repetida.
+def restaurar_cards(usuario, cards, tamanho_lote=TAMANHO_LOTE_IMPORTACAO, trabalhadores=1, ao_progredir=None,
+                    checkpoint=None, lotes_por_segundo=None):
+    checkpoint = checkpoint or Checkpoint(None)
+    chaves = None
+    if not checkpoint.etapa_concluida("exclusao"):
+        excluir_cards_do_usuario(usuario)
+        checkpoint.marcar_etapa("exclusao")
+        chaves = set()
+    return importar_cards(usuario, cards, tamanho_lote, trabalhadores, ao_progredir, chaves=chaves,
+                          checkpoint=checkpoint, lotes_por_segundo=lotes_por_segundo)
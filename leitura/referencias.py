@@ -0,0 +1,88 @@
+# Interpretação das referências legais dos cards ("Art. 37, § 6º, CF", "art. 5º, inciso LXXIII, a") em
+# chaves de ordenação: artigo, parágrafo, inciso e alínea. As chaves são gravadas junto com o card (colunas
+# artigo e ordem_ref, sql/migracoes/005_referencias.sql) para listar os cards na ordem da lei e ir direto a
+# um artigo ou intervalo de artigos com uma consulta indexada.
+import re
+
+# Artigo: "Art. 37", "art 5º", "Arts. 37 a 41", "artigo 1.228", "Art. 37-A"
+_ARTIGO = re.compile(r"\bart(?:igo)?s?\b\.?\s*(\d{1,3}(?:\.\d{3})+|\d+)\s*(?:º|°|o\b)?(?:\s*-\s*([A-Za-z])\b)?", re.IGNORECASE)
+# Divisão do restante da referência em partes: vírgulas, ponto e vírgula e antes de "§", "inciso", "alínea"...
+_SEPARADOR = re.compile(r"[,;]|\s+(?=§|inc(?:iso)?s?\b|al[íi]nea|par[áa]grafo)", re.IGNORECASE)
+# Parágrafo: "§ 6º", "§§ 1º", "parágrafo 2", "parágrafo único", "§ único"
+_PARAGRAFO = re.compile(r"^(?:§+|par[áa]grafo)\s*(?:(\d+)|([úu]nico))", re.IGNORECASE)
+# Inciso: "inciso XXXV", "inc. II" ou só o número romano ("III")
+_INCISO = re.compile(r"^(?:(inc(?:iso)?s?\b\.?)\s*)?([IVXLCDM]+)(?=\s|-|–|\)|$)", re.IGNORECASE)
+# Alínea: "alínea b", "alínea 'b'" ou só a letra depois de um inciso ("a", "a)")
+_ALINEA = re.compile(r"^(?:(al[íi]nea)\s*)?[\"'“”‘’]?([a-z])[\"'“”‘’]?\)?$", re.IGNORECASE)
+# Número romano bem formado
+_ROMANO = re.compile(r"^M{0,3}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})$")
+_VALORES_ROMANOS = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
+# Maior inciso aceito sem a palavra "inciso" (evita ler siglas como "CC" ou "DL" como números romanos)
+MAIOR_INCISO_SEM_PREFIXO = 99
+
+# Função para converter um número romano em inteiro (None se não for um número romano válido)
+def romano_para_int(texto):
+    texto = texto.upper()
+    if not texto or not _ROMANO.match(texto):
+        return None
+    total = 0
+    for atual, seguinte in zip(texto, texto[1:] + " "):
+        valor = _VALORES_ROMANOS[atual]
+        total += -valor if valor < _VALORES_ROMANOS.get(seguinte, 0) else valor
+    return total
+
+# Função para interpretar uma referência legal em (artigo, sufixo, parágrafo, inciso, alínea), ou None se não
+# houver artigo. Caput, sem inciso e sem alínea valem 0; parágrafo único vale 1; "37-A" tem sufixo 1.
+def interpretar_referencia(referencia):
+    achado = _ARTIGO.search(referencia or "")
+    if not achado:
+        return None
+    artigo = int(achado.group(1).replace(".", ""))
+    sufixo = ord(achado.group(2).upper()) - ord("A") + 1 if achado.group(2) else 0
+    paragrafo = inciso = alinea = 0
+    for parte in _SEPARADOR.split(referencia[achado.end():]):
+        parte = parte.strip()
+        if not parte:
+            continue
+        encontrado = _PARAGRAFO.match(parte)
+        if encontrado and not paragrafo and not inciso:
+            paragrafo = int(encontrado.group(1)) if encontrado.group(1) else 1
+            continue
+        encontrado = _INCISO.match(parte)
+        if encontrado and not inciso:
+            valor = romano_para_int(encontrado.group(2))
+            if valor and (encontrado.group(1) or (encontrado.group(2).isupper() and valor <= MAIOR_INCISO_SEM_PREFIXO)):
+                inciso = valor
+                continue
+        encontrado = _ALINEA.match(parte)
+        if encontrado and inciso and not alinea and (encontrado.group(1) or encontrado.group(2).islower()):
+            alinea = ord(encontrado.group(2).lower()) - ord("a") + 1
+    return artigo, sufixo, paragrafo, inciso, alinea
+
+# Função para a chave de ordenação de uma referência interpretada: texto de largura fixa, que ordena como os números
+def chave_de_ordem(partes):
+    if partes is None:
+        return None
+    return "{:05d}.{:02d}.{:03d}.{:03d}.{:02d}".format(*partes)
+
+# Função para as colunas de ordenação de várias referências de uma vez ({"artigo", "ordem_ref"} para cada uma),
+# como numa importação em lote: cada referência distinta é interpretada uma única vez
+def colunas_de_ordem(referencias):
+    interpretadas = {}
+    colunas = []
+    for referencia in referencias:
+        referencia = referencia or ""
+        if referencia not in interpretadas:
+            partes = interpretar_referencia(referencia)
+            interpretadas[referencia] = {"artigo": partes[0] if partes else None, "ordem_ref": chave_de_ordem(partes)}
+        colunas.append(interpretadas[referencia])
+    return colunas
+
+# Função para interpretar o artigo ou intervalo de artigos digitado pelo usuário ("37", "Art. 37", "37-41",
+# "37 a 41") em (primeiro, último), ou None se o texto não tiver um número de artigo
+def intervalo_de_artigos(texto):
+    numeros = [int(n.replace(".", "")) for n in re.findall(r"\d{1,3}(?:\.\d{3})+|\d+", texto or "")]
+    if not numeros:
+        return None
+    primeiro, ultimo = numeros[0], numeros[1] if len(numeros) > 1 else numeros[0]
+    return min(primeiro, ultimo), max(primeiro, ultimo)
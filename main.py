@@ -1,140 +1,222 @@
 import streamlit as st
-import json
 import os
 import bleach
-import re
-from supabase import create_client, Client
-from collections import defaultdict, Counter
 from datetime import datetime
-import time
 import uuid
+import time
 from streamlit_quill import st_quill
 
-# Carregar variáveis de ambiente
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
+from leitura.dados import (
+    credenciais_configuradas, MENSAGEM_CREDENCIAIS, carregar_card, carregar_facetas,
+    carregar_estatisticas, card_existe, salvar_card, atualizar_card,
+    excluir_card, excluir_cards_em_lote, atualizar_cards_em_lote, zerar_leituras_em_lote,
+    marcar_lidos_em_lote, validar_usuario, carregar_todos, registrar_leituras, carregar_historico,
+    carregar_pagina, carregar_janela, listar_baralhos, baralhos_assinados, publicar_baralho, assinar_baralho,
+    cancelar_assinatura, ordem_da_lei_disponivel, busca_no_servidor_disponivel, carregar_cards_por_ids,
+    salvar_cards_em_lote
+)
+from leitura.referencias import intervalo_de_artigos
+from leitura.arquivos import ArquivoInvalido, contar_cards, criar_backup, ler_cards, listar_backups, impressao_digital
+from leitura.envio import Checkpoint, caminho_checkpoint
+from leitura.importacao import importar_cards, restaurar_cards
+from leitura.duplicatas import obter_indice, salvar_indice, descartar_indice, grupos_de_duplicatas, mesclar_grupo, LIMIAR_SEMELHANCA
 
 st.set_page_config(page_title="Leitura de Leis por Cards", layout="centered")
 
+# Opções de quantidade de cards por página na listagem
+OPCOES_POR_PAGINA = [5, 10, 20, 50]
+# Quantidade de cards buscados de uma vez pelo modo leitura, e quantos cards antes do fim da janela a próxima é buscada
+JANELA_LEITOR = 50
+ANTECEDENCIA_LEITOR = 5
+
 # Configuração do Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-if not SUPABASE_URL or not SUPABASE_ANON_KEY or not SUPABASE_SERVICE_KEY:
-    st.error("❌ Erro: As credenciais do Supabase (SUPABASE_URL, SUPABASE_ANON_KEY e SUPABASE_SERVICE_KEY) devem ser configuradas como variáveis de ambiente.")
+if not credenciais_configuradas():
+    st.error(f"❌ Erro: {MENSAGEM_CREDENCIAIS}")
     st.stop()
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)  # Para operações gerais
-supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)  # Para operações administrativas como importação
-
-# Função para carregar os dados do Supabase com paginação
-def carregar_dados(usuario, start, end):
-    response = supabase.table("cards").select("id, pergunta, resposta, referencia, concurso, lei, vezes_lido").eq("usuario", usuario).range(start, end).execute()
-    dados = response.data if response.data else []
-    return dados
-
-# Função para contar o total de cards para o usuário
-def contar_dados(usuario):
-    response = supabase.table("cards").select("id", count="exact").eq("usuario", usuario).execute()
-    return response.count if response.count else 0
-
-# Função para contar o total de cards para uma lei específica
-def contar_cards_por_lei(usuario, concurso, lei):
-    response = supabase.table("cards").select("id", count="exact").eq("usuario", usuario).eq("concurso", concurso).eq("lei", lei).execute()
-    return response.count if response.count else 0
-
-# Função para carregar todas as leis para estatísticas e seletores
-def carregar_leis(usuario):
-    response = supabase.table("cards").select("lei").eq("usuario", usuario).execute()
-    leis = sorted(set(item["lei"] for item in response.data if item.get("lei")))
-    return leis
-
-# Função para carregar estatísticas (para "Card mais lido por lei" e "Ranking de Leis Mais Lidas")
-def carregar_estatisticas(usuario, leis_selecionadas=None):
-    response = supabase.table("cards").select("lei, pergunta, vezes_lido").eq("usuario", usuario).execute()
-    dados = response.data if response.data else []
-    
-    leituras_por_lei = Counter()
-    mais_lido_por_lei = {}
-    
-    for item in dados:
-        lei = item.get("lei", "[Sem Lei]")
-        if leis_selecionadas and lei not in leis_selecionadas:
-            continue
-        leituras_por_lei[lei] += item.get("vezes_lido", 0)
-        if lei not in mais_lido_por_lei or item.get("vezes_lido", 0) > mais_lido_por_lei[lei].get("vezes_lido", 0):
-            mais_lido_por_lei[lei] = item
-    
-    mais_lidas = leituras_por_lei.most_common()
-    return mais_lidas, mais_lido_por_lei
-
-# Função para verificar se um card já existe (baseado na pergunta e resposta)
-def card_existe(usuario, pergunta, resposta):
-    response = supabase.table("cards").select("id").eq("usuario", usuario).eq("pergunta", pergunta).eq("resposta", resposta).execute()
-    return len(response.data) > 0
-
-# Função para salvar um card no Supabase
-def salvar_card(usuario, card):
-    data = {
-        "usuario": usuario,
-        "concurso": card["concurso"],
-        "lei": card["lei"],
-        "pergunta": card["pergunta"],
-        "resposta": card["resposta"],
-        "referencia": card["referencia"],
-        "vezes_lido": card["vezes_lido"]
-    }
-    supabase_admin.table("cards").insert(data).execute()
-
-# Função para atualizar um card no Supabase
-def atualizar_card(usuario, card_antigo, card_novo):
-    supabase.table("cards").update({
-        "concurso": card_novo["concurso"],
-        "lei": card_novo["lei"],
-        "pergunta": card_novo["pergunta"],
-        "resposta": card_novo["resposta"],
-        "referencia": card_novo["referencia"],
-        "vezes_lido": card_novo["vezes_lido"]
-    }).eq("usuario", usuario).eq("pergunta", card_antigo["pergunta"]).eq("resposta", card_antigo["resposta"]).execute()
-
-# Função para excluir um card do Supabase usando o id
-def excluir_card(card_id):
-    supabase.table("cards").delete().eq("id", card_id).execute()
-
-# Função para carregar dados de um arquivo JSON (para importação)
-def carregar_dados_json(arquivo):
-    if isinstance(arquivo, str):
-        with open(arquivo, "r", encoding="utf-8") as f:
-            return json.load(f)
-    else:
-        return json.load(arquivo)
-
-# Função para criar backup dos dados em formato JSON
-def criar_backup(dados, usuario, session_id):
-    if dados:
-        os.makedirs("backup", exist_ok=True)
-        nome_backup = f"backup/{usuario}_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(nome_backup, "w", encoding="utf-8") as f_backup:
-            json.dump(dados, f_backup, ensure_ascii=False, indent=2)
-
-# Função para validar o nome de usuário
-def validar_usuario(usuario):
-    usuario = usuario.strip().lower()
-    if not re.match(r'^[a-z0-9_]+$', usuario):
-        return None
-    return usuario
+
+# Função para criar uma barra de progresso (com cards/s) para importações e restaurações. Os cards são lidos do
+# arquivo aos poucos, então o progresso é a parte do arquivo (de tamanho bytes) já lida.
+def barra_de_progresso(arquivo, tamanho, descricao):
+    barra = st.sidebar.progress(0.0, text=descricao)
+    inicio = time.monotonic()
+
+    def ao_progredir(resultado):
+        decorrido = max(time.monotonic() - inicio, 1e-9)
+        lidos = resultado.get("lidos", 0)
+        fracao = min(1.0, arquivo.tell() / tamanho) if tamanho and not arquivo.closed else 1.0
+        texto = f"{descricao}: {lidos} cards ({fracao:.0%} do arquivo) — {lidos / decorrido:.0f} cards/s"
+        if resultado.get("retentativas"):
+            texto += f" — {resultado['retentativas']} novas tentativas"
+        barra.progress(fracao, text=texto)
+
+    return ao_progredir
+
+# Função para o checkpoint da importação de um arquivo enviado. A impressão digital e o checkpoint são
+# calculados uma única vez por envio (file_id do uploader) e guardados na sessão, e não a cada rerun.
+def checkpoint_do_envio(usuario, arquivo):
+    guardado = st.session_state.get("checkpoint_envio")
+    if not guardado or guardado[0] != arquivo.file_id:
+        arquivo.seek(0)
+        caminho = caminho_checkpoint(usuario, "importacao", impressao_digital(arquivo))
+        guardado = (arquivo.file_id, Checkpoint.abrir(caminho))
+        st.session_state["checkpoint_envio"] = guardado
+    return guardado[1]
+
+# Função para o resumo das contagens de um nó do índice de facetas
+# (fica fora dos rótulos dos seletores: mudar um rótulo faz o Streamlit recriar o seletor e perder a escolha)
+def resumo_faceta(no):
+    return f"{no['cards']} cards — {no['nunca_lidos']} nunca lidos — {no['leituras']} leituras"
+
+# Função para o rótulo de uma opção de faceta com as contagens; só o rótulo muda quando as contagens mudam
+def rotulo_faceta(nos):
+    def formatar(opcao):
+        no = nos.get(opcao)
+        if not no:
+            return opcao
+        return f"{opcao} ({no['cards']} cards, {no['nunca_lidos']} nunca lidos)"
+    return formatar
+
+# Função para escolher uma faceta (concurso ou lei) num selectbox com as contagens nos rótulos. Como o
+# Streamlit identifica o widget também pelos rótulos, uma gravação que muda as contagens cria outro widget;
+# a escolha é reposta pela chave do widget na sessão.
+def escolher_faceta(area, rotulo, opcoes, nos, chave):
+    if chave in st.session_state:
+        st.session_state[chave] = st.session_state[chave] if st.session_state[chave] in opcoes else opcoes[0]
+    return area.selectbox(rotulo, opcoes, format_func=rotulo_faceta(nos), key=chave)
+
+# Função para limpar a seleção de cards da listagem
+def limpar_selecao():
+    st.session_state['selecionados'] = set()
+    for chave in [k for k in st.session_state.keys() if str(k).startswith("sel_")]:
+        del st.session_state[chave]
+
+# Função para exibir as ações em lote sobre os cards selecionados ou filtrados
+def exibir_acoes_em_lote(usuario, total_filtrados, filtro):
+    selecionados = st.session_state.setdefault('selecionados', set())
+    with st.expander(f"🧰 Ações em lote ({len(selecionados)} selecionados)", expanded=False):
+        escopos = {
+            f"Cards selecionados ({len(selecionados)})": "selecionados",
+            f"Todos os cards do filtro ({total_filtrados})": "filtro",
+            f"Todo o concurso {filtro['concurso']}": "concurso",
+        }
+        escopo = escopos[st.radio("Aplicar a:", list(escopos.keys()), key="lote_escopo")]
+        acao = st.selectbox(
+            "Ação:",
+            ["Marcar como lidos", "Zerar leituras", "Alterar concurso/lei/referência", "Excluir"],
+            key="lote_acao"
+        )
+
+        campos = {}
+        if acao == "Alterar concurso/lei/referência":
+            st.caption("Deixe em branco os campos que não devem ser alterados.")
+            campos = {
+                "concurso": st.text_input("Novo concurso", key="lote_concurso"),
+                "lei": st.text_input("Nova lei", key="lote_lei"),
+                "referencia": st.text_input("Nova referência", key="lote_referencia"),
+            }
+        confirmar = True
+        if acao == "Excluir":
+            confirmar = st.checkbox("Confirmo a exclusão definitiva dos cards", key="lote_confirmar")
+
+        if st.button("▶️ Executar ação em lote", key="lote_executar"):
+            ids = None
+            filtro_lote = None
+            if escopo == "selecionados":
+                ids = list(selecionados)
+            elif escopo == "filtro":
+                filtro_lote = filtro
+            else:
+                filtro_lote = {"concurso": filtro["concurso"]}
+
+            if ids is not None and not ids:
+                st.error("❌ Nenhum card selecionado!")
+            elif not confirmar:
+                st.error("❌ Confirme a exclusão para continuar.")
+            elif acao == "Alterar concurso/lei/referência" and not any(campos.values()):
+                st.error("❌ Preencha ao menos um campo para alterar!")
+            else:
+                if acao == "Excluir":
+                    afetados = excluir_cards_em_lote(usuario, ids, filtro_lote)
+                elif acao == "Zerar leituras":
+                    afetados = zerar_leituras_em_lote(usuario, ids, filtro_lote)
+                elif acao == "Marcar como lidos":
+                    afetados = marcar_lidos_em_lote(usuario, ids, filtro_lote)
+                else:
+                    afetados = atualizar_cards_em_lote(usuario, campos, ids, filtro_lote)
+                limpar_selecao()
+                st.session_state['pagina'] = 1
+                st.session_state['mensagem_lote'] = f"✅ {afetados} cards afetados pela ação \"{acao}\"."
+                st.rerun()
+
+# Função para sanitizar o HTML de uma pergunta ou resposta antes de exibi-lo (mark destaca os trechos da busca)
+def sanitizar(html):
+    return bleach.clean(html, tags=['b', 'i', 'u', 'br', 'p', 'ul', 'ol', 'li', 'strong', 'em', 'mark'], strip=True)
+
+# Função para exibir o corpo de um card (resposta e referência)
+def exibir_corpo_card(item, fonte):
+    st.markdown(f"<div style='font-size: {fonte}px;'><b>Resposta (conteúdo):</b> {sanitizar(item.get('resposta', ''))}</div>", unsafe_allow_html=True)
+    st.caption(f"📖 Referência: {item.get('referencia', '')}  \n📘 Lei: {item.get('lei', '')}  \n🎯 Concurso: {item.get('concurso', '[Sem Concurso]')}")
+
+# Função para exibir o modo leitura: um card por vez, a partir de uma janela de cards pré-carregada na sessão.
+# É um fragmento: avançar ou voltar reexecuta só esta função, e só há consulta ao banco a cada JANELA_LEITOR cards
+# (os botões mudam a posição em callbacks, antes da nova execução).
+@st.fragment
+def exibir_leitor(usuario, filtro, fonte):
+    leitor = st.session_state.get('leitor')
+    if not leitor or leitor["filtro"] != filtro:
+        _, total = carregar_pagina(usuario, filtro, 0, 1, colunas="id")
+        leitor = st.session_state['leitor'] = {"filtro": dict(filtro), "posicao": 0, "cards": [], "total": total, "fim": False}
+
+    # Buscar a próxima janela quando faltam poucos cards para o fim da janela atual
+    if not leitor["fim"] and leitor["posicao"] >= len(leitor["cards"]) - ANTECEDENCIA_LEITOR:
+        ultimo = leitor["cards"][-1] if leitor["cards"] else None
+        janela = carregar_janela(usuario, filtro, ultimo, JANELA_LEITOR)
+        leitor["cards"].extend(janela)
+        leitor["fim"] = len(janela) < JANELA_LEITOR
+
+    if not leitor["cards"]:
+        st.info("ℹ️ Nenhum card encontrado com os filtros aplicados.")
+        return
+    posicao = min(leitor["posicao"], len(leitor["cards"]) - 1)
+    item = leitor["cards"][posicao]
+    total = max(leitor["total"], len(leitor["cards"]))
+
+    st.progress((posicao + 1) / total, text=f"Card {posicao + 1} de {total}")
+    st.markdown(f"<div style='font-size: {fonte}px;'><b>📌 {bleach.clean(item.get('pergunta', ''), tags=[], strip=True)}</b></div>", unsafe_allow_html=True)
+    exibir_corpo_card(item, fonte)
+
+    def ir_para(nova_posicao):
+        leitor["posicao"] = nova_posicao
+
+    def marcar_lido():
+        registrar_leituras(usuario, [item["id"]])
+        item["vezes_lido"] = item.get("vezes_lido", 0) + 1
+        if posicao < len(leitor["cards"]) - 1 or not leitor["fim"]:
+            leitor["posicao"] = posicao + 1
+
+    tem_proximo = posicao < len(leitor["cards"]) - 1 or not leitor["fim"]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.button("⬅️ Anterior", key="leitor_anterior", disabled=posicao == 0, on_click=ir_para, args=(posicao - 1,))
+    with col2:
+        st.button(f"✅ Lido ({item.get('vezes_lido', 0)}x) e próximo", key="leitor_lido", on_click=marcar_lido)
+    with col3:
+        st.button("Próximo ➡️", key="leitor_proximo", disabled=not tem_proximo, on_click=ir_para, args=(posicao + 1,))
 
 # Função para exibir os cards filtrados e paginados
-def exibir_cards(dados, total_cards, concurso_escolhido, lei_escolhida, fonte, usuario):
-    # Ajustar o tamanho da fonte do título do expander via CSS sem interferir na animação
+def exibir_cards(concurso_escolhido, lei_escolhida, fonte, usuario):
+    # Ajustar o tamanho da fonte do título do expander e dos títulos dos cards via CSS sem interferir na animação
     st.markdown(
         f"""
         <style>
-        div[data-testid="stExpander"] summary p {{
+        div[data-testid="stExpander"] summary p,
+        div[class*="st-key-abrir_"] button p {{
             font-size: {fonte}px !important;
         }}
+        div[class*="st-key-abrir_"] button {{
+            justify-content: flex-start;
+            text-align: left;
+        }}
         div[data-testid="stExpander"] {{
             transition: all 0.3s ease; /* Adicionar transição para animação */
         }}
@@ -148,79 +230,97 @@ def exibir_cards(dados, total_cards, concurso_escolhido, lei_escolhida, fonte, u
         ["Todos", "Nunca lidos", "1 ou mais", "5 ou mais", "10 ou mais"]
     )
 
-    busca = st.text_input("🔍 Buscar por palavra-chave, artigo, lei ou concurso:")
-
-    # FILTRAGEM DOS CARDS
-    perguntas_filtradas = []
-    for i, item in enumerate(dados):
-        vezes = item.get("vezes_lido", 0)
-        concurso = item.get("concurso", "")
-        lei = item.get("lei", "")
-        if (
-            concurso == concurso_escolhido and
-            lei == lei_escolhida and
-            (
-                not busca or
-                busca.lower() in item.get("pergunta", "").lower() or
-                busca.lower() in item.get("resposta", "").lower() or
-                busca.lower() in item.get("referencia", "").lower()
-            ) and (
-                filtro_leituras == "Todos" or
-                (filtro_leituras == "Nunca lidos" and vezes == 0) or
-                (filtro_leituras == "1 ou mais" and vezes >= 1) or
-                (filtro_leituras == "5 ou mais" and vezes >= 5) or
-                (filtro_leituras == "10 ou mais" and vezes >= 10)
-            )
-        ):
-            perguntas_filtradas.append((i, item))
+    if busca_no_servidor_disponivel():
+        busca = st.text_input(
+            "🔍 Buscar por palavra-chave, artigo, lei ou concurso:",
+            help='Busca por palavras, sem diferenciar acentos nem singular e plural. Use "aspas" para uma frase exata e -palavra para excluir. Os resultados vêm por relevância.'
+        )
+    else:
+        busca = st.text_input("🔍 Buscar por palavra-chave, artigo, lei ou concurso:")
 
-    # Contar o total de cards para a lei selecionada
-    total_cards_lei = contar_cards_por_lei(usuario, concurso_escolhido, lei_escolhida)
+    filtro = {
+        "concurso": concurso_escolhido,
+        "lei": lei_escolhida,
+        "filtro_leituras": filtro_leituras,
+        "busca": busca,
+    }
 
-    # Paginação
-    PER_PAGE = 5
-    total_paginas = max(1, (len(perguntas_filtradas) - 1) // PER_PAGE + 1)
+    # Ir direto a um artigo ou intervalo de artigos (os cards já aparecem na ordem da lei)
+    if ordem_da_lei_disponivel():
+        def voltar_a_primeira_pagina():
+            st.session_state['pagina'] = 1
 
-    # Initialize or adjust pagina in session state
-    if 'pagina' not in st.session_state or st.session_state['pagina'] > total_paginas:
+        artigos = st.text_input("⚖️ Ir para o artigo (ex.: 37 ou 37-41):", key="ir_para_artigo", on_change=voltar_a_primeira_pagina)
+        if artigos:
+            intervalo = intervalo_de_artigos(artigos)
+            if intervalo:
+                filtro["artigos"] = intervalo
+            else:
+                st.warning("⚠️ Digite o número do artigo (ex.: 37) ou um intervalo (ex.: 37-41).")
+
+    # MODO LEITURA: um card por vez, sem listagem
+    if st.toggle("📖 Modo leitura (um card por vez)", key="modo_leitura"):
+        exibir_leitor(usuario, filtro, fonte)
+        return
+
+    # Total de cards da lei selecionada, do índice de facetas
+    no_lei = carregar_facetas(usuario)["concursos"].get(concurso_escolhido, {}).get("leis", {}).get(lei_escolhida)
+    total_cards_lei = no_lei["cards"] if no_lei else 0
+
+    # Paginação: só os cards da página são carregados do banco
+    por_pagina = st.sidebar.selectbox("Cards por página", OPCOES_POR_PAGINA, key="por_pagina")
+    if 'pagina' not in st.session_state:
         st.session_state['pagina'] = 1
+    cards_pagina, total_filtrados = carregar_pagina(usuario, filtro, (st.session_state['pagina'] - 1) * por_pagina, por_pagina)
+    total_paginas = max(1, (total_filtrados - 1) // por_pagina + 1)
+
+    # Ajustar a página se ela passou do fim (por exemplo, depois de mudar o filtro)
+    if st.session_state['pagina'] > total_paginas:
+        st.session_state['pagina'] = 1
+        cards_pagina, total_filtrados = carregar_pagina(usuario, filtro, 0, por_pagina)
 
     pagina_atual = st.sidebar.number_input(
         "Página", min_value=1, max_value=total_paginas, value=st.session_state['pagina'], step=1
     )
-    st.session_state['pagina'] = pagina_atual
+    if pagina_atual != st.session_state['pagina']:
+        st.session_state['pagina'] = pagina_atual
+        st.rerun()
 
-    inicio = (pagina_atual - 1) * PER_PAGE
-    fim = min(inicio + PER_PAGE, len(perguntas_filtradas))
+    # AÇÕES EM LOTE
+    if 'mensagem_lote' in st.session_state:
+        st.success(st.session_state.pop('mensagem_lote'))
+    selecionados = st.session_state.setdefault('selecionados', set())
+    abertos = st.session_state.setdefault('cards_abertos', set())
 
-    # EXIBIÇÃO DOS CARDS
-    if perguntas_filtradas:
-        st.markdown(f"### 📑 Cards Cadastrados ({len(perguntas_filtradas)} de {total_cards_lei} cards)")
+    # EXIBIÇÃO DOS CARDS (o corpo só é montado para os cards abertos)
+    if cards_pagina:
+        st.markdown(f"### 📑 Cards Cadastrados ({total_filtrados} de {total_cards_lei} cards)")
 
-        for i, (index, item) in enumerate(perguntas_filtradas[inicio:fim]):
-            pergunta_sanitizada = bleach.clean(
-                item.get('pergunta', ''),
-                tags=['b', 'i', 'u', 'br', 'p', 'ul', 'ol', 'li', 'strong', 'em'],
-                strip=True
-            )
-            resposta_sanitizada = bleach.clean(
-                item.get('resposta', ''),
-                tags=['b', 'i', 'u', 'br', 'p', 'ul', 'ol', 'li', 'strong', 'em'],
-                strip=True
-            )
+        for i, item in enumerate(cards_pagina):
+            if st.checkbox("Selecionar", value=item.get("id") in selecionados, key=f"sel_{item.get('id', '')}"):
+                selecionados.add(item.get("id"))
+            else:
+                selecionados.discard(item.get("id"))
 
             pergunta_label = bleach.clean(item.get('pergunta', ''), tags=[], strip=True)
-
-            with st.expander(f"📌 Pergunta (assunto): {pergunta_label}", expanded=False):
-                st.markdown(f"<div style='font-size: {fonte}px;'><b>Resposta (conteúdo):</b> {resposta_sanitizada}</div>", unsafe_allow_html=True)
-                st.caption(f"📖 Referência: {item.get('referencia', '')}  \n📘 Lei: {item.get('lei', '')}  \n🎯 Concurso: {item.get('concurso', '[Sem Concurso]')}")
+            aberto = item.get("id") in abertos
+            if st.button(f"{'▾' if aberto else '▸'} 📌 Pergunta (assunto): {pergunta_label}", key=f"abrir_{item.get('id', '')}", use_container_width=True):
+                abertos.symmetric_difference_update({item.get("id")})
+                st.rerun()
+            # Trechos encontrados pela busca no servidor
+            if item.get("destaque_resposta") or item.get("destaque_pergunta"):
+                trecho = item.get("destaque_resposta") if "<mark>" in (item.get("destaque_resposta") or "") else item.get("destaque_pergunta")
+                st.markdown(f"<div style='font-size: {max(fonte - 2, 10)}px; opacity: 0.8;'>🔎 {sanitizar(trecho)}</div>", unsafe_allow_html=True)
+            if not aberto:
+                continue
+
+            with st.container(border=True):
+                exibir_corpo_card(item, fonte)
                 col1, col2, col3 = st.columns([1, 1, 1])
 
                 with col1:
                     if st.button(f"✅ Lido ({item.get('vezes_lido', 0)}x)", key=f"btn_lido_{i}_{item.get('id', '')}"):
-                        card_antigo = item.copy()
-                        item["vezes_lido"] = item.get("vezes_lido", 0) + 1
-                        atualizar_card(usuario, card_antigo, item)
+                        registrar_leituras(usuario, [item.get("id")])
                         st.session_state['pagina'] = pagina_atual
                         st.rerun()
 
@@ -230,16 +330,22 @@ def exibir_cards(dados, total_cards, concurso_escolhido, lei_escolhida, fonte, u
 
                 with col3:
                     if st.button("🗑️ Excluir", key=f"excluir_{i}_{item.get('id', '')}"):
-                        excluir_card(item.get("id", ""))
+                        excluir_card(item.get("id", ""), usuario)
                         st.session_state['pagina'] = pagina_atual
                         st.rerun()
 
         # Botões de navegação entre páginas
-        col_pag1, col_pag2 = st.columns(2)
+        col_pag1, col_pag_lida, col_pag2 = st.columns(3)
         with col_pag1:
             if pagina_atual > 1 and st.button("⬅️ Página Anterior"):
                 st.session_state['pagina'] = pagina_atual - 1
                 st.rerun()
+        with col_pag_lida:
+            if st.button("✅ Marcar página como lida"):
+                ids_pagina = [item.get("id") for item in cards_pagina]
+                marcar_lidos_em_lote(usuario, ids=ids_pagina)
+                st.session_state['pagina'] = pagina_atual
+                st.rerun()
         with col_pag2:
             if pagina_atual < total_paginas and st.button("➡️ Próxima Página"):
                 st.session_state['pagina'] = pagina_atual + 1
@@ -248,7 +354,7 @@ def exibir_cards(dados, total_cards, concurso_escolhido, lei_escolhida, fonte, u
     else:
         st.info("ℹ️ Nenhum card encontrado com os filtros aplicados.")
 
-    return perguntas_filtradas
+    exibir_acoes_em_lote(usuario, total_filtrados, filtro)
 
 # Inicializar estado de login e sessão
 if 'logged_in' not in st.session_state:
@@ -276,11 +382,9 @@ if not st.session_state['logged_in']:
 usuario = st.session_state['usuario']
 session_id = st.session_state['session_id']
 
-# Carregar o total de cards para paginação
-total_cards = contar_dados(usuario)
-
-# Carregar todas as leis para os seletores
-leis_disponiveis = carregar_leis(usuario)
+# Carregar o índice de facetas (concurso → lei, com contagens) para os seletores e totais
+facetas = carregar_facetas(usuario)
+leis_disponiveis = sorted(facetas["leis"])
 
 # Interface do Sidebar
 st.sidebar.markdown("---")
@@ -296,85 +400,134 @@ if st.sidebar.button("🚪 Sair"):
 
 st.markdown(f"<h1 style='font-size: {fonte + 20}px;'>📚 Leitura de Leis por Cards</h1>", unsafe_allow_html=True)
 st.markdown(f"**Usuário logado:** {usuario}")
+st.caption(f"📚 {resumo_faceta(facetas['total'])}")
 
 if 'leituras' not in st.session_state:
     st.session_state.leituras = {}
 
 # Restaurar backup
 st.sidebar.markdown("🛠️ **Restaurar Backup**")
-if os.path.exists("backup"):
-    arquivos_backup = sorted(
-        [f for f in os.listdir("backup") if f.startswith(f"{usuario}_{session_id}")],
-        reverse=True
-    )
-else:
-    arquivos_backup = []
+arquivos_backup = listar_backups(usuario, session_id)
 
 if arquivos_backup:
     escolha_backup = st.sidebar.selectbox("Selecione um backup para restaurar", arquivos_backup)
     if st.sidebar.button("♻️ Restaurar este backup"):
         caminho = os.path.join("backup", escolha_backup)
-        dados_importados = carregar_dados_json(caminho)
-        supabase.table("cards").delete().eq("usuario", usuario).execute()
-        for item in dados_importados:
-            if not card_existe(usuario, item["pergunta"], item["resposta"]):
-                salvar_card(usuario, item)
-        total_cards = contar_dados(usuario)  # Atualizar total_cards após restauração
-        leis_disponiveis = carregar_leis(usuario)  # Atualizar leis_disponiveis
-        st.session_state['pagina'] = 1
-        st.rerun()
+        checkpoint = Checkpoint.abrir(caminho_checkpoint(usuario, "restauracao", impressao_digital(caminho)))
+        try:
+            # Validar o backup inteiro antes, porque a restauração apaga os cards atuais
+            contar_cards(caminho)
+        except ArquivoInvalido as erro:
+            st.sidebar.error(f"❌ Backup inválido: {erro}")
+        else:
+            with open(caminho, "rb") as arquivo_backup:
+                restaurar_cards(
+                    usuario, ler_cards(arquivo_backup), trabalhadores=4, checkpoint=checkpoint,
+                    ao_progredir=barra_de_progresso(arquivo_backup, os.path.getsize(caminho), "♻️ Restaurando")
+                )
+            st.session_state['pagina'] = 1
+            st.rerun()
 else:
     st.sidebar.caption("Nenhum backup encontrado.")
 
-# Importar arquivo JSON
+# Importar arquivo JSON (array), JSON Lines ou um deles compactado com gzip; o arquivo é lido e gravado aos
+# poucos, sem carregar todos os cards na memória
 st.sidebar.markdown("📥 **Importar arquivo JSON personalizado**")
-arquivo_json = st.sidebar.file_uploader("Escolha um arquivo .json", type="json")
+arquivo_json = st.sidebar.file_uploader("Escolha um arquivo .json, .jsonl ou .gz", type=["json", "jsonl", "gz"])
 
 if arquivo_json:
-    if arquivo_json.size > 2 * 1024 * 1024:  # 2MB
-        st.sidebar.error("❌ Arquivo muito grande! Limite: 2MB")
-    elif st.sidebar.button("📂 Importar este arquivo"):
-        criar_backup(carregar_dados(usuario, 0, total_cards - 1), usuario, session_id)
-        dados_importados = carregar_dados_json(arquivo_json)
-        novos_cards = 0
-        duplicados = 0
-        for item in dados_importados:
-            if not card_existe(usuario, item["pergunta"], item["resposta"]):
-                salvar_card(usuario, item)
-                novos_cards += 1
-                # Atualizar estado após cada inserção
-                total_cards = contar_dados(usuario)
-                leis_disponiveis = carregar_leis(usuario)
-            else:
-                duplicados += 1
-        st.session_state['pagina'] = 1
-        if duplicados > 0:
-            st.sidebar.success(f"✅ {novos_cards} cards importados com sucesso! {duplicados} cards ignorados por já estarem cadastrados.")
+    checkpoint = checkpoint_do_envio(usuario, arquivo_json)
+    if checkpoint.retomado:
+        st.sidebar.info(f"⏯️ Importação interrompida encontrada ({checkpoint.dados['resultado'].get('lidos', 0)} cards já processados). Ela continuará de onde parou.")
+    ignorar_quase_iguais = st.sidebar.checkbox(
+        "Ignorar também cards quase iguais aos já cadastrados", value=False,
+        help="Os cards ignorados por serem parecidos são listados depois da importação para revisão."
+    )
+    if st.sidebar.button("📂 Importar este arquivo"):
+        if not checkpoint.retomado:
+            criar_backup(carregar_todos(usuario), usuario, session_id)
+        arquivo_json.seek(0)
+        # O checkpoint guardado na sessão valia para esta tentativa; a próxima o relê do disco
+        st.session_state.pop("checkpoint_envio", None)
+        quase_iguais = []
+        try:
+            resultado = importar_cards(
+                usuario, ler_cards(arquivo_json), trabalhadores=4, checkpoint=checkpoint,
+                indice=obter_indice(usuario) if ignorar_quase_iguais else None, quase_iguais=quase_iguais,
+                ao_progredir=barra_de_progresso(arquivo_json, arquivo_json.size, "📂 Importando")
+            )
+        except ArquivoInvalido as erro:
+            if ignorar_quase_iguais:
+                descartar_indice(usuario)
+            st.sidebar.error(f"❌ Arquivo inválido: {erro} Os cards anteriores a esse ponto já foram gravados; corrija o arquivo e importe-o de novo (os cards já cadastrados serão ignorados).")
+        except Exception:
+            # Qualquer outra falha (erro da API depois das novas tentativas, tempo esgotado, checkpoint) também
+            # deixaria no índice os cards provisórios, de ids negativos, do lote interrompido
+            if ignorar_quase_iguais:
+                descartar_indice(usuario)
+            raise
         else:
-            st.sidebar.success(f"✅ {novos_cards} cards importados com sucesso!")
-        st.rerun()
+            if ignorar_quase_iguais:
+                salvar_indice(usuario)
+            novos_cards = resultado["novos"]
+            duplicados = resultado["duplicados"]
+            st.session_state['pagina'] = 1
+            if duplicados > 0:
+                st.sidebar.success(f"✅ {novos_cards} cards importados com sucesso! {duplicados} cards ignorados por já estarem cadastrados.")
+            else:
+                st.sidebar.success(f"✅ {novos_cards} cards importados com sucesso!")
+            if quase_iguais:
+                st.session_state['quase_iguais_importacao'] = quase_iguais
+            st.rerun()
+
+# Cards da última importação ignorados por serem quase iguais a outros, para revisão
+quase_iguais = st.session_state.get('quase_iguais_importacao')
+if quase_iguais:
+    with st.sidebar.expander(f"🧬 {len(quase_iguais)} cards quase iguais não importados", expanded=True):
+        parecidos = {card["id"]: card for card in carregar_cards_por_ids(usuario, {card_id for _, card_id, _ in quase_iguais if card_id > 0}, "id, pergunta")}
+        for n, (card, card_id, semelhanca) in enumerate(quase_iguais):
+            original = parecidos.get(card_id)
+            st.markdown(f"**{n + 1}.** {bleach.clean(card.get('pergunta', ''), tags=[], strip=True)[:120]}")
+            st.caption(
+                f"{semelhanca:.0%} parecido com o card #{card_id}: {bleach.clean(original.get('pergunta', ''), tags=[], strip=True)[:120]}" if original
+                else f"{semelhanca:.0%} parecido com outro card do mesmo arquivo"
+            )
+            st.checkbox("Importar assim mesmo", key=f"quase_igual_{n}")
+        coluna_importar, coluna_descartar = st.columns(2)
+        if coluna_importar.button("📥 Importar marcados"):
+            marcados = [card for n, (card, _, _) in enumerate(quase_iguais) if st.session_state.get(f"quase_igual_{n}")]
+            salvar_cards_em_lote(usuario, marcados)
+            for n in range(len(quase_iguais)):
+                st.session_state.pop(f"quase_igual_{n}", None)
+            del st.session_state['quase_iguais_importacao']
+            st.rerun()
+        if coluna_descartar.button("🗑️ Descartar lista"):
+            for n in range(len(quase_iguais)):
+                st.session_state.pop(f"quase_igual_{n}", None)
+            del st.session_state['quase_iguais_importacao']
+            st.rerun()
 
 st.markdown("## 🎯 Selecione um concurso para começar")
 
-concursos_disponiveis = sorted(set(d["concurso"] for d in carregar_dados(usuario, 0, total_cards - 1) if d.get("concurso")))
-concurso_escolhido = st.selectbox("Concurso:", ["Selecionar"] + concursos_disponiveis)
+concursos_disponiveis = sorted(facetas["concursos"])
+concurso_escolhido = escolher_faceta(st, "Concurso:", ["Selecionar"] + concursos_disponiveis, facetas["concursos"], "faceta_concurso")
 
 if concurso_escolhido != "Selecionar":
-    leis_do_concurso = sorted(set(d["lei"] for d in carregar_dados(usuario, 0, total_cards - 1) if d.get("concurso") == concurso_escolhido and d.get("lei")))
-    lei_escolhida = st.selectbox("📘 Lei do concurso:", ["Selecionar"] + leis_do_concurso)
+    st.caption(resumo_faceta(facetas["concursos"][concurso_escolhido]))
+    leis_do_concurso = facetas["concursos"][concurso_escolhido]["leis"]
+    lei_escolhida = escolher_faceta(st, "📘 Lei do concurso:", ["Selecionar"] + sorted(leis_do_concurso), leis_do_concurso, "faceta_lei")
 
     if lei_escolhida != "Selecionar":
         st.markdown(f"### Cards da Lei **{lei_escolhida}** para o Concurso **{concurso_escolhido}**")
-        dados_completos = carregar_dados(usuario, 0, total_cards - 1)  # Carregar todos os dados
-        perguntas_filtradas = exibir_cards(dados_completos, total_cards, concurso_escolhido, lei_escolhida, fonte, usuario)
+        st.caption(resumo_faceta(leis_do_concurso[lei_escolhida]))
+        exibir_cards(concurso_escolhido, lei_escolhida, fonte, usuario)
 
         # ✏️ Editar Card
         if "editar_id" in st.session_state:
             card_id = st.session_state["editar_id"]
             st.markdown("---")
             st.subheader("✧️ Editar Card")
-            response = supabase.table("cards").select("*").eq("id", card_id).eq("usuario", usuario).execute()
-            item = response.data[0] if response.data else None
+            item = carregar_card(usuario, card_id)
 
             if item:
                 with st.form(f"form_editar_{card_id}"):
@@ -426,13 +579,52 @@ if concurso_escolhido != "Selecionar":
                             st.session_state['pagina'] = 1
                             st.rerun()
 
+# 🧬 Revisão de cards quase duplicados
+with st.expander("🧬 Possíveis cards duplicados", expanded=False):
+    limiar = st.slider("Semelhança mínima", 0.5, 1.0, LIMIAR_SEMELHANCA, 0.05)
+    if st.button("🔎 Procurar duplicatas"):
+        st.session_state['grupos_duplicatas'] = grupos_de_duplicatas(usuario, limiar)
+    grupos = st.session_state.get('grupos_duplicatas')
+    if grupos is not None and not grupos:
+        st.info("ℹ️ Nenhum grupo de cards parecidos encontrado.")
+    for n, grupo in enumerate(grupos or []):
+        st.markdown(f"**Grupo {n + 1}** ({len(grupo)} cards)")
+        opcoes = {
+            f"#{card['id']} — {bleach.clean(card.get('pergunta', ''), tags=[], strip=True)[:80]} ({card.get('lei', '')}, {card.get('vezes_lido', 0)}x)": card
+            for card in grupo
+        }
+        escolha = st.radio("Manter o card:", list(opcoes.keys()), key=f"manter_{n}_{grupo[0]['id']}")
+        if st.button("🔗 Mesclar grupo (soma as leituras e exclui os demais)", key=f"mesclar_{n}_{grupo[0]['id']}"):
+            mesclar_grupo(usuario, opcoes[escolha], grupo)
+            del st.session_state['grupos_duplicatas']
+            st.rerun()
+
+# 📈 Histórico de estudo (leituras por lei em cada dia ou semana)
+with st.expander("📈 Histórico de estudo", expanded=False):
+    periodo = st.radio("Agrupar por:", ["dia", "semana"], format_func=lambda p: "Dia (últimos 30)" if p == "dia" else "Semana (últimas 12)", horizontal=True, key="historico_periodo")
+    historico = carregar_historico(usuario, periodo, 30 if periodo == "dia" else 12)
+    if historico is None:
+        st.info("ℹ️ O histórico de estudo ainda não foi ativado no banco (aplique as migrações de sql/migracoes com python -m leitura.migracoes).")
+    elif not historico:
+        st.info("ℹ️ Nenhuma leitura registrada no período.")
+    else:
+        st.caption(f"{sum(linha['leituras'] for linha in historico)} leituras no período")
+        st.bar_chart(
+            {
+                "Início": [linha["inicio"] for linha in historico],
+                "Lei": [linha["lei"] or "[Sem Lei]" for linha in historico],
+                "Leituras": [linha["leituras"] for linha in historico],
+            },
+            x="Início", y="Leituras", color="Lei"
+        )
+
 # ESTATÍSTICAS
 st.sidebar.markdown("---")
 st.sidebar.markdown("📊 **Ranking de Leis Mais Lidas**")
 leis_selecionadas_ranking = st.sidebar.multiselect(
     "Selecione as leis para o ranking:", leis_disponiveis, default=leis_disponiveis[:5] if len(leis_disponiveis) > 5 else leis_disponiveis
 )
-mais_lidas, _ = carregar_estatisticas(usuario, leis_selecionadas_ranking)
+mais_lidas = sorted(((lei, facetas["leis"][lei]["leituras"]) for lei in leis_selecionadas_ranking), key=lambda par: -par[1])
 for lei, total in mais_lidas:
     st.sidebar.markdown(f"**{lei}** — {total} leituras")
 
@@ -445,10 +637,59 @@ _, mais_lido_por_lei = carregar_estatisticas(usuario, leis_selecionadas_mais_lid
 for lei, item in mais_lido_por_lei.items():
     st.sidebar.markdown(f"**{lei}** → *{item['pergunta'][:50]}...* ({item['vezes_lido']}x)")
 
+# 📦 Baralhos compartilhados: publicar cards e assinar baralhos de outros usuários
+st.sidebar.markdown("📦 **Baralhos compartilhados**")
+if 'mensagem_baralho' in st.session_state:
+    st.sidebar.success(st.session_state.pop('mensagem_baralho'))
+baralhos = listar_baralhos()
+if baralhos is None:
+    st.sidebar.caption("Os baralhos compartilhados ainda não foram ativados no banco (aplique as migrações de sql/migracoes com python -m leitura.migracoes).")
+else:
+    if baralhos:
+        assinados = baralhos_assinados(usuario)
+        opcoes_baralho = {
+            f"{baralho['nome']} — {baralho['autor']} ({baralho['quantidade']} cards)": baralho
+            for baralho in baralhos
+        }
+        baralho_escolhido = opcoes_baralho[st.sidebar.selectbox("Baralhos publicados", list(opcoes_baralho.keys()))]
+        if baralho_escolhido.get("descricao"):
+            st.sidebar.caption(baralho_escolhido["descricao"])
+        if baralho_escolhido["id"] in assinados:
+            st.sidebar.caption("✔️ Você assina este baralho. Ao cancelar, os cards que você editou continuam como seus; os demais saem da sua lista.")
+            if st.sidebar.button("➖ Cancelar assinatura"):
+                removidos = cancelar_assinatura(usuario, baralho_escolhido["id"])
+                st.session_state['pagina'] = 1
+                st.session_state['mensagem_baralho'] = f"✅ Assinatura cancelada ({removidos} cards removidos)."
+                st.rerun()
+        elif st.sidebar.button("➕ Assinar baralho"):
+            adicionados = assinar_baralho(usuario, baralho_escolhido["id"])
+            st.session_state['pagina'] = 1
+            st.session_state['mensagem_baralho'] = f"✅ Baralho assinado: {adicionados} cards adicionados (os que você já tinha foram ignorados)."
+            st.rerun()
+    else:
+        st.sidebar.caption("Nenhum baralho publicado ainda.")
+
+    with st.sidebar.form("form_publicar_baralho"):
+        nome_baralho = st.text_input("Nome do baralho")
+        descricao_baralho = st.text_input("Descrição")
+        concurso_baralho = st.selectbox("Cards do concurso", concursos_disponiveis)
+        lei_baralho = st.selectbox("Cards da lei", ["Todas"] + leis_disponiveis)
+        if st.form_submit_button("📤 Publicar baralho"):
+            if not nome_baralho or not concurso_baralho:
+                st.sidebar.error("❌ Informe o nome do baralho e o concurso!")
+            else:
+                filtro_baralho = {"concurso": concurso_baralho, "lei": lei_baralho if lei_baralho != "Todas" else None}
+                _, quantidade = publicar_baralho(usuario, nome_baralho, descricao_baralho, filtro_baralho)
+                st.session_state['mensagem_baralho'] = f"✅ Baralho \"{nome_baralho}\" publicado com {quantidade} cards."
+                st.rerun()
+
 # Exportar para Word (Seletivo)
 st.sidebar.markdown("📄 **Exportar para Word**")
-export_concurso = st.sidebar.selectbox("Exportar cards do concurso:", ["Todos"] + concursos_disponiveis)
-export_lei = st.sidebar.selectbox("Exportar cards da lei:", ["Todas"] + sorted(set(d["lei"] for d in carregar_dados(usuario, 0, total_cards - 1) if d.get("lei"))))
+export_concurso = escolher_faceta(st.sidebar, "Exportar cards do concurso:", ["Todos"] + concursos_disponiveis, facetas["concursos"], "faceta_export_concurso")
+no_exportacao = facetas["total"] if export_concurso == "Todos" else facetas["concursos"][export_concurso]
+leis_exportaveis = facetas["leis"] if export_concurso == "Todos" else no_exportacao["leis"]
+export_lei = escolher_faceta(st.sidebar, "Exportar cards da lei:", ["Todas"] + sorted(leis_exportaveis), leis_exportaveis, "faceta_export_lei")
+st.sidebar.caption(resumo_faceta(no_exportacao if export_lei == "Todas" else leis_exportaveis[export_lei]))
 
 if st.sidebar.button("⬇️ Baixar cards selecionados em Word"):
     from docx import Document
@@ -456,11 +697,12 @@ if st.sidebar.button("⬇️ Baixar cards selecionados em Word"):
     doc = Document()
     doc.add_heading("Cards de Estudo", 0)
 
-    cards_filtrados = carregar_dados(usuario, 0, total_cards - 1)
-    if export_concurso != "Todos":
-        cards_filtrados = [d for d in cards_filtrados if d.get("concurso") == export_concurso]
-    if export_lei != "Todas":
-        cards_filtrados = [d for d in cards_filtrados if d.get("lei") == export_lei]
+    # Todos os cards do filtro em lotes (uma única consulta por intervalo pararia no limite de linhas do PostgREST)
+    filtro_exportacao = {
+        "concurso": export_concurso if export_concurso != "Todos" else None,
+        "lei": export_lei if export_lei != "Todas" else None,
+    }
+    cards_filtrados = list(carregar_todos(usuario, filtro=filtro_exportacao))
 
     if not cards_filtrados:
         st.sidebar.error("❌ Nenhum card encontrado com os filtros selecionados!")
@@ -501,13 +743,22 @@ with st.sidebar.form("form_novo_card"):
     )
     nova_referencia = st.text_input("Referência")
     st.caption("Use o editor para formatar o texto com negrito, itálico, sublinhado, links e listas.")
+    ignorar_semelhantes = st.checkbox("Adicionar mesmo se houver cards parecidos")
     cadastrar = st.form_submit_button("📌 Adicionar Card")
 
     if cadastrar:
+        semelhantes = []
+        if nova_pergunta and nova_resposta and not ignorar_semelhantes:
+            semelhantes = obter_indice(usuario).semelhantes({"pergunta": nova_pergunta, "resposta": nova_resposta})
         if not novo_concurso or not nova_lei or not nova_pergunta or not nova_resposta:
             st.sidebar.error("❌ Todos os campos obrigatórios devem ser preenchidos!")
         elif card_existe(usuario, nova_pergunta, nova_resposta):
             st.sidebar.error("❌ Um card com esta pergunta e resposta já existe!")
+        elif semelhantes:
+            st.sidebar.warning(
+                f"⚠️ Há {len(semelhantes)} card(s) muito parecido(s) com este "
+                f"(semelhança de até {semelhantes[0][1]:.0%}). Marque \"Adicionar mesmo se houver cards parecidos\" para cadastrar assim mesmo."
+            )
         else:
             nova_pergunta_sanitizada = bleach.clean(
                 nova_pergunta,
@@ -530,8 +781,6 @@ with st.sidebar.form("form_novo_card"):
                 "vezes_lido": 0
             }
             salvar_card(usuario, novo_card)
-            total_cards = contar_dados(usuario)  # Atualizar total_cards após cadastro
-            leis_disponiveis = carregar_leis(usuario)  # Atualizar leis_disponiveis
             st.session_state['pagina'] = 1
             st.rerun()
 
@@ -0,0 +1,17 @@
+-- Tabela base dos cards, como criada no Supabase. As migrações seguintes a estendem (004_baralhos, 005_referencias,
+-- 006_busca), a consultam (002_facetas, 003_leituras) ou criam os índices das consultas do app (007_indices).
+-- Aplicadas em ordem por python -m leitura.migracoes; os testes as aplicam num Postgres local
+-- (LEITURA_POSTGRES=postgresql://... python -m pytest tests).
+
+create table if not exists cards (
+    id bigint generated by default as identity primary key,
+    usuario text not null,
+    concurso text not null,
+    lei text not null,
+    pergunta text not null,
+    resposta text not null,
+    referencia text not null default '',
+    vezes_lido integer not null default 0
+);
+
+grant select, insert, update, delete on cards to anon, authenticated;
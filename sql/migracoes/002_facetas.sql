@@ -0,0 +1,21 @@
+-- Índice de facetas concurso → lei: quantidade de cards, cards nunca lidos e total de leituras
+-- por (concurso, lei) de um usuário, numa única consulta agrupada.
+-- Usada por leitura.dados.carregar_facetas; sem ela, o app faz uma varredura das três colunas.
+create or replace function facetas_cards(p_usuario text)
+returns table (concurso text, lei text, cards bigint, nunca_lidos bigint, leituras bigint)
+language sql
+stable
+as $$
+    select
+        coalesce(c.concurso, '') as concurso,
+        coalesce(c.lei, '') as lei,
+        count(*) as cards,
+        count(*) filter (where coalesce(c.vezes_lido, 0) = 0) as nunca_lidos,
+        coalesce(sum(c.vezes_lido), 0) as leituras
+    from cards c
+    where c.usuario = p_usuario
+    group by 1, 2
+    order by 1, 2;
+$$;
+
+grant execute on function facetas_cards(text) to anon, authenticated;
@@ -0,0 +1,63 @@
+-- Histórico de estudo: cada leitura vira um evento (card, momento) numa tabela só de inserção,
+-- e os totais por lei de cada dia e de cada semana são mantidos de forma incremental em
+-- leituras_por_periodo. Os gráficos leem só os totais, então o custo não cresce com os eventos.
+
+create table if not exists leituras (
+    id bigint generated always as identity primary key,
+    usuario text not null,
+    card_id bigint not null,
+    lido_em timestamptz not null default now()
+);
+
+create index if not exists leituras_usuario_lido_em on leituras (usuario, lido_em);
+
+-- Os eventos só podem ser inseridos (pela função abaixo), nunca alterados ou apagados
+revoke update, delete, truncate on leituras from anon, authenticated;
+
+create table if not exists leituras_por_periodo (
+    usuario text not null,
+    periodo text not null check (periodo in ('dia', 'semana')),
+    inicio date not null,
+    lei text not null,
+    leituras integer not null default 0,
+    primary key (usuario, periodo, inicio, lei)
+);
+
+grant select on leituras_por_periodo to anon, authenticated;
+
+-- Registra a leitura dos cards p_ids do usuário: incrementa vezes_lido, grava um evento por card
+-- e soma as leituras aos totais do dia e da semana (segunda a domingo) no fuso p_fuso.
+-- Devolve a quantidade de cards lidos.
+create or replace function registrar_leituras(p_usuario text, p_ids bigint[], p_fuso text default 'America/Sao_Paulo')
+returns integer
+language plpgsql
+as $$
+declare
+    v_agora timestamptz := now();
+    v_dia date := (v_agora at time zone p_fuso)::date;
+    v_semana date := date_trunc('week', v_agora at time zone p_fuso)::date;
+    v_total integer;
+begin
+    with lidos as (
+        update cards
+        set vezes_lido = coalesce(vezes_lido, 0) + 1
+        where usuario = p_usuario and id = any(p_ids)
+        returning id, coalesce(lei, '') as lei
+    ), eventos as (
+        insert into leituras (usuario, card_id, lido_em)
+        select p_usuario, id, v_agora from lidos
+    ), totais as (
+        insert into leituras_por_periodo (usuario, periodo, inicio, lei, leituras)
+        select p_usuario, p.periodo, p.inicio, l.lei, count(*)
+        from lidos l
+        cross join (values ('dia', v_dia), ('semana', v_semana)) as p (periodo, inicio)
+        group by p.periodo, p.inicio, l.lei
+        on conflict (usuario, periodo, inicio, lei)
+        do update set leituras = leituras_por_periodo.leituras + excluded.leituras
+    )
+    select count(*) into v_total from lidos;
+    return v_total;
+end;
+$$;
+
+grant execute on function registrar_leituras(text, bigint[], text) to anon, authenticated;
@@ -0,0 +1,61 @@
+-- Baralhos compartilhados com cópia na escrita.
+-- O texto de um baralho publicado fica uma única vez em baralho_cards. Quem assina o baralho recebe em
+-- cards só uma camada leve por card (concurso, lei, referência, vezes_lido e baralho_card_id), sem pergunta
+-- e resposta. Ao editar a pergunta ou a resposta, o texto é copiado para a camada do usuário.
+-- O app lê os cards pela visão cards_visiveis, que junta a camada e o card base.
+
+create table if not exists baralhos (
+    id bigint generated always as identity primary key,
+    nome text not null,
+    descricao text not null default '',
+    autor text not null,
+    quantidade integer not null default 0,
+    publicado_em timestamptz not null default now()
+);
+
+create table if not exists baralho_cards (
+    id bigint generated always as identity primary key,
+    baralho_id bigint not null references baralhos (id) on delete cascade,
+    concurso text not null,
+    lei text not null,
+    pergunta text not null,
+    resposta text not null,
+    referencia text not null default ''
+);
+
+create index if not exists baralho_cards_baralho_id on baralho_cards (baralho_id, id);
+
+create table if not exists assinaturas (
+    usuario text not null,
+    baralho_id bigint not null references baralhos (id) on delete cascade,
+    assinado_em timestamptz not null default now(),
+    primary key (usuario, baralho_id)
+);
+
+-- Camadas: pergunta e resposta passam a ser opcionais (vazias enquanto o card não for editado)
+alter table cards add column if not exists baralho_card_id bigint references baralho_cards (id);
+alter table cards alter column pergunta drop not null;
+alter table cards alter column resposta drop not null;
+
+create unique index if not exists cards_usuario_baralho_card on cards (usuario, baralho_card_id)
+    where baralho_card_id is not null;
+
+create or replace view cards_visiveis
+with (security_invoker = true)
+as
+select
+    c.id,
+    c.usuario,
+    c.concurso,
+    c.lei,
+    coalesce(c.pergunta, b.pergunta) as pergunta,
+    coalesce(c.resposta, b.resposta) as resposta,
+    coalesce(c.referencia, b.referencia) as referencia,
+    c.vezes_lido,
+    c.baralho_card_id
+from cards c
+left join baralho_cards b on b.id = c.baralho_card_id;
+
+grant select, insert, update on baralhos, baralho_cards to anon, authenticated;
+grant select, insert, update, delete on assinaturas to anon, authenticated;
+grant select on cards_visiveis to anon, authenticated;
@@ -0,0 +1,35 @@
+-- Ordem da lei: chaves de ordenação interpretadas da referência de cada card (leitura/referencias.py).
+--   artigo    número do artigo ("Art. 1.228" → 1228), para ir direto a um artigo ou intervalo de artigos
+--   ordem_ref artigo, sufixo (37-A), parágrafo, inciso e alínea em texto de largura fixa
+--             ("Art. 40, § 1º, III, a" → 00040.00.001.003.01); nula quando a referência não tem artigo
+-- O app preenche as duas colunas ao gravar cards. Para os cards que já existiam, rode depois desta migração:
+--   python -m leitura referencias --usuario joao123
+-- Depende de 004_baralhos.sql (a visão cards_visiveis é recriada com as novas colunas).
+
+alter table cards add column if not exists artigo integer;
+alter table cards add column if not exists ordem_ref text;
+
+-- Listagem na ordem da lei dentro de um concurso e lei (e o desempate por id da paginação por chave)
+create index if not exists cards_ordem_ref on cards (usuario, concurso, lei, ordem_ref, id);
+-- Ir para um artigo ou intervalo de artigos
+create index if not exists cards_artigo on cards (usuario, lei, artigo);
+
+create or replace view cards_visiveis
+with (security_invoker = true)
+as
+select
+    c.id,
+    c.usuario,
+    c.concurso,
+    c.lei,
+    coalesce(c.pergunta, b.pergunta) as pergunta,
+    coalesce(c.resposta, b.resposta) as resposta,
+    coalesce(c.referencia, b.referencia) as referencia,
+    c.vezes_lido,
+    c.baralho_card_id,
+    c.artigo,
+    c.ordem_ref
+from cards c
+left join baralho_cards b on b.id = c.baralho_card_id;
+
+grant select on cards_visiveis to anon, authenticated;
@@ -0,0 +1,131 @@
+-- Busca textual no servidor: busca em português, sem diferenciar acentos, sobre pergunta, resposta e referência,
+-- com índice GIN. A função buscar_cards devolve uma página de resultados por relevância, com os trechos
+-- encontrados destacados, sem que o app precise baixar os cards. A listagem do app a usa quando existe;
+-- os demais filtros por texto (modo leitura, ações em lote, exportação) usam a coluna documento da visão.
+-- Depende de 004_baralhos.sql e 005_referencias.sql (a visão cards_visiveis é recriada).
+
+create extension if not exists unaccent;
+create extension if not exists btree_gin;
+
+-- Configuração "português sem acentos": tira os acentos e depois reduz as palavras ao radical
+-- (licença, licenca e licenças viram a mesma palavra). O dicionário unaccent fica no esquema da extensão
+-- (public num Postgres local, extensions no Supabase).
+do $$
+declare
+    esquema text;
+begin
+    if not exists (select 1 from pg_ts_config where cfgname = 'pt_unaccent' and pg_ts_config_is_visible(oid)) then
+        select n.nspname into esquema from pg_ts_dict d join pg_namespace n on n.oid = d.dictnamespace where d.dictname = 'unaccent';
+        create text search configuration pt_unaccent (copy = portuguese);
+        execute format('alter text search configuration pt_unaccent alter mapping for hword, hword_part, word with %I.unaccent, portuguese_stem', esquema);
+    end if;
+end
+$$;
+
+-- Documento de busca de cada card: pergunta (peso A), referência (B) e resposta (C).
+-- As tags HTML da pergunta e da resposta são ignoradas pelo analisador do Postgres.
+alter table cards add column if not exists documento tsvector generated always as (
+    setweight(to_tsvector('pt_unaccent', coalesce(pergunta, '')), 'A') ||
+    setweight(to_tsvector('pt_unaccent', coalesce(referencia, '')), 'B') ||
+    setweight(to_tsvector('pt_unaccent', coalesce(resposta, '')), 'C')
+) stored;
+
+alter table baralho_cards add column if not exists documento tsvector generated always as (
+    setweight(to_tsvector('pt_unaccent', pergunta), 'A') ||
+    setweight(to_tsvector('pt_unaccent', referencia), 'B') ||
+    setweight(to_tsvector('pt_unaccent', resposta), 'C')
+) stored;
+
+-- (usuario, documento) num único índice GIN (btree_gin), para buscar só nos cards do usuário
+create index if not exists cards_documento on cards using gin (usuario, documento);
+create index if not exists baralho_cards_documento on baralho_cards using gin (documento);
+
+create or replace view cards_visiveis
+with (security_invoker = true)
+as
+select
+    c.id,
+    c.usuario,
+    c.concurso,
+    c.lei,
+    coalesce(c.pergunta, b.pergunta) as pergunta,
+    coalesce(c.resposta, b.resposta) as resposta,
+    coalesce(c.referencia, b.referencia) as referencia,
+    c.vezes_lido,
+    c.baralho_card_id,
+    c.artigo,
+    c.ordem_ref,
+    case when c.pergunta is null then b.documento else c.documento end as documento
+from cards c
+left join baralho_cards b on b.id = c.baralho_card_id;
+
+grant select on cards_visiveis to anon, authenticated;
+
+-- Busca os cards do usuário que atendem a p_busca (sintaxe de busca na web: palavras, "frase exata",
+-- or, -palavra excluída) e aos mesmos filtros da listagem. Os resultados vêm por relevância e, no empate,
+-- na ordem da lei; total é a quantidade de resultados de todas as páginas. Com p_destacar, os trechos
+-- encontrados vêm entre <mark> e </mark> em destaque_pergunta e destaque_resposta (só para a página pedida).
+-- As camadas de baralhos assinados sem texto próprio são buscadas pelo documento do card base.
+create or replace function buscar_cards(
+    p_usuario text,
+    p_busca text,
+    p_concurso text default null,
+    p_lei text default null,
+    p_leituras_min integer default null,
+    p_leituras_max integer default null,
+    p_artigo_inicio integer default null,
+    p_artigo_fim integer default null,
+    p_limite integer default 20,
+    p_deslocamento integer default 0,
+    p_destacar boolean default true
+)
+returns table (
+    id bigint, concurso text, lei text, pergunta text, resposta text, referencia text, vezes_lido integer,
+    artigo integer, ordem_ref text, relevancia real, destaque_pergunta text, destaque_resposta text, total bigint
+)
+language sql
+stable
+as $$
+    with consulta as (
+        select websearch_to_tsquery('pt_unaccent', p_busca) as q
+    ),
+    encontrados as (
+        select c.id, c.documento
+        from cards c, consulta
+        where c.usuario = p_usuario and c.documento @@ consulta.q and (c.pergunta is not null or c.baralho_card_id is null)
+        union all
+        select c.id, b.documento
+        from baralho_cards b
+        join cards c on c.baralho_card_id = b.id
+        cross join consulta
+        where b.documento @@ consulta.q and c.usuario = p_usuario and c.pergunta is null
+    ),
+    pagina as (
+        select v.id, v.concurso, v.lei, v.pergunta, v.resposta, v.referencia, v.vezes_lido, v.artigo, v.ordem_ref,
+            ts_rank_cd(e.documento, consulta.q, 32) as relevancia,
+            count(*) over () as total
+        from encontrados e
+        join cards_visiveis v on v.id = e.id
+        cross join consulta
+        where (p_concurso is null or v.concurso = p_concurso)
+            and (p_lei is null or v.lei = p_lei)
+            and (p_leituras_min is null or v.vezes_lido >= p_leituras_min)
+            and (p_leituras_max is null or v.vezes_lido <= p_leituras_max)
+            and (p_artigo_inicio is null or v.artigo >= p_artigo_inicio)
+            and (p_artigo_fim is null or v.artigo <= p_artigo_fim)
+        order by relevancia desc, v.ordem_ref nulls last, v.id
+        limit p_limite offset p_deslocamento
+    )
+    select
+        p.id, p.concurso, p.lei, p.pergunta, p.resposta, p.referencia, p.vezes_lido, p.artigo, p.ordem_ref, p.relevancia,
+        case when p_destacar then ts_headline('pt_unaccent', regexp_replace(p.pergunta, '<[^>]*>', ' ', 'g'), consulta.q,
+            'StartSel=<mark>, StopSel=</mark>, HighlightAll=true') end,
+        case when p_destacar then ts_headline('pt_unaccent', regexp_replace(p.resposta, '<[^>]*>', ' ', 'g'), consulta.q,
+            'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=" … "') end,
+        p.total
+    from pagina p
+    cross join consulta
+    order by p.relevancia desc, p.ordem_ref nulls last, p.id;
+$$;
+
+grant execute on function buscar_cards(text, text, text, text, integer, integer, integer, integer, integer, integer, boolean) to anon, authenticated;
@@ -0,0 +1,13 @@
+-- Índices das consultas do app (leitura/dados.py). Todas filtram pelo usuário e por combinações de concurso,
+-- lei, vezes_lido e id; sem índices que comecem pelo usuário, cada contagem ou filtro lê a tabela inteira.
+-- Os índices de 004 a 006 cobrem a ordem da lei, os artigos, a busca textual e as camadas dos baralhos.
+-- Os planos das consultas são conferidos num Postgres local com:
+-- LEITURA_POSTGRES=postgresql://... python -m pytest tests/test_planos.py
+
+-- Contagem de uma lei, facetas concurso → lei e "Nunca lidos" dentro de uma lei: vezes_lido no índice
+-- permite responder às contagens e somas só pelo índice
+create index if not exists cards_usuario_concurso_lei on cards (usuario, concurso, lei, vezes_lido);
+-- Filtros "Nunca lidos" e de leituras mínimas em todas as leis do usuário
+create index if not exists cards_usuario_vezes_lido on cards (usuario, vezes_lido);
+-- Todos os cards do usuário em ordem de id (exportação, backup, duplicatas, lotes por ids) e a contagem total
+create index if not exists cards_usuario_id on cards (usuario, id);
@@ -0,0 +1,42 @@
+-- Visão cards_visiveis sem junção externa: com o left join em baralho_cards, o planejador junta as tabelas por
+-- hash e lê baralho_cards inteira nas consultas que percorrem todos os cards do usuário (lotes em ordem de id,
+-- card_existe). A visão passa a ser a união dos cards próprios (sem card base, sem junção) com as camadas dos
+-- baralhos assinados, que chegam ao card base pelo índice cards_usuario_baralho_card e pela chave primária.
+-- As colunas são as mesmas de 006_busca.sql. Os planos são conferidos por tests/test_planos.py.
+
+create or replace view cards_visiveis
+with (security_invoker = true)
+as
+select
+    c.id,
+    c.usuario,
+    c.concurso,
+    c.lei,
+    c.pergunta,
+    c.resposta,
+    c.referencia,
+    c.vezes_lido,
+    c.baralho_card_id,
+    c.artigo,
+    c.ordem_ref,
+    c.documento
+from cards c
+where c.baralho_card_id is null
+union all
+select
+    c.id,
+    c.usuario,
+    c.concurso,
+    c.lei,
+    coalesce(c.pergunta, b.pergunta) as pergunta,
+    coalesce(c.resposta, b.resposta) as resposta,
+    coalesce(c.referencia, b.referencia) as referencia,
+    c.vezes_lido,
+    c.baralho_card_id,
+    c.artigo,
+    c.ordem_ref,
+    case when c.pergunta is null then b.documento else c.documento end as documento
+from cards c
+join baralho_cards b on b.id = c.baralho_card_id;
+
+grant select on cards_visiveis to anon, authenticated;
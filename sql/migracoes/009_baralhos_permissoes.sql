@@ -0,0 +1,95 @@
+-- Permissões e integridade dos baralhos compartilhados (corrige 004_baralhos.sql, que não pode ser editado
+-- depois de aplicado).
+-- * Os papéis anon e authenticated só leem baralhos e baralho_cards; antes podiam inserir e reescrever o texto
+--   compartilhado de qualquer baralho. A publicação passa pela função publicar_baralho, que copia os cards do
+--   usuário informado em p_usuario. Não há verificação de quem chama: como no resto do app, que não tem login
+--   no Supabase (o nome de usuário é só digitado e todas as consultas usam a chave anon), qualquer cliente com
+--   a chave anon pode publicar os cards de qualquer usuário. A função só garante que o baralho seja criado
+--   numa única transação e que o texto compartilhado não seja reescrito depois.
+-- * Excluir um card base (ou um baralho inteiro) não é mais barrado pelas camadas dos assinantes: antes da
+--   exclusão, o texto do card base é copiado para as camadas que ainda não têm texto próprio, e a chave
+--   estrangeira passa a ser anulada (on delete set null). A camada vira um card comum do assinante.
+
+revoke insert, update on baralhos, baralho_cards from anon, authenticated;
+grant select on baralhos, baralho_cards to anon, authenticated;
+
+-- Camadas por card base: usado pela cópia do texto e pela anulação da chave estrangeira ao excluir um card base
+create index if not exists cards_baralho_card_id on cards (baralho_card_id) where baralho_card_id is not null;
+
+do $$
+declare
+    restricao text;
+begin
+    for restricao in
+        select conname from pg_constraint
+        where conrelid = 'cards'::regclass and confrelid = 'baralho_cards'::regclass and contype = 'f'
+    loop
+        execute format('alter table cards drop constraint %I', restricao);
+    end loop;
+end
+$$;
+
+alter table cards add constraint cards_baralho_card_id_fkey
+    foreign key (baralho_card_id) references baralho_cards (id) on delete set null;
+
+-- Cópia na escrita também na exclusão: a camada recebe o texto que ainda lia do card base
+create or replace function copiar_texto_para_camadas()
+returns trigger
+language plpgsql
+as $$
+begin
+    update cards
+    set pergunta = coalesce(pergunta, old.pergunta),
+        resposta = coalesce(resposta, old.resposta),
+        referencia = coalesce(referencia, old.referencia)
+    where baralho_card_id = old.id and (pergunta is null or resposta is null or referencia is null);
+    return old;
+end
+$$;
+
+drop trigger if exists baralho_cards_copiar_texto on baralho_cards;
+create trigger baralho_cards_copiar_texto
+    before delete on baralho_cards
+    for each row execute function copiar_texto_para_camadas();
+
+-- Publica um baralho com os cards de p_usuario (todos, de um concurso e/ou de uma lei), numa única transação:
+-- cria o baralho com p_usuario como autor, copia o texto visível dos cards para baralho_cards (em ordem de id)
+-- e grava a quantidade. Devolve o id do baralho e a quantidade de cards. p_usuario não é conferido com quem
+-- chama (ver o cabeçalho).
+create or replace function publicar_baralho(
+    p_usuario text,
+    p_nome text,
+    p_descricao text default '',
+    p_concurso text default null,
+    p_lei text default null
+)
+returns table (baralho_id bigint, quantidade integer)
+language plpgsql
+security definer
+set search_path from current
+as $$
+declare
+    v_baralho_id bigint;
+    v_quantidade integer;
+begin
+    if coalesce(p_usuario, '') = '' or coalesce(p_nome, '') = '' then
+        raise exception 'publicar_baralho: usuário e nome do baralho são obrigatórios';
+    end if;
+    insert into baralhos (nome, descricao, autor)
+    values (p_nome, coalesce(p_descricao, ''), p_usuario)
+    returning id into v_baralho_id;
+    insert into baralho_cards (baralho_id, concurso, lei, pergunta, resposta, referencia)
+    select v_baralho_id, coalesce(c.concurso, ''), coalesce(c.lei, ''), coalesce(c.pergunta, ''), coalesce(c.resposta, ''), coalesce(c.referencia, '')
+    from cards_visiveis c
+    where c.usuario = p_usuario
+        and (p_concurso is null or c.concurso = p_concurso)
+        and (p_lei is null or c.lei = p_lei)
+    order by c.id;
+    get diagnostics v_quantidade = row_count;
+    update baralhos b set quantidade = v_quantidade where b.id = v_baralho_id;
+    return query select v_baralho_id, v_quantidade;
+end
+$$;
+
+revoke execute on function publicar_baralho(text, text, text, text, text) from public;
+grant execute on function publicar_baralho(text, text, text, text, text) to anon, authenticated;
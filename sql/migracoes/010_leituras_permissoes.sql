@@ -0,0 +1,17 @@
+-- Permissões do histórico de estudo (corrige 003_leituras.sql, que não pode ser editado depois de aplicado).
+-- registrar_leituras rodava com os direitos de quem a chamava, mas anon e authenticated não tinham permissão
+-- para inserir em leituras nem para inserir e atualizar leituras_por_periodo; no Supabase só funcionava pelos
+-- privilégios padrão do esquema public. A função passa a rodar com os direitos do dono (security definer), com
+-- o search_path fixo, e as duas tabelas só podem ser escritas por ela.
+-- Como publicar_baralho (009_baralhos_permissoes.sql), a função não confere p_usuario com quem chama: o app
+-- não tem login no Supabase, e qualquer cliente com a chave anon pode registrar leituras (vezes_lido e
+-- histórico) dos cards de qualquer usuário. Ela só restringe a escrita aos cards do próprio p_usuario.
+
+alter function registrar_leituras(text, bigint[], text) security definer;
+alter function registrar_leituras(text, bigint[], text) set search_path from current;
+
+revoke execute on function registrar_leituras(text, bigint[], text) from public;
+grant execute on function registrar_leituras(text, bigint[], text) to anon, authenticated;
+
+revoke insert, update, delete, truncate on leituras, leituras_por_periodo from anon, authenticated;
+grant select on leituras_por_periodo to anon, authenticated;
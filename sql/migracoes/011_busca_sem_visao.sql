@@ -0,0 +1,70 @@
+-- buscar_cards sem a junção com a visão cards_visiveis: desde 008_visao_cards.sql a visão é uma união, e a
+-- junção dos cards encontrados com ela pelo id lia a tabela cards inteira (de todos os usuários) numa junção
+-- por hash. Os cards encontrados já trazem as colunas visíveis: o texto próprio (e, nas camadas editadas, a
+-- resposta e a referência do card base que faltarem) ou, nas camadas sem texto próprio, o texto do card base.
+-- Mesmos parâmetros, resultados e ordem de 006_busca.sql. O plano é conferido por tests/test_planos.py.
+
+create or replace function buscar_cards(
+    p_usuario text,
+    p_busca text,
+    p_concurso text default null,
+    p_lei text default null,
+    p_leituras_min integer default null,
+    p_leituras_max integer default null,
+    p_artigo_inicio integer default null,
+    p_artigo_fim integer default null,
+    p_limite integer default 20,
+    p_deslocamento integer default 0,
+    p_destacar boolean default true
+)
+returns table (
+    id bigint, concurso text, lei text, pergunta text, resposta text, referencia text, vezes_lido integer,
+    artigo integer, ordem_ref text, relevancia real, destaque_pergunta text, destaque_resposta text, total bigint
+)
+language sql
+stable
+as $$
+    with consulta as (
+        select websearch_to_tsquery('pt_unaccent', p_busca) as q
+    ),
+    encontrados as (
+        select c.id, c.concurso, c.lei, c.pergunta, coalesce(c.resposta, b.resposta) as resposta,
+            coalesce(c.referencia, b.referencia) as referencia, c.vezes_lido, c.artigo, c.ordem_ref, c.documento
+        from cards c
+        cross join consulta
+        left join baralho_cards b on b.id = c.baralho_card_id
+        where c.usuario = p_usuario and c.documento @@ consulta.q and (c.pergunta is not null or c.baralho_card_id is null)
+        union all
+        select c.id, c.concurso, c.lei, b.pergunta, coalesce(c.resposta, b.resposta), coalesce(c.referencia, b.referencia),
+            c.vezes_lido, c.artigo, c.ordem_ref, b.documento
+        from baralho_cards b
+        join cards c on c.baralho_card_id = b.id
+        cross join consulta
+        where b.documento @@ consulta.q and c.usuario = p_usuario and c.pergunta is null
+    ),
+    pagina as (
+        select e.id, e.concurso, e.lei, e.pergunta, e.resposta, e.referencia, e.vezes_lido, e.artigo, e.ordem_ref,
+            ts_rank_cd(e.documento, consulta.q, 32) as relevancia,
+            count(*) over () as total
+        from encontrados e
+        cross join consulta
+        where (p_concurso is null or e.concurso = p_concurso)
+            and (p_lei is null or e.lei = p_lei)
+            and (p_leituras_min is null or e.vezes_lido >= p_leituras_min)
+            and (p_leituras_max is null or e.vezes_lido <= p_leituras_max)
+            and (p_artigo_inicio is null or e.artigo >= p_artigo_inicio)
+            and (p_artigo_fim is null or e.artigo <= p_artigo_fim)
+        order by relevancia desc, e.ordem_ref nulls last, e.id
+        limit p_limite offset p_deslocamento
+    )
+    select
+        p.id, p.concurso, p.lei, p.pergunta, p.resposta, p.referencia, p.vezes_lido, p.artigo, p.ordem_ref, p.relevancia,
+        case when p_destacar then ts_headline('pt_unaccent', regexp_replace(p.pergunta, '<[^>]*>', ' ', 'g'), consulta.q,
+            'StartSel=<mark>, StopSel=</mark>, HighlightAll=true') end,
+        case when p_destacar then ts_headline('pt_unaccent', regexp_replace(p.resposta, '<[^>]*>', ' ', 'g'), consulta.q,
+            'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=" … "') end,
+        p.total
+    from pagina p
+    cross join consulta
+    order by p.relevancia desc, p.ordem_ref nulls last, p.id;
+$$;
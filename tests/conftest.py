@@ -0,0 +1,56 @@
+# Fixtures dos testes do SQL do app (sql/migracoes) num Postgres local, sem Supabase nem PostgREST. Cada módulo
+# de teste recebe um esquema temporário com as migrações aplicadas, apagado no fim.
+#
+#   LEITURA_POSTGRES=postgresql://postgres@localhost:5432/postgres python -m pytest tests
+#
+# Precisa do pacote psycopg (pip install "psycopg[binary]") ou psycopg2 e de um Postgres 15+ com as extensões
+# unaccent e btree_gin (incluídas no pacote contrib). Usa um usuário com permissão para criar extensões e
+# papéis: os papéis anon e authenticated do Supabase são criados se não existirem. Sem a variável
+# LEITURA_POSTGRES, os testes que usam o banco são pulados; os demais não precisam dele.
+import os
+import uuid
+
+import pytest
+
+from leitura.migracoes import VARIAVEL_DSN, aplicar_migracoes, conectar, executar
+
+# Função para criar um esquema temporário, com os papéis do Supabase, e apontar a conexão para ele
+def criar_esquema(conexao):
+    esquema = f"leitura_teste_{uuid.uuid4().hex[:8]}"
+    for papel in ("anon", "authenticated"):
+        if not executar(conexao, "select 1 from pg_roles where rolname = %s", (papel,)):
+            executar(conexao, f"create role {papel} nologin")
+    executar(conexao, f"create schema {esquema}")
+    executar(conexao, f"set search_path to {esquema}, public")
+    return esquema
+
+# Conexão com um esquema temporário em que todas as migrações foram aplicadas (uma por módulo de teste)
+@pytest.fixture(scope="module")
+def conexao():
+    dsn = os.getenv(VARIAVEL_DSN)
+    if not dsn:
+        pytest.skip(f"defina a variável {VARIAVEL_DSN} com o endereço de um Postgres local")
+    try:
+        conexao = conectar(dsn)
+    except RuntimeError as erro:
+        pytest.skip(str(erro))
+    esquema = criar_esquema(conexao)
+    try:
+        aplicar_migracoes(conexao)
+        yield conexao
+    finally:
+        executar(conexao, f"drop schema {esquema} cascade")
+        conexao.close()
+
+# Função para executar comandos com o papel anon (o da chave pública do Supabase), com acesso ao esquema de teste
+@pytest.fixture(scope="module")
+def como_anon(conexao):
+    executar(conexao, f"grant usage on schema {executar(conexao, 'select current_schema()')[0][0]} to anon")
+
+    def executar_como_anon(comando, parametros=None):
+        executar(conexao, "set role anon")
+        try:
+            return executar(conexao, comando, parametros)
+        finally:
+            executar(conexao, "reset role")
+    return executar_como_anon
@@ -0,0 +1,66 @@
+# Leitura de arquivos de cards (leitura/arquivos.py), sem banco de dados.
+import gzip
+import io
+import json
+
+import pytest
+
+from leitura.arquivos import ArquivoInvalido, contar_cards, escrever_json, escrever_jsonl, impressao_digital, ler_cards
+
+# Função para montar um card válido com a pergunta dada
+def card(pergunta):
+    return {"concurso": "C", "lei": "Lei 1", "pergunta": pergunta, "resposta": "R"}
+
+# Função para ler as perguntas dos cards de um conteúdo em texto (opcionalmente compactado)
+def perguntas(conteudo, compactar=False, tamanho_bloco=16):
+    bruto = conteudo.encode("utf-8")
+    return [c["pergunta"] for c in ler_cards(io.BytesIO(gzip.compress(bruto) if compactar else bruto), tamanho_bloco)]
+
+# Cards com textos maiores que o bloco de leitura dos testes, para cada card atravessar vários blocos
+CARDS = [card(f"Pergunta {i} " + "longa " * 10) for i in range(5)]
+PERGUNTAS = [c["pergunta"] for c in CARDS]
+
+@pytest.mark.parametrize("compactar", [False, True])
+def test_array_minificado_formatado_e_jsonl_em_blocos(compactar):
+    assert perguntas(json.dumps(CARDS, ensure_ascii=False), compactar) == PERGUNTAS
+    assert perguntas(json.dumps(CARDS, ensure_ascii=False, indent=2), compactar) == PERGUNTAS
+    assert perguntas("\ufeff\n\n" + "".join(json.dumps(c) + "\n\n" for c in CARDS), compactar) == PERGUNTAS
+    assert perguntas("[]", compactar) == []
+
+def test_jsonl_com_separadores_unicode_dentro_das_strings():
+    textos = ["Antes\u2028depois\u2029fim", "Próxima\u0085linha", "Parágrafo e\x1cseparadores\x0b\x0c"]
+    conteudo = "".join(json.dumps(card(p), ensure_ascii=False) + "\n" for p in textos)
+    assert [c["pergunta"] for c in ler_cards(io.BytesIO(conteudo.encode("utf-8")))] == textos
+
+@pytest.mark.parametrize("conteudo, mensagem", [
+    ('[{"concurso": "C", "lei": "L", "pergunta": "P", "resposta": "R"}, {"concurso": ', "card 2"),
+    ('[{"concurso": "C", "lei": "L", "pergunta": "P", "resposta": "R"}] lixo', "depois do fim do array"),
+    ('[{"concurso": "C", "lei": "L", "pergunta": "P", "resposta": "R"} {}]', "esperada uma vírgula"),
+    ('{"concurso": "C", "lei": "L", "pergunta": "P", "resposta": "R"}\n{"concurso"\n', "linha 2"),
+    ('[{"concurso": "C", "lei": "L", "pergunta": "P"}]', '"resposta" é obrigatório'),
+    ('[{"concurso": "C", "lei": "L", "pergunta": "P", "resposta": "R", "vezes_lido": -1}]', "vezes_lido"),
+])
+def test_arquivo_invalido(conteudo, mensagem):
+    with pytest.raises(ArquivoInvalido, match=mensagem):
+        perguntas(conteudo)
+
+def test_arquivo_fora_de_utf8():
+    with pytest.raises(ArquivoInvalido, match="UTF-8"):
+        list(ler_cards(io.BytesIO('[{"pergunta": "Ação"}]'.encode("latin-1"))))
+
+def test_escrever_e_ler_de_volta_sem_fechar_o_arquivo():
+    for escrever in (escrever_json, escrever_jsonl):
+        texto = io.StringIO()
+        assert escrever(iter(CARDS), texto) == len(CARDS)
+        arquivo = io.BytesIO(texto.getvalue().encode("utf-8"))
+        assert contar_cards(arquivo) == len(CARDS) and arquivo.tell() == 0
+        assert [c["pergunta"] for c in ler_cards(arquivo)] == PERGUNTAS
+        assert not arquivo.closed
+
+def test_impressao_digital_pelo_tamanho_inicio_e_fim():
+    base = b"x" * 1000
+    assert impressao_digital(io.BytesIO(base), 100) == impressao_digital(io.BytesIO(base), 100)
+    assert impressao_digital(io.BytesIO(base[:-1] + b"y"), 100) != impressao_digital(io.BytesIO(base), 100)
+    assert impressao_digital(io.BytesIO(base + b"x"), 100) != impressao_digital(io.BytesIO(base), 100)
+    # O meio do arquivo não entra na impressão digital
+    assert impressao_digital(io.BytesIO(base[:500] + b"y" + base[501:]), 100) == impressao_digital(io.BytesIO(base), 100)
@@ -0,0 +1,54 @@
+# Baralhos compartilhados (sql/migracoes/004_baralhos.sql e 009_baralhos_permissoes.sql): permissões do papel
+# anon, publicação numa única transação e exclusão de cards base com as camadas dos assinantes.
+import pytest
+
+from leitura.migracoes import executar
+
+# Cards de "ana" (dois da Lei 1, um da Lei 2)
+@pytest.fixture(scope="module")
+def cards_da_ana(conexao):
+    return [
+        executar(conexao, "insert into cards (usuario, concurso, lei, pergunta, resposta, referencia) values ('ana', 'C', %s, %s, %s, %s) returning id", card)[0][0]
+        for card in (("Lei 1", "P1", "R1", "Art. 1"), ("Lei 1", "P2", "R2", "Art. 2"), ("Lei 2", "P3", "R3", "Art. 3"))
+    ]
+
+# Função para publicar um baralho pela função publicar_baralho, com o papel anon; devolve (id, quantidade)
+def publicar(como_anon, usuario, nome, concurso=None, lei=None):
+    return como_anon("select * from publicar_baralho(%s, %s, '', %s, %s)", (usuario, nome, concurso, lei))[0]
+
+def test_anon_nao_escreve_nos_baralhos(conexao, como_anon, cards_da_ana):
+    baralho_id, _ = publicar(como_anon, "ana", "Leitura")
+    for comando in (
+        "insert into baralhos (nome, autor) values ('Outro', 'bia')",
+        f"update baralhos set nome = 'Alterado' where id = {baralho_id}",
+        f"insert into baralho_cards (baralho_id, concurso, lei, pergunta, resposta) values ({baralho_id}, 'C', 'L', 'P', 'R')",
+        f"update baralho_cards set resposta = 'Reescrita' where baralho_id = {baralho_id}",
+    ):
+        with pytest.raises(Exception, match="permission denied"):
+            como_anon(comando)
+    assert como_anon("select count(*) from baralho_cards where baralho_id = %s", (baralho_id,))[0][0] == 3
+
+# O app não tem login no Supabase: publicar_baralho não confere p_usuario com quem chama, e qualquer cliente com
+# a chave anon publica os cards do usuário que informar
+def test_publicar_copia_os_cards_de_p_usuario_com_o_filtro(conexao, como_anon, cards_da_ana):
+    baralho_id, quantidade = publicar(como_anon, "ana", "Lei 1", "C", "Lei 1")
+    assert quantidade == 2
+    assert executar(conexao, "select autor, quantidade from baralhos where id = %s", (baralho_id,))[0] == ("ana", 2)
+    assert executar(conexao, "select pergunta from baralho_cards where baralho_id = %s order by id", (baralho_id,)) == [("P1",), ("P2",)]
+    assert publicar(como_anon, "bia", "Vazio")[1] == 0
+
+def test_publicar_exige_usuario_e_nome(conexao, como_anon, cards_da_ana):
+    antes = executar(conexao, "select count(*) from baralhos")[0][0]
+    with pytest.raises(Exception, match="obrigatórios"):
+        publicar(como_anon, "ana", "")
+    assert executar(conexao, "select count(*) from baralhos")[0][0] == antes
+
+def test_excluir_card_base_copia_o_texto_para_as_camadas(conexao, como_anon, cards_da_ana):
+    baralho_id, _ = publicar(como_anon, "ana", "Para assinar", "C", "Lei 2")
+    base = executar(conexao, "select id from baralho_cards where baralho_id = %s", (baralho_id,))[0][0]
+    camada = executar(conexao, "insert into cards (usuario, concurso, lei, referencia, baralho_card_id) values ('bia', 'C', 'Lei 2', 'Art. 3', %s) returning id", (base,))[0][0]
+    editada = executar(conexao, "insert into cards (usuario, concurso, lei, pergunta, resposta, referencia, baralho_card_id) values ('carla', 'C', 'Lei 2', 'Minha', 'Minha resposta', 'Art. 3', %s) returning id", (base,))[0][0]
+    executar(conexao, "delete from baralhos where id = %s", (baralho_id,))
+    assert executar(conexao, "select pergunta, resposta, baralho_card_id from cards where id = %s", (camada,))[0] == ("P3", "R3", None)
+    assert executar(conexao, "select pergunta, resposta, baralho_card_id from cards where id = %s", (editada,))[0] == ("Minha", "Minha resposta", None)
+    assert executar(conexao, "select pergunta from cards_visiveis where id in (%s, %s) order by id", (camada, editada)) == [("P3",), ("Minha",)]
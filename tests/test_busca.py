@@ -0,0 +1,141 @@
+# Busca textual no servidor (sql/migracoes/006_busca.sql): configuração pt_unaccent, coluna gerada documento,
+# função buscar_cards (relevância, destaques, paginação e filtros) e o filtro wfts do PostgREST sobre a visão
+# cards_visiveis, usado pelo modo leitura, pelas ações em lote e pela exportação.
+import pytest
+
+from leitura.dados import CONFIGURACAO_BUSCA
+from leitura.migracoes import executar
+from leitura.referencias import colunas_de_ordem
+
+# Cards de exemplo: (usuário, pergunta, resposta, referência)
+CARDS_EXEMPLO = [
+    ("ana", "Licença para capacitação", "Após cada quinquênio, o servidor poderá afastar-se com remuneração.", "Art. 87, Lei 8.112"),
+    ("ana", "Licença por motivo de doença em pessoa da família", "<p>Poderá ser concedida <b>licença</b> ao servidor.</p>", "Art. 83, Lei 8.112"),
+    ("ana", "Vacância do cargo público", "Decorrerá de exoneração, demissão, promoção, readaptação e aposentadoria.", "Art. 33, Lei 8.112"),
+    ("ana", "Posse", "A posse dar-se-á pela assinatura do termo, do qual constarão as atribuições dos servidores.", "Art. 13, Lei 8.112"),
+    ("ana", "Estágio probatório", "Período de 24 meses durante o qual a aptidão é avaliada; não há licença nesse período.", "Art. 20, Lei 8.112"),
+    ("ana", "Remoção", "Deslocamento do servidor, no âmbito do mesmo quadro.", "Art. 36, Lei 8.112"),
+    ("bia", "Licença à gestante", "Será concedida licença à servidora gestante por 120 dias.", "Art. 207, Lei 8.112"),
+]
+# Usuário com muitos cards, para o planejador preferir o índice GIN à leitura de todos os cards do usuário
+USUARIO_VOLUMOSO = "carla"
+CARDS_DO_USUARIO_VOLUMOSO = 20000
+
+# Função para inserir cards de exemplo (com as colunas de ordem da lei) e devolver os ids por pergunta
+def popular(conexao, cards=CARDS_EXEMPLO, concurso="Concurso", lei="Lei 8.112"):
+    ids = {}
+    for (usuario, pergunta, resposta, referencia), ordem in zip(cards, colunas_de_ordem(card[3] for card in cards)):
+        linhas = executar(
+            conexao,
+            "insert into cards (usuario, concurso, lei, pergunta, resposta, referencia, artigo, ordem_ref) values (%s, %s, %s, %s, %s, %s, %s, %s) returning id",
+            (usuario, concurso, lei, pergunta, resposta, referencia, ordem["artigo"], ordem["ordem_ref"]),
+        )
+        ids[(usuario, pergunta)] = linhas[0][0]
+    return ids
+
+# Função para chamar buscar_cards e devolver os resultados como dicionários
+def buscar(conexao, usuario, busca, **parametros):
+    argumentos = ", ".join(f"{nome} => %s" for nome in parametros)
+    comando = f"select * from buscar_cards(%s, %s{', ' + argumentos if argumentos else ''})"
+    with conexao.cursor() as cursor:
+        cursor.execute(comando, (usuario, busca, *parametros.values()))
+        colunas = [coluna[0] for coluna in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+# Função para o filtro wfts do PostgREST (coluna=wfts(configuração).busca) sobre a visão cards_visiveis
+def filtrar_wfts(conexao, usuario, busca):
+    linhas = executar(conexao, "select id from cards_visiveis where usuario = %s and documento @@ websearch_to_tsquery(%s, %s) order by id", (usuario, CONFIGURACAO_BUSCA, busca))
+    return [linha[0] for linha in linhas]
+
+# Ids dos cards de exemplo; "camada" é a camada de um baralho assinado por "ana", sem pergunta e resposta
+# próprias (o texto vem do card base)
+@pytest.fixture(scope="module")
+def ids(conexao):
+    ids = popular(conexao)
+    baralho = executar(conexao, "insert into baralhos (nome, autor) values ('Baralho', 'bia') returning id")[0][0]
+    base = executar(
+        conexao,
+        "insert into baralho_cards (baralho_id, concurso, lei, pergunta, resposta, referencia) values (%s, 'Concurso', 'Lei 8.112', 'Redistribuição', 'Deslocamento de cargo de provimento efetivo para outro órgão.', 'Art. 37') returning id",
+        (baralho,),
+    )[0][0]
+    ids["camada"] = executar(
+        conexao,
+        "insert into cards (usuario, concurso, lei, referencia, baralho_card_id) values ('ana', 'Concurso', 'Lei 8.112', 'Art. 37', %s) returning id",
+        (base,),
+    )[0][0]
+    return ids
+
+def test_pt_unaccent_ignora_acentos_e_reduz_ao_radical(conexao):
+    lexemas = [executar(conexao, "select to_tsvector(%s, %s)::text", (CONFIGURACAO_BUSCA, texto))[0][0] for texto in ("Licença", "licenca", "licenças")]
+    assert lexemas[0] == lexemas[1] == lexemas[2]
+    assert executar(conexao, "select to_tsvector(%s, 'Os servidores') @@ websearch_to_tsquery(%s, 'servidor')", (CONFIGURACAO_BUSCA, CONFIGURACAO_BUSCA))[0][0]
+
+def test_documento_gerado_com_pesos_e_atualizado_na_edicao(conexao, ids):
+    card_id = ids[("ana", "Remoção")]
+    documento = executar(conexao, "select documento::text from cards where id = %s", (card_id,))[0][0]
+    assert "'remoca':1A" in documento and "'36':" in documento and "'desloc':" in documento
+    executar(conexao, "update cards set pergunta = 'Redistribuição' where id = %s", (card_id,))
+    try:
+        assert filtrar_wfts(conexao, "ana", "remoção") == []
+        assert card_id in filtrar_wfts(conexao, "ana", "redistribuicao")
+    finally:
+        executar(conexao, "update cards set pergunta = 'Remoção' where id = %s", (card_id,))
+
+def test_sem_acento_encontra_com_acento(conexao, ids):
+    encontrados = {r["id"] for r in buscar(conexao, "ana", "licenca")}
+    assert {ids[("ana", "Licença para capacitação")], ids[("ana", "Licença por motivo de doença em pessoa da família")]} <= encontrados
+
+def test_radical_em_portugues(conexao, ids):
+    assert ids[("ana", "Remoção")] in {r["id"] for r in buscar(conexao, "ana", "servidores")}
+
+def test_pergunta_pesa_mais_que_a_resposta(conexao, ids):
+    resultados = buscar(conexao, "ana", "licença")
+    assert resultados[-1]["id"] == ids[("ana", "Estágio probatório")]
+    assert [r["relevancia"] for r in resultados] == sorted((r["relevancia"] for r in resultados), reverse=True)
+
+def test_destaques_com_mark_e_sem_html(conexao, ids):
+    resultados = buscar(conexao, "ana", "licença")
+    assert resultados and all("<mark>" in (r["destaque_pergunta"] or "") + (r["destaque_resposta"] or "") for r in resultados)
+    assert all("<p>" not in (r["destaque_resposta"] or "") for r in resultados)
+    assert all(r["destaque_pergunta"] is None and r["destaque_resposta"] is None for r in buscar(conexao, "ana", "licença", p_destacar=False))
+
+def test_so_os_cards_do_usuario(conexao, ids):
+    assert ids[("bia", "Licença à gestante")] not in {r["id"] for r in buscar(conexao, "ana", "licença")}
+
+def test_paginacao_e_total(conexao, ids):
+    pagina1 = buscar(conexao, "ana", "servidor", p_limite=2)
+    pagina2 = buscar(conexao, "ana", "servidor", p_limite=2, p_deslocamento=2)
+    todos = buscar(conexao, "ana", "servidor", p_limite=100)
+    assert len(pagina1) == 2 and not {r["id"] for r in pagina1} & {r["id"] for r in pagina2}
+    assert pagina1[0]["total"] == pagina2[0]["total"] == len(todos)
+
+def test_frase_exata_e_exclusao(conexao, ids):
+    assert [r["id"] for r in buscar(conexao, "ana", '"cargo público" -licença')] == [ids[("ana", "Vacância do cargo público")]]
+
+def test_filtro_de_artigos(conexao, ids):
+    resultados = buscar(conexao, "ana", "licença", p_artigo_inicio=80, p_artigo_fim=85)
+    assert [r["id"] for r in resultados] == [ids[("ana", "Licença por motivo de doença em pessoa da família")]]
+
+def test_card_de_baralho_assinado_buscado_pelo_texto_base(conexao, ids):
+    assert [r["id"] for r in buscar(conexao, "ana", "redistribuicao")] == [ids["camada"]]
+
+def test_filtro_wfts_na_visao(conexao, ids):
+    assert filtrar_wfts(conexao, "ana", "licenca") == sorted([
+        ids[("ana", "Licença para capacitação")], ids[("ana", "Licença por motivo de doença em pessoa da família")],
+        ids[("ana", "Estágio probatório")],
+    ])
+    assert filtrar_wfts(conexao, "ana", "redistribuição") == [ids["camada"]]
+    assert filtrar_wfts(conexao, "ana", '"cargo público" -licença') == [ids[("ana", "Vacância do cargo público")]]
+
+def test_busca_usa_o_indice_gin(conexao):
+    executar(conexao, f"""
+        insert into cards (usuario, concurso, lei, pergunta, resposta)
+        select %s, 'Concurso', 'Lei ' || (k %% 10), 'Pergunta ' || k || case when k %% 1000 = 0 then ' sobre readaptação' else ' sobre posse' end, 'Resposta ' || k
+        from generate_series(1, {CARDS_DO_USUARIO_VOLUMOSO}) k
+    """, (USUARIO_VOLUMOSO,))
+    executar(conexao, "vacuum analyze cards")
+    plano = "\n".join(linha[0] for linha in executar(
+        conexao, "explain select id from cards where usuario = %s and documento @@ websearch_to_tsquery(%s, 'readaptação')", (USUARIO_VOLUMOSO, CONFIGURACAO_BUSCA)
+    ))
+    assert "cards_documento" in plano, plano
+    assert len(buscar(conexao, USUARIO_VOLUMOSO, "readaptação")) == CARDS_DO_USUARIO_VOLUMOSO // 1000
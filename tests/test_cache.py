@@ -0,0 +1,83 @@
+# Versões e diário do cache de resultados por usuário (leitura/cache.py), em memória, em SQLite e num substituto
+# do Redis, sem banco de dados.
+import pytest
+
+from leitura import cache
+from leitura.dados import CHAVE_BARALHOS
+from leitura.falso import RedisFalso
+
+# Cache só em memória, em SQLite (compartilhado entre processos na mesma máquina) ou no substituto do Redis
+@pytest.fixture(params=["memoria", "sqlite", "redis"])
+def compartilhado(request, tmp_path):
+    escolhido = {"memoria": lambda: None, "sqlite": lambda: cache.CacheSQLite(str(tmp_path / "cache.db")), "redis": lambda: cache.CacheRedis(RedisFalso())}[request.param]()
+    cache.configurar_cache(escolhido)
+    yield escolhido
+    cache.configurar_cache(None)
+
+# Função que conta quantas vezes o valor foi calculado
+def contador(calculos, valor="valor"):
+    def calcular():
+        calculos.append(valor)
+        return valor
+    return calcular
+
+def test_versao_por_usuario_e_global(compartilhado):
+    ana, bia = cache.versao("ana"), cache.versao("bia")
+    assert len(ana.split(".")) == 2
+    cache.invalidar("ana")
+    assert cache.versao("ana") != ana and cache.versao("bia") == bia
+    cache.invalidar()
+    assert cache.versao("bia") != bia
+
+def test_lista_de_baralhos_nao_invalida_os_usuarios(compartilhado):
+    ana = cache.versao("ana")
+    cache.invalidar(CHAVE_BARALHOS)
+    assert cache.versao("ana") == ana and CHAVE_BARALHOS != cache.TODOS
+
+def test_em_cache_ate_invalidar(compartilhado):
+    calculos = []
+    assert cache.em_cache("facetas", "ana", contador(calculos)) == "valor"
+    assert cache.em_cache("facetas", "ana", contador(calculos)) == "valor" and len(calculos) == 1
+    cache.invalidar("bia")
+    cache.em_cache("facetas", "ana", contador(calculos))
+    assert len(calculos) == 1
+    cache.invalidar("ana")
+    cache.em_cache("facetas", "ana", contador(calculos))
+    assert len(calculos) == 2
+
+def test_gravacao_de_outro_processo(compartilhado):
+    if compartilhado is None:
+        pytest.skip("só o cache compartilhado vê as gravações de outros processos")
+    calculos = []
+    cache.em_cache("facetas", "ana", contador(calculos, {"cards": 1}))
+    # Outro processo: começa sem os valores em memória e lê o valor gravado no cache compartilhado
+    cache.configurar_cache(compartilhado)
+    assert cache.em_cache("facetas", "ana", contador(calculos)) == {"cards": 1} and len(calculos) == 1
+    # Uma gravação no outro processo incrementa a versão compartilhada
+    compartilhado.incrementar(f"{cache.PREFIXO}versao:ana")
+    cache.em_cache("facetas", "ana", contador(calculos))
+    assert len(calculos) == 2
+
+def test_valor_calculado_durante_uma_gravacao_nao_fica_em_cache(compartilhado):
+    calculos = []
+
+    def calcular_com_gravacao():
+        calculos.append(1)
+        cache.invalidar("ana")
+        return "velho"
+
+    assert cache.em_cache("historico", "ana", calcular_com_gravacao) == "velho"
+    assert cache.em_cache("historico", "ana", contador(calculos)) == "valor" and len(calculos) == 2
+
+def test_diario_de_alteracoes(compartilhado):
+    posicao, alteracoes = cache.alteracoes_desde("carla", None)
+    assert alteracoes is None
+    cache.registrar_alteracao("carla", "inserir", [1, 2])
+    cache.registrar_alteracao("carla", "texto", [])
+    cache.registrar_alteracao("carla", "excluir", [1])
+    posicao, alteracoes = cache.alteracoes_desde("carla", posicao)
+    assert alteracoes == [{"tipo": "inserir", "ids": [1, 2]}, {"tipo": "excluir", "ids": [1]}]
+    assert cache.alteracoes_desde("carla", posicao) == (posicao, [])
+    for card_id in range(cache.LIMITE_DIARIO + 1):
+        cache.registrar_alteracao("carla", "texto", [card_id])
+    assert cache.alteracoes_desde("carla", posicao)[1] is None
@@ -0,0 +1,21 @@
+# Funções de leitura/dados.py que não consultam o banco.
+from datetime import date, datetime, timezone
+
+from leitura import dados
+
+# Relógio fixo em 19/10/2026 01:30 UTC, que ainda é 18/10 em São Paulo (UTC-3)
+class RelogioFixo(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        instante = datetime(2026, 10, 19, 1, 30, tzinfo=timezone.utc)
+        return instante.astimezone(tz) if tz else instante.replace(tzinfo=None)
+
+def test_inicio_do_historico_no_fuso_das_leituras(monkeypatch):
+    monkeypatch.setattr(dados, "datetime", RelogioFixo)
+    assert dados._inicio_historico("dia", 1) == date(2026, 10, 18)
+    assert dados._inicio_historico("dia", 30) == date(2026, 9, 19)
+    assert dados._inicio_historico("semana", 1) == date(2026, 10, 12)
+
+def test_inicio_do_historico_a_partir_de_hoje():
+    assert dados._inicio_historico("semana", 2, date(2026, 10, 14)) == date(2026, 10, 5)
+    assert dados._inicio_historico("dia", 7, date(2026, 10, 14)) == date(2026, 10, 8)
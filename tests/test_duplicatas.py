@@ -0,0 +1,61 @@
+# Assinaturas MinHash e índice LSH de cards quase duplicados (leitura/duplicatas.py), sem banco de dados.
+import random
+
+from leitura.duplicatas import IndiceDuplicatas, assinatura, normalizar_texto, similaridade, texto_card
+
+# Textos aleatórios reprodutíveis, com palavras de um vocabulário grande (textos diferentes quase não têm trechos em comum)
+_aleatorio = random.Random(1)
+PALAVRAS = [f"palavra{i}" for i in range(2000)]
+TEXTOS = [" ".join(_aleatorio.choice(PALAVRAS) for _ in range(60)) for _ in range(3)]
+
+# Função para montar um card com a resposta dada
+def card(resposta, pergunta="Pergunta"):
+    return {"pergunta": pergunta, "resposta": resposta}
+
+# Índice com dois cards quase iguais (1 e 2), um igual a menos de tags, acentos e caixa (4) e um diferente (3)
+def indice_de_exemplo():
+    indice = IndiceDuplicatas()
+    indice.adicionar(1, card(TEXTOS[0]))
+    indice.adicionar(2, card(TEXTOS[0] + " fim"))
+    indice.adicionar(3, card(TEXTOS[1]))
+    indice.adicionar(4, card(TEXTOS[0].upper(), "<b>Pérgunta</b>"))
+    return indice
+
+def test_normalizar_texto():
+    assert normalizar_texto("<p>Ação &amp; Reação!!</p>   x") == "acao reacao x"
+    assert texto_card({"pergunta": "<i>Posse</i>", "resposta": "Em 30 dias."}) == "posse em 30 dias"
+
+def test_similaridade_estima_jaccard():
+    mesmo = assinatura(normalizar_texto(TEXTOS[0]))
+    assert similaridade(mesmo, assinatura(normalizar_texto(TEXTOS[0]))) == 1.0
+    assert similaridade(mesmo, assinatura(normalizar_texto(TEXTOS[0] + " fim"))) > 0.9
+    assert similaridade(mesmo, assinatura(normalizar_texto(TEXTOS[1]))) < 0.2
+    assert len(assinatura("")) == len(mesmo)
+
+def test_semelhantes_do_mais_ao_menos_parecido():
+    indice = indice_de_exemplo()
+    encontrados = indice.semelhantes(card(TEXTOS[0]))
+    assert sorted(card_id for card_id, _ in encontrados) == [1, 2, 4]
+    assert [semelhanca for _, semelhanca in encontrados] == sorted((semelhanca for _, semelhanca in encontrados), reverse=True)
+    assert sorted(dict(indice.semelhantes(card(TEXTOS[0]), ignorar_id=1))) == [2, 4]
+    assert indice.semelhantes(card(TEXTOS[2])) == []
+
+def test_grupos_remover_e_renomear():
+    indice = indice_de_exemplo()
+    assert indice.grupos() == [[1, 2, 4]]
+    indice.remover(4)
+    indice.renomear(2, -1)
+    assert len(indice) == 3 and indice.grupos() == [[-1, 1]]
+    # Editar o texto de um card tira o card do grupo
+    indice.adicionar(1, card(TEXTOS[2]))
+    assert indice.grupos() == []
+
+def test_salvar_e_carregar(tmp_path):
+    indice = indice_de_exemplo()
+    indice.posicao = ("local", "origem", 7)
+    caminho = str(tmp_path / "indice.pkl")
+    indice.salvar(caminho)
+    carregado = IndiceDuplicatas.carregar(caminho)
+    assert carregado.posicao == indice.posicao and carregado.grupos() == indice.grupos()
+    assert carregado.semelhantes(card(TEXTOS[1])) == indice.semelhantes(card(TEXTOS[1]))
+    assert len(IndiceDuplicatas.carregar(str(tmp_path / "ausente.pkl"))) == 0
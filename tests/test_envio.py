@@ -0,0 +1,90 @@
+# Novas tentativas, limite de taxa e checkpoints dos envios em lotes (leitura/envio.py), sem banco de dados.
+import json
+import time
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from leitura.envio import Checkpoint, EnvioEmLotes, LimiteDeTaxa, chave_lote, com_tentativas, erro_transitorio
+
+# Função para um erro do PostgREST com o código dado
+def erro_api(codigo, mensagem="erro"):
+    return APIError({"code": codigo, "message": mensagem, "details": None, "hint": None})
+
+# Função que falha com os erros dados, um por chamada, e depois devolve "ok"; guarda as chamadas em chamadas
+def falhando(erros, chamadas):
+    def funcao(*args, **kwargs):
+        chamadas.append((args, kwargs))
+        if len(chamadas) <= len(erros):
+            raise erros[len(chamadas) - 1]
+        return "ok"
+    return funcao
+
+def test_erros_transitorios():
+    assert erro_transitorio(httpx.ConnectError("sem conexão")) and erro_transitorio(TimeoutError())
+    assert erro_transitorio(erro_api("503")) and erro_transitorio(erro_api("40001"))
+    assert erro_transitorio(erro_api("PGRST999", "Rate limit exceeded"))
+    assert not erro_transitorio(erro_api("23505")) and not erro_transitorio(ValueError())
+
+def test_com_tentativas_espera_exponencial_limitada():
+    chamadas, esperas, falhas = [], [], []
+    funcao = falhando([erro_api("503")] * 4, chamadas)
+    assert com_tentativas(funcao, 1, chave="x", espera_base=1, espera_maxima=5, dormir=esperas.append, ao_falhar=lambda erro, n: falhas.append(n)) == "ok"
+    assert chamadas == [((1,), {"chave": "x"})] * 5 and falhas == [1, 2, 3, 4]
+    assert len(esperas) == 4 and all(0 <= espera <= limite for espera, limite in zip(esperas, [1, 2, 4, 5]))
+
+def test_com_tentativas_desiste():
+    chamadas = []
+    with pytest.raises(APIError):
+        com_tentativas(falhando([erro_api("503")] * 3, chamadas), tentativas=3, dormir=lambda _: None)
+    assert len(chamadas) == 3
+    chamadas = []
+    with pytest.raises(APIError):
+        com_tentativas(falhando([erro_api("23505")], chamadas), dormir=lambda _: None)
+    assert len(chamadas) == 1
+
+def test_limite_de_taxa():
+    LimiteDeTaxa(None).aguardar()
+    limite = LimiteDeTaxa(100, rajada=1)
+    inicio = time.monotonic()
+    for _ in range(21):
+        limite.aguardar()
+    assert time.monotonic() - inicio >= 0.19
+
+def test_checkpoint_retomado_do_disco(tmp_path):
+    caminho = str(tmp_path / "envios" / "ana_importacao_abc.json")
+    checkpoint = Checkpoint.abrir(caminho)
+    assert not checkpoint.retomado
+    checkpoint.marcar("0:aa", {"novos": 10})
+    checkpoint.marcar_etapa("exclusao")
+    retomado = Checkpoint.abrir(caminho)
+    assert retomado.retomado and retomado.concluido("0:aa") and not retomado.concluido("1:bb")
+    assert retomado.etapa_concluida("exclusao") and retomado.dados["resultado"] == {"novos": 10}
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f)["concluidos"] == ["0:aa"]
+    retomado.remover()
+    assert not Checkpoint.abrir(caminho).retomado
+
+def test_chave_lote_pela_posicao_e_conteudo():
+    lote = [{"pergunta": "P", "resposta": "R"}]
+    assert chave_lote(0, lote) == chave_lote(0, [dict(lote[0])])
+    assert chave_lote(0, lote) != chave_lote(1, lote) != chave_lote(1, [{"pergunta": "P", "resposta": "S"}])
+
+def test_envio_em_lotes_repete_so_o_lote_que_falhou(monkeypatch):
+    monkeypatch.setattr("leitura.envio.random.uniform", lambda inicio, fim: 0)
+    gravados, tentativas = [], {}
+
+    def gravar(lote, repetindo):
+        tentativas[lote[0]] = tentativas.get(lote[0], 0) + 1
+        if lote[0] == 3 and tentativas[lote[0]] == 1:
+            raise httpx.ReadTimeout("tempo esgotado")
+        gravados.append((lote[0], repetindo))
+        return len(lote)
+
+    envio = EnvioEmLotes(gravar, trabalhadores=2)
+    concluidos = []
+    envio.enviar(((numero, [numero]) for numero in range(6)), lambda chave, lote, retorno: concluidos.append((chave, retorno)))
+    assert sorted(concluidos) == [(numero, 1) for numero in range(6)]
+    assert sorted(gravados) == [(0, False), (1, False), (2, False), (3, True), (4, False), (5, False)]
+    assert envio.retentativas == 1
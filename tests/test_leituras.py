@@ -0,0 +1,33 @@
+# Histórico de estudo (sql/migracoes/003_leituras.sql e 010_leituras_permissoes.sql): registrar_leituras chamada
+# com o papel anon, como pelo app, e as tabelas de leituras fechadas para escrita direta.
+import pytest
+
+from leitura.migracoes import executar
+
+# Ids de dois cards de "ana", de leis diferentes
+@pytest.fixture(scope="module")
+def ids(conexao):
+    return [
+        executar(conexao, "insert into cards (usuario, concurso, lei, pergunta, resposta) values ('ana', 'C', %s, 'P', 'R') returning id", (lei,))[0][0]
+        for lei in ("Lei 1", "Lei 2")
+    ]
+
+def test_registrar_leituras_com_o_papel_anon(conexao, como_anon, ids):
+    assert como_anon("select registrar_leituras('ana', %s)", (ids,))[0][0] == 2
+    assert como_anon("select registrar_leituras('ana', %s)", (ids[:1],))[0][0] == 1
+    assert executar(conexao, "select vezes_lido from cards where id = any(%s) order by id", (ids,)) == [(2,), (1,)]
+    assert executar(conexao, "select count(*) from leituras where usuario = 'ana'")[0][0] == 3
+    totais = como_anon("select periodo, lei, leituras from leituras_por_periodo where usuario = 'ana' order by periodo, lei")
+    assert totais == [("dia", "Lei 1", 2), ("dia", "Lei 2", 1), ("semana", "Lei 1", 2), ("semana", "Lei 2", 1)]
+
+def test_so_os_cards_do_usuario(conexao, como_anon, ids):
+    assert como_anon("select registrar_leituras('bia', %s)", (ids,))[0][0] == 0
+
+@pytest.mark.parametrize("comando", [
+    "insert into leituras (usuario, card_id) values ('ana', 1)",
+    "insert into leituras_por_periodo (usuario, periodo, inicio, lei, leituras) values ('ana', 'dia', current_date, 'Outra', 99)",
+    "update leituras_por_periodo set leituras = 0",
+])
+def test_tabelas_de_leituras_fechadas_para_escrita_direta(conexao, como_anon, ids, comando):
+    with pytest.raises(Exception, match="permission denied"):
+        como_anon(comando)
@@ -0,0 +1,21 @@
+# Executor de migrações (leitura/migracoes.py) num banco com todas as migrações aplicadas.
+import pytest
+
+from leitura.migracoes import SOMAS_ANTERIORES, MigracaoAlterada, aplicar_migracoes, executar, situacao
+
+def test_tudo_aplicado(conexao):
+    assert {estado for _, _, estado in situacao(conexao)} == {"aplicada"}
+    assert aplicar_migracoes(conexao) == []
+
+def test_soma_anterior_de_arquivo_com_comentarios_corrigidos(conexao):
+    versao, somas = next(iter(SOMAS_ANTERIORES.items()))
+    soma_atual = executar(conexao, "select soma from migracoes where versao = %s", (versao,))[0][0]
+    try:
+        executar(conexao, "update migracoes set soma = %s where versao = %s", (next(iter(somas)), versao))
+        assert dict((v, estado) for v, _, estado in situacao(conexao))[versao] == "aplicada"
+        executar(conexao, "update migracoes set soma = 'outra' where versao = %s", (versao,))
+        assert dict((v, estado) for v, _, estado in situacao(conexao))[versao] == "alterada"
+        with pytest.raises(MigracaoAlterada):
+            aplicar_migracoes(conexao)
+    finally:
+        executar(conexao, "update migracoes set soma = %s where versao = %s", (soma_atual, versao))
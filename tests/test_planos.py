@@ -0,0 +1,319 @@
+# Planos das consultas do app (sql/migracoes/007_indices.sql e 008_visao_cards.sql): com a base populada e as
+# estatísticas atualizadas, nenhuma consulta do caminho principal pode ler por inteiro as tabelas grandes. As
+# consultas não são reescritas à mão: as funções de leitura/dados.py rodam com um cliente postgrest de verdade,
+# e cada requisição gravada vira o SQL equivalente ao que o PostgREST executa.
+import json
+import re
+
+import httpx
+import postgrest
+import pytest
+
+from leitura import cache, dados
+from leitura.migracoes import executar
+
+# Massa de dados: usuários, cards por usuário, concursos e leis por usuário, e baralhos publicados (cards por
+# baralho); os primeiros USUARIOS_ASSINANTES usuários assinam o primeiro baralho
+USUARIOS_PLANOS = 50
+CARDS_POR_USUARIO = 2000
+CONCURSOS_PLANOS = 3
+LEIS_PLANOS = 8
+BARALHOS_PLANOS = 40
+CARDS_POR_BARALHO = 1000
+USUARIOS_ASSINANTES = 5
+DIAS_HISTORICO = 180
+# Tabelas grandes que as consultas do app nunca devem ler por inteiro. Baralhos e assinaturas ficam de fora:
+# são pequenas, e ler a tabela inteira é o plano mais barato para elas.
+TABELAS_SEM_VARREDURA = {"cards", "baralho_cards", "leituras", "leituras_por_periodo"}
+# Palavras dos textos gerados (para a busca textual encontrar uma fração dos cards de cada usuário)
+PALAVRAS_PLANOS = [
+    "licença", "posse", "remoção", "vacância", "redistribuição", "aposentadoria", "estágio", "exoneração",
+    "demissão", "readaptação", "reversão", "reintegração", "recondução", "disponibilidade", "substituição", "férias",
+]
+
+# Filtro de uma lei com muitos cards de cada usuário
+FILTRO_LEI = {"concurso": "Concurso 1", "lei": "Lei 2"}
+LEI = "concurso = 'Concurso 1' and lei = 'Lei 2'"
+# Endereço fictício do PostgREST local
+URL_POSTGREST = "http://postgrest.local"
+# Operadores de comparação dos filtros do PostgREST
+OPERADORES = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "like", "ilike": "ilike"}
+# Nomes de tabelas e colunas aceitos nas requisições
+_NOME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+# Chamadas do caminho principal do app (leitura/dados.py): (descrição, função que recebe parametros_das_consultas).
+# As requisições que cada uma faz ao PostgREST são gravadas e conferidas por PostgrestLocal.
+CHAMADAS_DO_APP = [
+    ("carregar_pagina: página de uma lei na ordem da lei, com a contagem", lambda p: dados.carregar_pagina(p["usuario"], FILTRO_LEI, 40, 20)),
+    ("carregar_pagina: página com cards de baralho assinado", lambda p: dados.carregar_pagina(p["assinante"], {"concurso": "Concurso 0", "lei": "Lei 2"}, 0, 20)),
+    ("carregar_pagina: todos os cards do usuário", lambda p: dados.carregar_pagina(p["usuario"], {}, 0, 20)),
+    ("carregar_pagina: Nunca lidos", lambda p: dados.carregar_pagina(p["usuario"], {"filtro_leituras": "Nunca lidos"}, 0, 20)),
+    ("carregar_pagina: Nunca lidos de uma lei", lambda p: dados.carregar_pagina(p["usuario"], dict(FILTRO_LEI, filtro_leituras="Nunca lidos"), 0, 20)),
+    ("carregar_pagina: leituras mínimas", lambda p: dados.carregar_pagina(p["usuario"], {"filtro_leituras": "5 ou mais"}, 0, 20)),
+    ("carregar_pagina: intervalo de artigos", lambda p: dados.carregar_pagina(p["usuario"], {"lei": "Lei 2", "artigos": (30, 40)}, 0, 20)),
+    ("carregar_pagina: busca por texto (buscar_cards)", lambda p: dados.carregar_pagina(p["usuario"], {"busca": "licença"}, 0, 20)),
+    ("carregar_pagina: busca em baralho assinado (buscar_cards)", lambda p: dados.carregar_pagina(p["assinante"], {"busca": "licença", "concurso": "Concurso 0"}, 0, 20)),
+    ("carregar_janela: próxima janela do modo leitura", lambda p: dados.carregar_janela(p["usuario"], FILTRO_LEI, {"id": p["depois_de"], "ordem_ref": p["ordem"]})),
+    ("carregar_todos: lotes em ordem de id", lambda p: list(dados.carregar_todos(p["usuario"], "id, pergunta, resposta"))),
+    ("carregar_todos: busca pela coluna documento", lambda p: list(dados.carregar_todos(p["usuario"], "id", {"busca": "licença"}))),
+    ("carregar_card", lambda p: dados.carregar_card(p["usuario"], p["ids"][0])),
+    ("carregar_cards_por_ids", lambda p: list(dados.carregar_cards_por_ids(p["usuario"], p["ids"]))),
+    ("card_existe", lambda p: dados.card_existe(p["usuario"], p["pergunta"], p["resposta"])),
+    ("chaves_gravadas", lambda p: dados.chaves_gravadas(p["usuario"], [{"pergunta": p["pergunta"]}, {"pergunta": 'Sem "card"'}])),
+    ("carregar_facetas (facetas_cards)", lambda p: dados.carregar_facetas(p["usuario"])),
+    ("registrar_leituras", lambda p: dados.registrar_leituras(p["usuario"], p["ids"])),
+    ("atualizar_card", lambda p: dados.atualizar_card(p["usuario"], {"id": p["ids"][0], "referencia": ""}, {"referencia": "Art. 1"})),
+    ("excluir_card", lambda p: dados.excluir_card(p["ids"][0], p["usuario"])),
+    ("zerar_leituras_em_lote: filtro de uma lei", lambda p: dados.zerar_leituras_em_lote(p["usuario"], filtro=FILTRO_LEI)),
+    ("atualizar_cards_em_lote: cards selecionados", lambda p: dados.atualizar_cards_em_lote(p["usuario"], {"lei": "Lei 3"}, ids=p["ids"])),
+    ("carregar_historico", lambda p: dados.carregar_historico(p["usuario"], "dia", 30)),
+    ("cancelar_assinatura: cards base em lotes e camadas", lambda p: dados.cancelar_assinatura(p["assinante"], p["baralho"])),
+]
+
+# Função para popular o banco com muitos usuários, um baralho assinado e o histórico de leituras, e atualizar
+# as estatísticas do planejador; devolve (usuário sem baralhos, usuário assinante, id do baralho assinado)
+def popular_planos(conexao):
+    palavras = "array[" + ", ".join(f"'{palavra}'" for palavra in PALAVRAS_PLANOS) + "]"
+    executar(conexao, f"""
+        insert into cards (usuario, concurso, lei, pergunta, resposta, referencia, vezes_lido, artigo, ordem_ref)
+        select 'usuario' || u, 'Concurso ' || (k % {CONCURSOS_PLANOS}), 'Lei ' || (k % {LEIS_PLANOS}),
+            'Pergunta ' || k || ' sobre ' || ({palavras})[k % {len(PALAVRAS_PLANOS)} + 1], 'Resposta ' || k || ' sobre o servidor e a ' || ({palavras})[k / 7 % {len(PALAVRAS_PLANOS)} + 1],
+            case when k % 10 = 0 then '' else 'Art. ' || (k % 300 + 1) end, k % 7,
+            case when k % 10 = 0 then null else k % 300 + 1 end,
+            case when k % 10 = 0 then null else lpad((k % 300 + 1)::text, 5, '0') || '.00.000.000.00' end
+        from generate_series(0, {CARDS_POR_USUARIO - 1}) k, generate_series(0, {USUARIOS_PLANOS - 1}) u
+        order by k, u
+    """)
+    executar(conexao, f"insert into baralhos (nome, autor) select 'Baralho ' || b, 'autor' || b from generate_series(1, {BARALHOS_PLANOS}) b")
+    executar(conexao, f"""
+        insert into baralho_cards (baralho_id, concurso, lei, pergunta, resposta, referencia)
+        select b.id, 'Concurso 0', 'Lei ' || (g % {LEIS_PLANOS}), 'Pergunta do baralho ' || g || ' sobre ' || ({palavras})[g % {len(PALAVRAS_PLANOS)} + 1],
+            'Resposta do baralho ' || g, 'Art. ' || (g % 300 + 1)
+        from baralhos b, generate_series(1, {CARDS_POR_BARALHO}) g
+    """)
+    baralho = executar(conexao, "select min(id) from baralhos")[0][0]
+    executar(conexao, f"""
+        insert into cards (usuario, concurso, lei, referencia, baralho_card_id)
+        select 'usuario' || u, b.concurso, b.lei, b.referencia, b.id
+        from baralho_cards b, generate_series(0, {USUARIOS_ASSINANTES - 1}) u
+        where b.baralho_id = %s
+    """, (baralho,))
+    executar(conexao, f"insert into assinaturas (usuario, baralho_id) select 'usuario' || u, %s from generate_series(0, {USUARIOS_ASSINANTES - 1}) u", (baralho,))
+    executar(conexao, f"""
+        insert into leituras_por_periodo (usuario, periodo, inicio, lei, leituras)
+        select 'usuario' || u, 'dia', current_date - d, 'Lei ' || l, 1 + (u + d + l) % 20
+        from generate_series(0, {USUARIOS_PLANOS - 1}) u, generate_series(0, {DIAS_HISTORICO - 1}) d, generate_series(0, {LEIS_PLANOS - 1}) l
+    """)
+    executar(conexao, f"""
+        insert into leituras (usuario, card_id, lido_em)
+        select usuario, id, now() - (id % {DIAS_HISTORICO}) * interval '1 day' from cards where vezes_lido > 0
+    """)
+    executar(conexao, "vacuum analyze cards, baralhos, baralho_cards, assinaturas, leituras, leituras_por_periodo")
+    return f"usuario{USUARIOS_PLANOS - 1}", "usuario0", baralho
+
+# Função para listar as tabelas lidas por inteiro (nós Seq Scan) num plano do EXPLAIN em JSON
+def varreduras_sequenciais(plano):
+    tabelas = []
+    nos = [plano]
+    while nos:
+        no = nos.pop()
+        if no.get("Node Type") == "Seq Scan":
+            tabelas.append(no.get("Relation Name"))
+        nos.extend(no.get("Plans", []))
+    return tabelas
+
+
+# Função para dividir uma lista do PostgREST (a,b.eq."c,d",and(...)) nas vírgulas fora de aspas e parênteses
+def _itens(texto):
+    itens, atual, nivel, entre_aspas, escapado = [], "", 0, False, False
+    for caractere in texto:
+        if escapado:
+            escapado = False
+        elif caractere == "\\" and entre_aspas:
+            escapado = True
+        elif caractere == '"':
+            entre_aspas = not entre_aspas
+        elif not entre_aspas and caractere in "()":
+            nivel += 1 if caractere == "(" else -1
+        elif not entre_aspas and nivel == 0 and caractere == ",":
+            itens.append(atual)
+            atual = ""
+            continue
+        atual += caractere
+    return itens + [atual] if atual else itens
+
+# Função para o valor de um filtro sem as aspas (e sem os escapes de aspas e barras)
+def _valor(texto):
+    if len(texto) >= 2 and texto[0] == texto[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", texto[1:-1])
+    return texto
+
+# Função para o nome de uma tabela ou coluna, recusando o que não for um identificador simples
+def _nome(texto):
+    assert _NOME.match(texto), f"Nome não suportado: {texto}"
+    return texto
+
+# Função para o SQL de uma condição do PostgREST (coluna, "operador.valor"), acrescentando os valores a parametros
+def _condicao(coluna, expressao, parametros):
+    if coluna in ("or", "and"):
+        partes = [_condicao(*_coluna_e_expressao(item), parametros) for item in _itens(expressao[1:-1])]
+        return "(" + f" {coluna} ".join(partes) + ")"
+    negar = expressao.startswith("not.")
+    operador, _, valor = expressao[4 if negar else 0:].partition(".")
+    if operador == "is":
+        assert valor in ("null", "true", "false"), f"Filtro is não suportado: {valor}"
+        sql = f"{_nome(coluna)} is {valor}"
+    elif operador == "in":
+        valores = [_valor(item) for item in _itens(valor[1:-1])]
+        parametros.extend(valores)
+        sql = f"{_nome(coluna)} in ({', '.join(['%s'] * len(valores))})"
+    elif operador.startswith("wfts(") and operador.endswith(")"):
+        parametros.extend([operador[5:-1], valor])
+        sql = f"{_nome(coluna)} @@ websearch_to_tsquery(%s, %s)"
+    else:
+        assert operador in OPERADORES, f"Operador não suportado: {operador}"
+        valor = _valor(valor)
+        parametros.append(valor.replace("*", "%") if operador in ("like", "ilike") else valor)
+        sql = f"{_nome(coluna)} {OPERADORES[operador]} %s"
+    return f"not {sql}" if negar else sql
+
+# Função para separar "coluna.operador.valor" (ou "and(...)"/"or(...)") dentro de um filtro or ou and
+def _coluna_e_expressao(item):
+    for logico in ("and", "or"):
+        if item.startswith(f"{logico}("):
+            return logico, item[len(logico):]
+    return item.split(".", 1)
+
+# Função para o texto de um parâmetro de consulta ou de função (listas como array do Postgres)
+def _parametro(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    if isinstance(valor, list):
+        return "{" + ",".join(str(item) for item in valor) + "}"
+    return str(valor)
+
+# Função para o plano de um EXPLAIN em JSON
+def _plano(resultado):
+    return (json.loads(resultado) if isinstance(resultado, str) else resultado)[0]["Plan"]
+
+# PostgREST local: responde às requisições de um cliente postgrest de verdade (transporte HTTP falso) com o SQL
+# equivalente no banco de teste e guarda o plano de cada comando. Leituras e funções são executadas (as funções
+# numa transação desfeita, com os planos dos comandos internos registrados pelo auto_explain); inserções,
+# alterações e exclusões só são planejadas.
+class PostgrestLocal:
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.planos = []
+        self.avisos = []
+        if hasattr(conexao, "add_notice_handler"):
+            conexao.add_notice_handler(lambda diagnostico: self.avisos.append(diagnostico.message_primary))
+        executar(conexao, "load 'auto_explain'")
+        transporte = httpx.MockTransport(self.responder)
+        self.cliente = postgrest.SyncPostgrestClient(URL_POSTGREST, http_client=httpx.Client(base_url=URL_POSTGREST, transport=transporte))
+
+    # Planos dos comandos das requisições feitas por chamar(): [(comando, plano)]
+    def gravar(self, chamar):
+        self.planos = []
+        cache.configurar_cache(None)
+        chamar()
+        return self.planos
+
+    def responder(self, requisicao):
+        caminho = requisicao.url.path.strip("/").split("/")
+        corpo = json.loads(requisicao.content) if requisicao.content else {}
+        if caminho[0] == "rpc":
+            return httpx.Response(200, json=self.chamar_funcao(_nome(caminho[1]), corpo))
+        tabela = _nome(caminho[0])
+        parametros = []
+        filtros = [_condicao(chave, valor, parametros) for chave, valor in requisicao.url.params.multi_items() if chave not in ("select", "order", "limit", "offset")]
+        onde = f" where {' and '.join(filtros)}" if filtros else ""
+        if requisicao.method == "GET":
+            return self.ler(tabela, requisicao.url.params, onde, parametros, "count=exact" in requisicao.headers.get("prefer", ""))
+        if requisicao.method == "PATCH":
+            atribuicoes = ", ".join(f"{_nome(coluna)} = %s" for coluna in corpo)
+            self.planejar(f"update {tabela} set {atribuicoes}{onde}", [_parametro(valor) for valor in corpo.values()] + parametros)
+        elif requisicao.method == "DELETE":
+            self.planejar(f"delete from {tabela}{onde}", parametros)
+        else:
+            raise AssertionError(f"Requisição não suportada: {requisicao.method} {requisicao.url}")
+        return httpx.Response(200, json=[])
+
+    def ler(self, tabela, parametros_url, onde, parametros, contar):
+        colunas = parametros_url.get("select", "*")
+        assert all(coluna == "*" or _NOME.match(coluna) for coluna in colunas.replace(" ", "").split(",")), colunas
+        comando = f"select {colunas} from {tabela}{onde}"
+        if parametros_url.get("order"):
+            ordem = []
+            for item in parametros_url["order"].split(","):
+                coluna, *modificadores = item.split(".")
+                ordem.append(" ".join([_nome(coluna)] + [{"nullslast": "nulls last", "nullsfirst": "nulls first"}.get(m, m) for m in modificadores]))
+            comando += f" order by {', '.join(ordem)}"
+        for clausula in ("limit", "offset"):
+            if parametros_url.get(clausula):
+                comando += f" {clausula} {int(parametros_url[clausula])}"
+        self.planejar(comando, parametros)
+        linhas = executar(self.conexao, f"select coalesce(json_agg(t), '[]'::json) from ({comando}) t", parametros)[0][0]
+        cabecalhos = {}
+        if contar:
+            self.planejar(f"select count(*) from {tabela}{onde}", parametros)
+            total = executar(self.conexao, f"select count(*) from {tabela}{onde}", parametros)[0][0]
+            cabecalhos["Content-Range"] = f"0-{len(linhas) - 1}/{total}" if linhas else f"*/{total}"
+        return httpx.Response(200, json=linhas, headers=cabecalhos)
+
+    def planejar(self, comando, parametros):
+        self.planos.append((comando, _plano(executar(self.conexao, f"explain (format json) {comando}", parametros)[0][0])))
+
+    def chamar_funcao(self, funcao, argumentos):
+        conjunto = executar(self.conexao, "select proretset from pg_proc where proname = %s", (funcao,))[0][0]
+        chamada = f"{funcao}({', '.join(f'{_nome(nome)} => %s' for nome in argumentos)})"
+        comando = f"select coalesce(json_agg(t), '[]'::json) from {chamada} t" if conjunto else f"select to_json({chamada})"
+        self.avisos.clear()
+        executar(self.conexao, "begin")
+        try:
+            for ajuste in ("log_min_duration = 0", "log_nested_statements = on", "log_format = json", "log_level = notice"):
+                executar(self.conexao, f"set local auto_explain.{ajuste}")
+            resultado = executar(self.conexao, comando, [_parametro(valor) for valor in argumentos.values()])[0][0]
+        finally:
+            executar(self.conexao, "rollback")
+        for aviso in list(self.avisos) + list(getattr(self.conexao, "notices", [])):
+            if "plan:\n" in aviso:
+                registro = json.loads(aviso.split("plan:\n", 1)[1])
+                self.planos.append((registro["Query Text"], registro["Plan"]))
+        if hasattr(self.conexao, "notices"):
+            del self.conexao.notices[:]
+        return resultado
+
+# PostgREST local configurado como cliente de leitura/dados.py, com os recursos opcionais do banco já verificados
+@pytest.fixture(scope="module")
+def postgrest_local(conexao):
+    local = PostgrestLocal(conexao)
+    dados.configurar_clientes(local.cliente)
+    try:
+        assert dados._tabela_de_leitura() == dados.VISAO_CARDS
+        assert dados.ordem_da_lei_disponivel() and dados.busca_no_servidor_disponivel()
+        yield local
+    finally:
+        dados._clientes_configurados.clear()
+        cache.configurar_cache(None)
+
+# Campos das chamadas do app, tirados da base populada
+@pytest.fixture(scope="module")
+def parametros_das_consultas(conexao):
+    usuario, assinante, baralho = popular_planos(conexao)
+    ids = [linha[0] for linha in executar(conexao, "select id from cards where usuario = %s order by id limit 50", (usuario,))]
+    pergunta, resposta = executar(conexao, "select pergunta, resposta from cards where id = %s", (ids[-1],))[0]
+    ordem, depois_de = executar(conexao, f"select ordem_ref, id from cards where usuario = %s and {LEI} and ordem_ref is not null order by ordem_ref, id limit 1 offset 25", (usuario,))[0]
+    return {
+        "usuario": usuario, "assinante": assinante, "baralho": baralho, "ids": ids,
+        "pergunta": pergunta, "resposta": resposta, "ordem": ordem, "depois_de": depois_de,
+    }
+
+@pytest.mark.parametrize("chamada", [chamada for _, chamada in CHAMADAS_DO_APP], ids=[descricao for descricao, _ in CHAMADAS_DO_APP])
+def test_consulta_nao_le_tabelas_grandes_por_inteiro(postgrest_local, parametros_das_consultas, chamada):
+    planos = postgrest_local.gravar(lambda: chamada(parametros_das_consultas))
+    assert planos
+    for comando, plano in planos:
+        varridas = sorted(set(varreduras_sequenciais(plano)) & TABELAS_SEM_VARREDURA)
+        assert not varridas, f"Seq Scan em {', '.join(varridas)}: {comando}"
@@ -0,0 +1,50 @@
+# Ordem da lei a partir das referências (leitura/referencias.py), sem banco de dados.
+import pytest
+
+from leitura.referencias import chave_de_ordem, colunas_de_ordem, interpretar_referencia, intervalo_de_artigos, romano_para_int
+
+@pytest.mark.parametrize("referencia, partes", [
+    ("Art. 37", (37, 0, 0, 0, 0)),
+    ("Art. 37-A", (37, 1, 0, 0, 0)),
+    ("art. 1.015", (1015, 0, 0, 0, 0)),
+    ("Art. 5º, § 1º, II", (5, 0, 1, 2, 0)),
+    ("Art. 5, parágrafo único, X, a", (5, 0, 1, 10, 1)),
+    ("Art. 5, inciso LXXVIII, alínea b", (5, 0, 0, 78, 2)),
+    ("Art. 121, § 2º, I, CP", (121, 0, 2, 1, 0)),
+    ("CC, Art. 2", (2, 0, 0, 0, 0)),
+    ("Lei 8.112", None),
+    ("", None),
+])
+def test_interpretar_referencia(referencia, partes):
+    assert interpretar_referencia(referencia) == partes
+
+def test_romano_para_int():
+    assert [romano_para_int(texto) for texto in ("I", "iv", "XL", "LXXVIII", "MCMXC")] == [1, 4, 40, 78, 1990]
+    assert romano_para_int("IIII") is None and romano_para_int("") is None and romano_para_int("CX1") is None
+
+def test_chave_de_ordem_ordena_como_a_lei():
+    referencias = [
+        "Art. 10", "Art. 2, § 1º", "Art. 2", "Art. 2-A", "Art. 2, I", "Art. 2, parágrafo único", "Art. 2, § 2º, I, b",
+        "Art. 2, § 2º, I, a", "Art. 100", "Art. 2, II",
+    ]
+    ordenadas = sorted(referencias, key=lambda referencia: chave_de_ordem(interpretar_referencia(referencia)))
+    assert ordenadas == [
+        "Art. 2", "Art. 2, I", "Art. 2, II", "Art. 2, § 1º", "Art. 2, parágrafo único", "Art. 2, § 2º, I, a",
+        "Art. 2, § 2º, I, b", "Art. 2-A", "Art. 10", "Art. 100",
+    ]
+    assert chave_de_ordem((5, 0, 1, 10, 1)) == "00005.00.001.010.01"
+    assert chave_de_ordem(None) is None
+
+def test_colunas_de_ordem_em_lote():
+    assert colunas_de_ordem(["Art. 2", None, "Art. 2"]) == [
+        {"artigo": 2, "ordem_ref": "00002.00.000.000.00"},
+        {"artigo": None, "ordem_ref": None},
+        {"artigo": 2, "ordem_ref": "00002.00.000.000.00"},
+    ]
+
+@pytest.mark.parametrize("texto, intervalo", [
+    ("37", (37, 37)), ("Art. 37", (37, 37)), ("37-41", (37, 41)), ("41 a 37", (37, 41)), ("1.015", (1015, 1015)),
+    ("", None), ("abc", None), (None, None),
+])
+def test_intervalo_de_artigos(texto, intervalo):
+    assert intervalo_de_artigos(texto) == intervalo